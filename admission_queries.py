@@ -0,0 +1,147 @@
+from datetime import datetime
+import base64
+
+# Columns shown in the admin list; medical and document fields are only loaded by api_admission
+SUMMARY_COLUMNS = ['id', 'student_name', 'cnic', 'dob', 'gender', 'course', 'admission_type',
+                   'affidavit', 'created_at']
+
+# Every stored field, in form order, for the bulk export
+EXPORT_COLUMNS = ['id', 'student_name', 'cnic', 'dob', 'gender', 'age', 'phone', 'address', 'student_occupation',
+                  'parent_name', 'parent_cnic', 'parent_phone', 'parent_occupation', 'num_siblings',
+                  'sibling_disability', 'guardian_name', 'guardian_phone', 'disability_certificate',
+                  'disability_name', 'medical_history', 'regular_medication', 'assistive_device', 'epilepsy',
+                  'drug_addiction', 'assistant', 'communicable_disease', 'education_level', 'documents', 'course',
+                  'admission_type', 'duration_stay', 'pick_drop', 'affidavit', 'admission_date', 'photo',
+                  'created_at']
+
+EXPORT_BATCH_SIZE = 1000
+
+# Sort key -> column; every sort is paired with id so the keyset is unique
+SORT_COLUMNS = {
+    'created_at': 'created_at',
+    'student_name': 'student_name',
+}
+
+GENDERS = ['M', 'F']
+ADMISSION_TYPES = ['Day Scholar', 'Hostel Boarder']
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def parse_filters(args):
+    # Reads list filters from a request's query string, ignoring invalid values
+    filters = {
+        'course': args.get('course', '').strip(),
+        'admission_type': args.get('admission_type', '') if args.get('admission_type') in ADMISSION_TYPES else '',
+        'gender': args.get('gender', '') if args.get('gender') in GENDERS else '',
+        'date_from': '',
+        'date_to': '',
+        'sort': args.get('sort') if args.get('sort') in SORT_COLUMNS else 'created_at',
+        'order': 'asc' if args.get('order') == 'asc' else 'desc',
+        'after': args.get('after', ''),
+        'limit': min(max(args.get('limit', DEFAULT_PAGE_SIZE, type=int) or DEFAULT_PAGE_SIZE, 1), MAX_PAGE_SIZE),
+    }
+    for key in ('date_from', 'date_to'):
+        value = args.get(key, '')
+        try:
+            datetime.strptime(value, '%Y-%m-%d')
+            filters[key] = value
+        except ValueError:
+            pass
+    return filters
+
+
+def where_clause(filters):
+    # WHERE fragment and params for the filters; shared by the list and the export
+    conditions = []
+    params = []
+    for key in ('course', 'admission_type', 'gender'):
+        if filters.get(key):
+            conditions.append(f"{key} = %s")
+            params.append(filters[key])
+    if filters.get('date_from'):
+        conditions.append("created_at >= %s")
+        params.append(filters['date_from'])
+    if filters.get('date_to'):
+        conditions.append("created_at < %s + INTERVAL 1 DAY")
+        params.append(filters['date_to'])
+    return (" WHERE " + " AND ".join(conditions)) if conditions else "", params
+
+
+def order_clause(filters):
+    column = SORT_COLUMNS[filters.get('sort', 'created_at')]
+    direction = 'ASC' if filters.get('order') == 'asc' else 'DESC'
+    return f" ORDER BY {column} {direction}, id {direction}"
+
+
+def encode_cursor(value, row_id):
+    if isinstance(value, datetime):
+        value = value.strftime('%Y-%m-%d %H:%M:%S')
+    token = f"{value}\x1f{row_id}".encode()
+    return base64.urlsafe_b64encode(token).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        value, row_id = raw.rsplit('\x1f', 1)
+        return value, int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def page_query(filters):
+    # (SQL, params) for one page of the list, fetching one extra row to detect a next page
+    where, params = where_clause(filters)
+    after = decode_cursor(filters['after']) if filters.get('after') else None
+    if after:
+        column = SORT_COLUMNS[filters['sort']]
+        op = '>' if filters['order'] == 'asc' else '<'
+        keyset = f"({column} {op} %s OR ({column} = %s AND id {op} %s))"
+        where = f"{where} AND {keyset}" if where else f" WHERE {keyset}"
+        params += [after[0], after[0], after[1]]
+    return (f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM admissions{where}{order_clause(filters)} LIMIT %s",
+            params + [filters['limit'] + 1])
+
+
+def fetch_page(cursor, filters):
+    # Keyset pagination: resume after the (sort value, id) of the last row shown,
+    # so deep pages cost the same as the first one. Returns (rows, next cursor).
+    cursor.execute(*page_query(filters))
+    rows = cursor.fetchall()
+    limit = filters['limit']
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last[SORT_COLUMNS[filters['sort']]], last['id'])
+    for row in rows:
+        row['dob'] = row['dob'].strftime('%Y-%m-%d') if row['dob'] else 'N/A'
+        row['created_at'] = row['created_at'].strftime('%Y-%m-%d %H:%M:%S') if row['created_at'] else 'N/A'
+        for key in row:
+            if row[key] is None:
+                row[key] = 'N/A'
+    return rows, next_cursor
+
+
+def iter_export_rows(conn, filters):
+    # Streams matching rows (as tuples in EXPORT_COLUMNS order) through an unbuffered
+    # cursor, so the server sends them as they are read instead of all at once
+    where, params = where_clause(filters)
+    cursor = conn.cursor()
+    finished = False
+    try:
+        cursor.execute(f"SELECT {', '.join(EXPORT_COLUMNS)} FROM admissions{where}{order_clause(filters)}", params)
+        while True:
+            rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            yield from rows
+        finished = True
+    finally:
+        if finished:
+            cursor.close()
+        else:
+            # Abandoned mid-result (client went away); drop the connection rather than drain it
+            conn.invalidate()
@@ -0,0 +1,189 @@
+from datetime import date
+from dateutil.relativedelta import relativedelta
+import logging
+
+# Attendance statuses that count as attending; compared case-insensitively
+PRESENT_STATUSES = ['present', 'late']
+DEFAULT_MONTHS = 12
+MAX_MONTHS = 60
+
+# One row per student per month; the charts read these instead of the raw tables
+CREATE_TABLES = [
+    '''CREATE TABLE IF NOT EXISTS attendance_monthly
+       (student_id INT(11) NOT NULL,
+        month DATE NOT NULL,
+        total INT NOT NULL DEFAULT 0,
+        present INT NOT NULL DEFAULT 0,
+        late INT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (student_id, month),
+        KEY idx_attendance_monthly_month (month))''',
+    '''CREATE TABLE IF NOT EXISTS progress_monthly
+       (student_id INT(11) NOT NULL,
+        month DATE NOT NULL,
+        subject VARCHAR(100) NOT NULL,
+        reports INT NOT NULL DEFAULT 0,
+        marked INT NOT NULL DEFAULT 0,
+        marks_sum INT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (student_id, month, subject),
+        KEY idx_progress_monthly_month (month))''',
+]
+
+# First day of the row's month, without DATE_FORMAT's % (which clashes with parameters)
+_MONTH_SQL = "{col} - INTERVAL (DAYOFMONTH({col}) - 1) DAY"
+
+_ATTENDANCE_ROLLUP = f"""
+    INSERT INTO attendance_monthly (student_id, month, total, present, late)
+    SELECT student_id, {_MONTH_SQL.format(col='date')} AS month, COUNT(*),
+           SUM(LOWER(status) IN ({', '.join(['%s'] * len(PRESENT_STATUSES))})),
+           SUM(LOWER(status) = 'late')
+    FROM attendance
+    WHERE student_id IS NOT NULL AND date IS NOT NULL {{where}}
+    GROUP BY student_id, month
+    ON DUPLICATE KEY UPDATE total = VALUES(total), present = VALUES(present), late = VALUES(late)"""
+
+_PROGRESS_ROLLUP = f"""
+    INSERT INTO progress_monthly (student_id, month, subject, reports, marked, marks_sum)
+    SELECT student_id, {_MONTH_SQL.format(col='report_date')} AS month, subject, COUNT(*),
+           COUNT(marks), COALESCE(SUM(marks), 0)
+    FROM progress_reports
+    WHERE student_id IS NOT NULL AND report_date IS NOT NULL AND subject IS NOT NULL {{where}}
+    GROUP BY student_id, month, subject
+    ON DUPLICATE KEY UPDATE reports = VALUES(reports), marked = VALUES(marked), marks_sum = VALUES(marks_sum)"""
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def refresh(cursor, kind, student_ids, days):
+    # Recomputes the affected students' months from the raw rows (a month is at most a
+    # few dozen rows per student on the (student_id, date) indexes). Call in the same
+    # transaction as the write so rollups and raw rows commit together.
+    student_ids = sorted(set(student_ids))
+    if not student_ids or not days:
+        return
+    start = month_start(min(days))
+    end = month_start(max(days)) + relativedelta(months=1)
+    placeholders = ', '.join(['%s'] * len(student_ids))
+    if kind == 'attendance':
+        where = f"AND student_id IN ({placeholders}) AND date >= %s AND date < %s"
+        cursor.execute(_ATTENDANCE_ROLLUP.format(where=where), PRESENT_STATUSES + student_ids + [start, end])
+    else:
+        where = f"AND student_id IN ({placeholders}) AND report_date >= %s AND report_date < %s"
+        cursor.execute(_PROGRESS_ROLLUP.format(where=where), student_ids + [start, end])
+
+
+def rebuild(cursor):
+    # Full recompute, for the initial backfill or after editing raw rows by hand
+    cursor.execute("DELETE FROM attendance_monthly")
+    cursor.execute(_ATTENDANCE_ROLLUP.format(where=''), PRESENT_STATUSES)
+    cursor.execute("DELETE FROM progress_monthly")
+    cursor.execute(_PROGRESS_ROLLUP.format(where=''))
+    logging.info("Attendance and progress rollups rebuilt")
+
+
+def parse_months(value):
+    try:
+        return min(max(int(value), 1), MAX_MONTHS)
+    except (TypeError, ValueError):
+        return DEFAULT_MONTHS
+
+
+def _window(months):
+    # Month starts from (months - 1) months ago up to the current month, oldest first
+    current = month_start(date.today())
+    return [current - relativedelta(months=offset) for offset in range(months - 1, -1, -1)]
+
+
+def _rate(present, total):
+    return round(100.0 * float(present) / float(total), 1) if total else None
+
+
+def _average(marks_sum, marked):
+    return round(float(marks_sum) / float(marked), 1) if marked else None
+
+
+def _trend(values):
+    # Change between the last two months that have data
+    points = [value for value in values if value is not None]
+    return round(points[-1] - points[-2], 1) if len(points) >= 2 else None
+
+
+def _attendance_series(rows, window):
+    by_month = {row[0]: row for row in rows}
+    series = []
+    for month in window:
+        _, total, present, late = by_month.get(month, (month, 0, 0, 0))
+        series.append({'month': month.strftime('%Y-%m'), 'total': int(total), 'present': int(present),
+                       'late': int(late), 'rate': _rate(present, total)})
+    return series
+
+
+def _progress_series(rows, window):
+    subjects = {}
+    for month, subject, marked, marks_sum in rows:
+        subjects.setdefault(subject, {})[month] = (marks_sum, marked)
+    result = {}
+    for subject, by_month in sorted(subjects.items()):
+        result[subject] = [{'month': month.strftime('%Y-%m'),
+                            'average': _average(*by_month.get(month, (0, 0)))} for month in window]
+    return result
+
+
+def _overall(rows, window):
+    # Average across subjects, weighted by the number of marked reports
+    totals = {}
+    for month, _, marked, marks_sum in rows:
+        month_sum, month_marked = totals.get(month, (0, 0))
+        totals[month] = (month_sum + marks_sum, month_marked + marked)
+    return [_average(*totals.get(month, (0, 0))) for month in window]
+
+
+def student_summary(cursor, student_id, months=DEFAULT_MONTHS):
+    window = _window(months)
+    cursor.execute("""SELECT month, total, present, late FROM attendance_monthly
+                      WHERE student_id = %s AND month >= %s ORDER BY month""", (student_id, window[0]))
+    attendance = _attendance_series(cursor.fetchall(), window)
+    cursor.execute("""SELECT month, subject, marked, marks_sum FROM progress_monthly
+                      WHERE student_id = %s AND month >= %s""", (student_id, window[0]))
+    progress_rows = cursor.fetchall()
+    overall = _overall(progress_rows, window)
+    return {
+        'student_id': student_id,
+        'months': [month.strftime('%Y-%m') for month in window],
+        'attendance': attendance,
+        'progress': _progress_series(progress_rows, window),
+        'average_marks': overall,
+        'trend': {
+            'attendance_rate': _trend([point['rate'] for point in attendance]),
+            'average_marks': _trend(overall),
+        },
+    }
+
+
+def institute_summary(cursor, months=DEFAULT_MONTHS):
+    # Same shape as student_summary, summed over every student's rollups. SUM() comes
+    # back as DECIMAL, so the sums are cast to plain integers.
+    window = _window(months)
+    cursor.execute("""SELECT month, CAST(SUM(total) AS SIGNED), CAST(SUM(present) AS SIGNED),
+                             CAST(SUM(late) AS SIGNED)
+                      FROM attendance_monthly
+                      WHERE month >= %s GROUP BY month ORDER BY month""", (window[0],))
+    attendance = _attendance_series(cursor.fetchall(), window)
+    cursor.execute("""SELECT month, subject, CAST(SUM(marked) AS SIGNED), CAST(SUM(marks_sum) AS SIGNED)
+                      FROM progress_monthly
+                      WHERE month >= %s GROUP BY month, subject""", (window[0],))
+    progress_rows = cursor.fetchall()
+    overall = _overall(progress_rows, window)
+    return {
+        'months': [month.strftime('%Y-%m') for month in window],
+        'attendance': attendance,
+        'progress': _progress_series(progress_rows, window),
+        'average_marks': overall,
+        'trend': {
+            'attendance_rate': _trend([point['rate'] for point in attendance]),
+            'average_marks': _trend(overall),
+        },
+    }
@@ -1,18 +1,39 @@
-from flask import Flask, render_template, request, redirect, session, url_for, flash, jsonify
+from flask import Flask, render_template, stream_template, request, redirect, session, url_for, flash, get_flashed_messages, jsonify, Response, stream_with_context
 import mysql.connector
-from db import get_connection
+import click
+from db import get_connection, get_db, get_cursor, close_db, pool_stats
+from cache import catalog_cache, page_cache
+import stats
+import timeseries
+import migrations
+import admission_queries
+import contact_queries
+import contact_intake
+import credentials
+import throttle
+import unread_counter
+import exports
+import upload_pipeline
+import storage
+import assets
+import images
+import popup_delivery
+import compression
+import template_cache
+import guardian_overview
+import ingestion
+import analytics
 import time
 import base64
 from datetime import datetime
 import os
-from werkzeug.utils import secure_filename
 import uuid
 import logging
 import re
-from dateutil.relativedelta import relativedelta
 
 app = Flask(__name__)
 app.secret_key = 'secret123'
+app.teardown_appcontext(close_db)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -25,6 +46,7 @@ UPLOAD_FOLDER_ADMISSIONS = os.path.join(app.root_path, 'static', 'Uploads', 'adm
 app.config['UPLOAD_FOLDER_EVENTS'] = UPLOAD_FOLDER_EVENTS
 app.config['UPLOAD_FOLDER_COURSES'] = UPLOAD_FOLDER_COURSES
 app.config['UPLOAD_FOLDER_ADMISSIONS'] = UPLOAD_FOLDER_ADMISSIONS
+app.config['UPLOAD_STAGING_FOLDER'] = os.path.join(app.root_path, 'uploads_staging')
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf', 'doc', 'docx'}
 
 # Ensure upload folders exist with proper permissions
@@ -33,6 +55,32 @@ for folder in [UPLOAD_FOLDER_EVENTS, UPLOAD_FOLDER_COURSES, UPLOAD_FOLDER_ADMISS
         os.makedirs(folder, exist_ok=True)
         os.chmod(folder, 0o755)
 
+template_cache.init_app(app)
+storage.init_app(app)
+assets.init_app(app)
+compression.init_app(app)
+app.jinja_env.globals['responsive_image'] = images.responsive_image
+
+# Large admin pages are streamed so the <head> and its stylesheets reach the browser
+# before the table rows are rendered; set STREAM_ADMIN_PAGES=0 to render them whole
+STREAM_ADMIN_PAGES = os.environ.get('STREAM_ADMIN_PAGES', '1') != '0'
+
+def render_streamed(template_name, **context):
+    if not STREAM_ADMIN_PAGES:
+        return render_template(template_name, **context)
+    # Pop flashes now: the session cookie is sent before the template reads them
+    get_flashed_messages(with_categories=True)
+    return Response(compression.buffered(stream_template(template_name, **context)), mimetype='text/html')
+
+# Proxies in front of the app that append to X-Forwarded-For (0: use the socket address);
+# the client address keys the contact and login rate limits
+PROXY_HOPS = int(os.environ.get('PROXY_HOPS', 0))
+
+def client_ip():
+    if PROXY_HOPS and len(request.access_route) >= PROXY_HOPS:
+        return request.access_route[-PROXY_HOPS]
+    return request.remote_addr
+
 # Custom Jinja2 filter for datetime formatting
 def datetimeformat(value, format='%Y-%m-%d %H:%M:%S'):
     if isinstance(value, str):
@@ -48,6 +96,12 @@ app.jinja_env.filters['datetimeformat'] = datetimeformat
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+# Deletes images (and their resized variants) released by a transaction that has committed
+def remove_released_images(released):
+    for image_url, image_variants in released:
+        if storage.remove(get_db(), image_url):
+            images.remove_variants(app.static_folder, image_variants)
+
 # Validate CNIC format (e.g., 12345-1234567-1)
 def validate_cnic(cnic):
     return re.match(r'^\d{5}-\d{7}-\d{1}$', cnic) is not None
@@ -56,220 +110,75 @@ def validate_cnic(cnic):
 def validate_phone(phone):
     return re.match(r'^\+92\d{10}$', phone) is not None
 
-# Initialize database tables
+# Initialize database tables by applying any pending migrations
 def init_db():
     conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('''CREATE TABLE IF NOT EXISTS popups
-                      (id INTEGER PRIMARY KEY AUTO_INCREMENT,
-                       title VARCHAR(255),
-                       message TEXT NOT NULL,
-                       image_url VARCHAR(255),
-                       show_until TEXT,
-                       type TEXT)''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS attendance
-                      (id INT(11) PRIMARY KEY AUTO_INCREMENT,
-                       student_id INT(11),
-                       date DATE,
-                       status VARCHAR(20),
-                       created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS students
-                      (id INT(11) PRIMARY KEY AUTO_INCREMENT,
-                       name VARCHAR(100) NOT NULL,
-                       age INT,
-                       guardian_id INT(11),
-                       created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS contacts
-                      (id INT(11) PRIMARY KEY AUTO_INCREMENT,
-                       name VARCHAR(100) NOT NULL,
-                       email VARCHAR(100) NOT NULL,
-                       subject VARCHAR(200),
-                       message TEXT,
-                       created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                       is_read BOOLEAN DEFAULT FALSE)''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS progress_reports
-                      (id INT(11) PRIMARY KEY AUTO_INCREMENT,
-                       student_id INT(11),
-                       subject VARCHAR(100),
-                       marks INT,
-                       comments TEXT,
-                       report_date DATE,
-                       created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS staff
-                      (id INT(11) PRIMARY KEY AUTO_INCREMENT,
-                       designation VARCHAR(100) NOT NULL,
-                       bps_grade VARCHAR(10) NOT NULL,
-                       quantity INT NOT NULL)''')
-    # Add missing columns if table exists
-    cursor.execute("SHOW COLUMNS FROM staff LIKE 'bps_grade'")
-    if not cursor.fetchone():
-        cursor.execute('''ALTER TABLE staff ADD COLUMN bps_grade VARCHAR(10) NOT NULL AFTER designation''')
-    cursor.execute("SHOW COLUMNS FROM staff LIKE 'quantity'")
-    if not cursor.fetchone():
-        cursor.execute('''ALTER TABLE staff ADD COLUMN quantity INT NOT NULL AFTER bps_grade''')
-    # Remove obsolete columns
-    cursor.execute("SHOW COLUMNS FROM staff LIKE 'name'")
-    if cursor.fetchone():
-        cursor.execute('''ALTER TABLE staff DROP COLUMN name''')
-    cursor.execute("SHOW COLUMNS FROM staff LIKE 'qualification'")
-    if cursor.fetchone():
-        cursor.execute('''ALTER TABLE staff DROP COLUMN qualification''')
-    cursor.execute("SHOW COLUMNS FROM staff LIKE 'photo_url'")
-    if cursor.fetchone():
-        cursor.execute('''ALTER TABLE staff DROP COLUMN photo_url''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS guardians
-                      (id INT(11) PRIMARY KEY AUTO_INCREMENT,
-                       full_name VARCHAR(100) NOT NULL,
-                       email VARCHAR(100) NOT NULL UNIQUE,
-                       password VARCHAR(255) NOT NULL,
-                       phone VARCHAR(15),
-                       cnic VARCHAR(15),
-                       created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS admissions
-                  (id INT(11) PRIMARY KEY AUTO_INCREMENT,
-                   student_name VARCHAR(100) NOT NULL,
-                   cnic VARCHAR(15) NOT NULL,
-                   dob DATE,
-                   gender VARCHAR(10),
-                   age INT,
-                   phone VARCHAR(15),
-                   address TEXT,
-                   student_occupation VARCHAR(100),
-                   parent_name VARCHAR(100),
-                   parent_cnic VARCHAR(15),
-                   parent_phone VARCHAR(15),
-                   parent_occupation VARCHAR(100),
-                   num_siblings INT,
-                   sibling_disability VARCHAR(100),
-                   guardian_name VARCHAR(100),
-                   guardian_phone VARCHAR(15),
-                   disability_certificate VARCHAR(255),
-                   disability_name VARCHAR(100),
-                   medical_history TEXT,
-                   regular_medication TEXT,
-                   assistive_device VARCHAR(100),
-                   epilepsy VARCHAR(10),
-                   drug_addiction VARCHAR(10),
-                   assistant VARCHAR(10),
-                   communicable_disease TEXT,
-                   education_level VARCHAR(100),
-                   documents VARCHAR(255),
-                   course VARCHAR(100),
-                   admission_type VARCHAR(20),
-                   duration_stay INT,
-                   pick_drop VARCHAR(100),
-                   affidavit VARCHAR(10),
-                   admission_date DATE,
-                   photo VARCHAR(255),
-                   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
-    # Dynamically add missing columns to admissions table
-    cursor.execute("SHOW COLUMNS FROM admissions")
-    existing_columns = [col[0] for col in cursor.fetchall()]
-    required_columns = {
-        'phone': 'VARCHAR(15) AFTER age',
-        'address': 'TEXT AFTER phone',
-        'student_occupation': 'VARCHAR(100) AFTER address',
-        'parent_name': 'VARCHAR(100) AFTER student_occupation',
-        'parent_cnic': 'VARCHAR(15) AFTER parent_name',
-        'parent_phone': 'VARCHAR(15) AFTER parent_cnic',
-        'parent_occupation': 'VARCHAR(100) AFTER parent_phone',
-        'num_siblings': 'INT AFTER parent_occupation',
-        'sibling_disability': 'VARCHAR(100) AFTER num_siblings',
-        'guardian_name': 'VARCHAR(100) AFTER sibling_disability',
-        'guardian_phone': 'VARCHAR(15) AFTER guardian_name',
-        'disability_certificate': 'VARCHAR(255) AFTER guardian_phone',
-        'disability_name': 'VARCHAR(100) AFTER disability_certificate',
-        'medical_history': 'TEXT AFTER disability_name',
-        'regular_medication': 'TEXT AFTER medical_history',
-        'assistive_device': 'VARCHAR(100) AFTER regular_medication',
-        'epilepsy': 'VARCHAR(10) AFTER assistive_device',
-        'drug_addiction': 'VARCHAR(10) AFTER epilepsy',
-        'assistant': 'VARCHAR(10) AFTER drug_addiction',
-        'communicable_disease': 'TEXT AFTER assistant',
-        'education_level': 'VARCHAR(100) AFTER communicable_disease',
-        'documents': 'VARCHAR(255) AFTER education_level',
-        'course': 'VARCHAR(100) AFTER documents',
-        'admission_type': 'VARCHAR(20) AFTER course',
-        'duration_stay': 'INT AFTER admission_type',
-        'pick_drop': 'VARCHAR(100) AFTER duration_stay',
-        'affidavit': 'VARCHAR(10) AFTER pick_drop',
-        'admission_date': 'DATE AFTER affidavit',
-        'photo': 'VARCHAR(255) AFTER admission_date'
-    }
-    for col, definition in required_columns.items():
-        if col not in existing_columns:
-            cursor.execute(f"ALTER TABLE admissions ADD COLUMN {col} {definition}")
-    cursor.execute("SHOW COLUMNS FROM admissions LIKE 'photo'")
-    if not cursor.fetchone():
-        cursor.execute('''ALTER TABLE admissions ADD COLUMN photo VARCHAR(255)''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS courses
-                      (id INT(11) PRIMARY KEY AUTO_INCREMENT,
-                       course_id VARCHAR(36) NOT NULL,
-                       name VARCHAR(100) NOT NULL,
-                       description TEXT,
-                       duration VARCHAR(50),
-                       level VARCHAR(50),
-                       created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                       image_url VARCHAR(255))''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS events
-                      (id INT(11) PRIMARY KEY AUTO_INCREMENT,
-                       title VARCHAR(100) NOT NULL,
-                       date DATE,
-                       description TEXT,
-                       image_url VARCHAR(255),
-                       created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
-    conn.commit()
-    cursor.close()
-    conn.close()
+    try:
+        migrations.migrate(conn)
+    finally:
+        conn.close()
+
+# Catalog loaders; results are cached until an admin route changes the table
+def load_courses():
+    cursor = get_cursor(dictionary=True)
+    cursor.execute("SELECT * FROM courses")
+    return cursor.fetchall()
+
+def load_events():
+    cursor = get_cursor(dictionary=True)
+    cursor.execute("SELECT * FROM events ORDER BY date DESC")
+    return cursor.fetchall()
+
+def load_latest_events():
+    cursor = get_cursor(dictionary=True)
+    cursor.execute("SELECT * FROM events ORDER BY date DESC LIMIT 3")
+    return cursor.fetchall()
 
 # Public Routes
 @app.route('/')
 def index():
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
     try:
-        cursor.execute("SELECT * FROM events ORDER BY date DESC LIMIT 3")
-        events = cursor.fetchall()
-        cursor.execute("SELECT * FROM courses")
-        courses = cursor.fetchall()
+        events = catalog_cache.get('latest_events', 'events', load_latest_events)
+        courses = catalog_cache.get('courses', 'courses', load_courses)
     except Exception as e:
         flash(f'Error fetching data: {str(e)}', 'error')
         logging.error(f"Index fetch error: {str(e)}")
         events = []
         courses = []
-    finally:
-        cursor.close()
-        conn.close()
-    return render_template('index.html', events=events, courses=courses)
+    popups = None
+    if popup_delivery.INLINE:
+        try:
+            popups = popup_delivery.active()['popups']
+        except Exception as e:
+            # The page falls back to fetching /get_popups
+            logging.error(f"Index popups error: {str(e)}")
+    return render_template('index.html', events=events, courses=courses, popups=popups)
 
 @app.route('/about')
+@page_cache.cached()
 def about():
     return render_template('about.html')
 
 @app.route('/courses')
+@page_cache.cached('courses')
 def courses():
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
     try:
-        cursor.execute("SELECT * FROM courses")
-        courses = cursor.fetchall()
+        courses = catalog_cache.get('courses', 'courses', load_courses)
     except Exception as e:
         flash(f'Error fetching courses: {str(e)}', 'error')
         logging.error(f"Courses fetch error: {str(e)}")
         courses = []
-    finally:
-        cursor.close()
-        conn.close()
     return render_template('courses.html', courses=courses)
 
 @app.route('/programs')
+@page_cache.cached()
 def programs():
     return render_template('programs.html')
 
 @app.route('/team')
+@page_cache.cached('staff')
 def team():
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+    cursor = get_cursor(dictionary=True)
     try:
         cursor.execute("SELECT * FROM staff")
         staff = cursor.fetchall()
@@ -277,20 +186,20 @@ def team():
         flash(f'Error fetching staff data: {str(e)}', 'error')
         logging.error(f"Team fetch error: {str(e)}")
         staff = []
-    finally:
-        cursor.close()
-        conn.close()
     return render_template('team.html', staff=staff)
 
 @app.route('/contact')
+@page_cache.cached()
 def contact():
     return render_template('contact.html')
 
 @app.route('/facilities')
+@page_cache.cached()
 def facilities():
     return render_template('facilities.html')
 
 @app.route('/admissions')
+@page_cache.cached()
 def admissions():
     return render_template('admissions.html')
 
@@ -302,19 +211,14 @@ def apply_now():
     return render_template('apply_now.html', today=datetime.now().strftime('%Y-%m-%d'))
 
 @app.route('/events')
+@page_cache.cached('events')
 def events():
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
     try:
-        cursor.execute("SELECT * FROM events ORDER BY date DESC")
-        events = cursor.fetchall()
+        events = catalog_cache.get('events', 'events', load_events)
     except Exception as e:
         flash(f'Error fetching events: {str(e)}', 'error')
         logging.error(f"Events fetch error: {str(e)}")
         events = []
-    finally:
-        cursor.close()
-        conn.close()
     return render_template('events.html', events=events)
 
 @app.route('/contact_submit', methods=['POST'])
@@ -323,22 +227,20 @@ def contact_submit():
     email = request.form.get('email')
     subject = request.form.get('subject')
     message = request.form.get('message')
-    if not all([name, email, message]):
-        flash('Please fill all required fields.', 'error')
+    error = contact_intake.validate(name, email, subject, message)
+    if error:
+        flash(error, 'error')
         return redirect(url_for('contact'))
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("""INSERT INTO contacts (name, email, subject, message, is_read)
-                         VALUES (%s, %s, %s, %s, %s)""", (name, email, subject, message, False))
-        conn.commit()
+    # Queued for the next batched INSERT (contact_intake); nothing touches the DB here
+    outcome = contact_intake.submit(client_ip(), name, email, subject, message)
+    if outcome == contact_intake.ACCEPTED:
         flash('Contact form submitted successfully!', 'success')
-    except Exception as e:
-        flash(f'Error submitting contact form: {str(e)}', 'error')
-        logging.error(f"Contact submit error: {str(e)}")
-    finally:
-        cursor.close()
-        conn.close()
+    elif outcome == contact_intake.DUPLICATE:
+        flash('We have already received this message.', 'info')
+    elif outcome == contact_intake.RATE_LIMITED:
+        flash('Too many messages from your connection. Please wait a minute and try again.', 'error')
+    else:
+        flash('We could not accept your message right now. Please try again shortly.', 'error')
     return redirect(url_for('contact'))
 
 # Guardian Routes
@@ -362,19 +264,17 @@ def guardian_signup():
     if phone and not validate_phone(phone):
         flash('Invalid phone format. Use +923123456789.', 'error')
         return redirect(url_for('guardian_signup_page'))
-    conn = get_connection()
-    cursor = conn.cursor()
+    conn = get_db()
+    cursor = get_cursor()
     try:
         cursor.execute("""INSERT INTO guardians (full_name, email, password, phone, cnic)
-                         VALUES (%s, %s, %s, %s, %s)""", (full_name, email, password, phone, cnic))
+                         VALUES (%s, %s, %s, %s, %s)""",
+                       (full_name, email, credentials.hash_password(password), phone, cnic))
         conn.commit()
         flash('Signup successful! Please log in.', 'success')
     except Exception as e:
         flash(f'Signup failed: {str(e)}', 'error')
         logging.error(f"Signup error: {str(e)}")
-    finally:
-        cursor.close()
-        conn.close()
     return redirect(url_for('guardian_login_page'))
 
 @app.route('/guardian', methods=['GET'])
@@ -388,33 +288,36 @@ def guardian_login():
     if not all([email, password]):
         flash('Please provide email and password.', 'error')
         return redirect(url_for('guardian_login_page'))
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+    # Rejected before a connection is taken or a hash computed
+    ip = client_ip()
+    wait = throttle.retry_after('login', ip, email)
+    if wait:
+        flash(f'Too many failed login attempts. Please try again in {throttle.describe(wait)}.', 'error')
+        return redirect(url_for('guardian_login_page'))
+    cursor = get_cursor(dictionary=True)
     try:
-        cursor.execute("SELECT id, name, email, password FROM admins WHERE email = %s", (email,))
-        admin = cursor.fetchone()
-        if admin and admin['password'] == password:
+        account = credentials.authenticate(get_db(), cursor, email, password)
+        if account:
+            throttle.reset('login', email)
+        else:
+            throttle.record('login', ip, email)
+        if account and account['user_type'] == 'admin':
             session['user_type'] = 'admin'
-            session['user_name'] = admin['name']
-            session['user_email'] = admin['email']
+            session['user_name'] = account['name']
+            session['user_email'] = account['email']
             flash('Admin login successful!', 'success')
             return redirect(url_for('admin_dashboard'))
-        cursor.execute("SELECT id, full_name, email, password FROM guardians WHERE email = %s", (email,))
-        guardian = cursor.fetchone()
-        if guardian and guardian['password'] == password:
+        if account:
             session['user_type'] = 'guardian'
-            session['user_name'] = guardian['full_name']
-            session['user_email'] = guardian['email']
-            session['guardian_id'] = guardian['id']
+            session['user_name'] = account['name']
+            session['user_email'] = account['email']
+            session['guardian_id'] = account['id']
             flash('Guardian login successful!', 'success')
             return redirect(url_for('index'))
         flash('Invalid email or password.', 'error')
     except Exception as e:
         flash(f'Login error: {str(e)}', 'error')
         logging.error(f"Login error: {str(e)}")
-    finally:
-        cursor.close()
-        conn.close()
     return redirect(url_for('guardian_login_page'))
 
 @app.route('/forgot_password', methods=['GET'])
@@ -427,27 +330,26 @@ def forgot_password():
     if not email:
         flash('Please provide an email address.', 'error')
         return redirect(url_for('forgot_password_page'))
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+    ip = client_ip()
+    wait = throttle.retry_after('reset', ip, email)
+    if wait:
+        flash(f'Too many password reset requests. Please try again in {throttle.describe(wait)}.', 'error')
+        return redirect(url_for('forgot_password_page'))
+    throttle.record('reset', ip, email)
+    cursor = get_cursor(dictionary=True)
     try:
-        cursor.execute("SELECT email, name FROM admins WHERE email = %s", (email,))
-        admin = cursor.fetchone()
-        cursor.execute("SELECT email, full_name FROM guardians WHERE email = %s", (email,))
-        guardian = cursor.fetchone()
-        if admin or guardian:
+        accounts = credentials.find_accounts(cursor, email)
+        if accounts:
             token = base64.b64encode(f"{email}:{int(time.time())}".encode()).decode()
             session['reset_token'] = token
             session['reset_email'] = email
-            session['user_type'] = 'admin' if admin else 'guardian'
+            session['user_type'] = accounts[0]['user_type']
             flash('Password reset link sent! Check your email.', 'success')
         else:
             flash('Email not found.', 'error')
     except Exception as e:
         flash(f'Error: {str(e)}', 'error')
         logging.error(f"Forgot password error: {str(e)}")
-    finally:
-        cursor.close()
-        conn.close()
     return redirect(url_for('forgot_password_page'))
 
 @app.route('/reset_password/<token>', methods=['GET', 'POST'])
@@ -464,13 +366,14 @@ def reset_password(token):
     if not password or password != confirm_password:
         flash('Passwords do not match or are empty.', 'error')
         return redirect(url_for('reset_password', token=token))
-    conn = get_connection()
-    cursor = conn.cursor()
+    conn = get_db()
+    cursor = get_cursor()
     try:
+        password_hash = credentials.hash_password(password)
         if user_type == 'admin':
-            cursor.execute("UPDATE admins SET password = %s WHERE email = %s", (password, email))
+            cursor.execute("UPDATE admins SET password = %s WHERE email = %s", (password_hash, email))
         else:
-            cursor.execute("UPDATE guardians SET password = %s WHERE email = %s", (password, email))
+            cursor.execute("UPDATE guardians SET password = %s WHERE email = %s", (password_hash, email))
         conn.commit()
         flash('Password reset successfully! Please log in.', 'success')
         session.pop('reset_token', None)
@@ -479,9 +382,6 @@ def reset_password(token):
     except Exception as e:
         flash(f'Error resetting password: {str(e)}', 'error')
         logging.error(f"Reset password error: {str(e)}")
-    finally:
-        cursor.close()
-        conn.close()
     return redirect(url_for('guardian_login_page'))
 
 @app.route('/guardian_dashboard')
@@ -489,36 +389,12 @@ def guardian_dashboard():
     if session.get('user_type') != 'guardian':
         flash('Please log in as a guardian.', 'error')
         return redirect(url_for('guardian_login_page'))
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
     try:
-        cursor.execute("SELECT title, date FROM events WHERE date >= CURDATE() ORDER BY date ASC LIMIT 3")
-        events = cursor.fetchall()
-        cursor.execute("""
-                       SELECT s.id, s.name, s.age
-                       FROM students s
-                       JOIN guardians g ON s.guardian_id = g.id
-                       WHERE g.id = %s
-                       """, (session.get('guardian_id'),))
-        children = cursor.fetchall()
-        cursor.execute("""
-                       SELECT a.id, s.name AS student_name, a.date, a.status
-                       FROM attendance a
-                       JOIN students s ON a.student_id = s.id
-                       JOIN guardians g ON s.guardian_id = g.id
-                       WHERE g.id = %s
-                       ORDER BY a.date DESC LIMIT 3
-                       """, (session.get('guardian_id'),))
-        attendance = cursor.fetchall()
-        cursor.execute("""
-                       SELECT p.id, s.name AS student_name, p.subject, p.marks, p.report_date
-                       FROM progress_reports p
-                       JOIN students s ON p.student_id = s.id
-                       JOIN guardians g ON s.guardian_id = g.id
-                       WHERE g.id = %s
-                       ORDER BY p.report_date DESC LIMIT 3
-                       """, (session.get('guardian_id'),))
-        progress_reports = cursor.fetchall()
+        overview = guardian_overview.get(session.get('guardian_id'))
+        events = overview['events']
+        children = overview['children']
+        attendance = overview['attendance']
+        progress_reports = overview['progress_reports']
     except Exception as e:
         flash(f'Error fetching dashboard data: {str(e)}', 'error')
         logging.error(f"Dashboard error: {str(e)}")
@@ -526,9 +402,6 @@ def guardian_dashboard():
         children = []
         attendance = []
         progress_reports = []
-    finally:
-        cursor.close()
-        conn.close()
     return render_template('guardian_dashboard.html',
                            guardian_name=session.get('user_name'),
                            events=events,
@@ -541,8 +414,8 @@ def guardian_settings():
     if session.get('user_type') != 'guardian':
         flash('Please log in as a guardian.', 'error')
         return redirect(url_for('guardian_login_page'))
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+    conn = get_db()
+    cursor = get_cursor(dictionary=True)
     if request.method == 'POST':
         full_name = request.form.get('full_name')
         phone = request.form.get('phone')
@@ -566,7 +439,7 @@ def guardian_settings():
             update_values = [full_name, phone or None, cnic or None]
             if password:
                 update_fields.append('password = %s')
-                update_values.append(password)
+                update_values.append(credentials.hash_password(password))
             update_values.append(session.get('user_email'))
             query = f"UPDATE guardians SET {', '.join(update_fields)} WHERE email = %s"
             cursor.execute(query, update_values)
@@ -577,9 +450,6 @@ def guardian_settings():
         except Exception as e:
             flash(f'Error updating profile: {str(e)}', 'error')
             logging.error(f"Settings update error: {str(e)}")
-        finally:
-            cursor.close()
-            conn.close()
         return redirect(url_for('guardian_settings'))
     try:
         cursor.execute("SELECT full_name, email, phone, cnic FROM guardians WHERE email = %s",
@@ -589,9 +459,6 @@ def guardian_settings():
         flash(f'Error fetching settings: {str(e)}', 'error')
         logging.error(f"Settings fetch error: {str(e)}")
         guardian = None
-    finally:
-        cursor.close()
-        conn.close()
     return render_template('guardian_settings.html', guardian=guardian)
 
 @app.route('/logout')
@@ -606,28 +473,18 @@ def admin_dashboard():
     if session.get('user_type') != 'admin':
         flash('Please log in as an admin.', 'error')
         return redirect(url_for('guardian_login_page'))
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
     try:
-        cursor.execute("SELECT COUNT(*) as count FROM courses")
-        course_count = cursor.fetchone()['count']
-        cursor.execute("SELECT COUNT(*) as count FROM staff")
-        staff_count = cursor.fetchone()['count']
-        cursor.execute("SELECT COUNT(*) as count FROM students")
-        student_count = cursor.fetchone()['count']
-        cursor.execute("SELECT COUNT(*) as count FROM events")
-        event_count = cursor.fetchone()['count']
-        cursor.execute("SELECT COUNT(*) as count FROM contacts WHERE is_read = FALSE")
-        contact_count = cursor.fetchone()['count']
-        cursor.execute("SELECT COUNT(*) as count FROM admissions")
-        admission_count = cursor.fetchone()['count']
+        counts = stats.read_counts(get_cursor(), get_db())
+        course_count = counts['courses']
+        staff_count = counts['staff']
+        student_count = counts['students']
+        event_count = counts['events']
+        contact_count = counts['unread_contacts']
+        admission_count = counts['admissions']
     except Exception as e:
         flash(f'Error fetching dashboard data: {str(e)}', 'error')
         logging.error(f"Admin dashboard error: {str(e)}")
         course_count = staff_count = student_count = event_count = contact_count = admission_count = 0
-    finally:
-        cursor.close()
-        conn.close()
     return render_template('admin_dashboard.html',
                            course_count=course_count,
                            staff_count=staff_count,
@@ -641,34 +498,14 @@ def admin_dashboard():
 def api_courses_events():
     if session.get('user_type') != 'admin':
         return jsonify({'success': False, 'error': 'Please log in as an admin.'}), 401
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
     try:
-        # Get the last 6 months
-        today = datetime.now()
-        months = []
-        courses_data = []
-        events_data = []
-        for i in range(5, -1, -1):  # Last 6 months, including current
-            month_date = today - relativedelta(months=i)
-            month_name = month_date.strftime('%b %Y')
-            month_num = month_date.month
-            year = month_date.year
-            months.append(month_name)
-            # Courses
-            cursor.execute("""
-                SELECT COUNT(*) as count
-                FROM courses
-                WHERE MONTH(created_at) = %s AND YEAR(created_at) = %s
-            """, (month_num, year))
-            courses_data.append(cursor.fetchone()['count'])
-            # Events
-            cursor.execute("""
-                SELECT COUNT(*) as count
-                FROM events
-                WHERE MONTH(created_at) = %s AND YEAR(created_at) = %s
-            """, (month_num, year))
-            events_data.append(cursor.fetchone()['count'])
+        # Last 6 months, including current
+        cursor = get_cursor()
+        courses_series = timeseries.series(cursor, 'courses', 'month', 6)
+        events_series = timeseries.series(cursor, 'events', 'month', 6)
+        months = [label for label, _ in courses_series]
+        courses_data = [count for _, count in courses_series]
+        events_data = [count for _, count in events_series]
         logging.info(f"Months: {months}, Courses data: {courses_data}, Events data: {events_data}")
         return jsonify({
             'success': True,
@@ -679,27 +516,39 @@ def api_courses_events():
     except Exception as e:
         logging.error(f"API courses_events error: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
+
+@app.route('/api/timeseries/<entity>', methods=['GET'])
+def api_timeseries(entity):
+    if session.get('user_type') != 'admin':
+        return jsonify({'success': False, 'error': 'Please log in as an admin.'}), 401
+    unit = request.args.get('unit', 'month')
+    count = request.args.get('count', 6, type=int)
+    try:
+        data = timeseries.series(get_cursor(), entity, unit, count)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logging.error(f"API timeseries error: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+    return jsonify({
+        'success': True,
+        'entity': entity,
+        'unit': unit,
+        'labels': [label for label, _ in data],
+        'counts': [count for _, count in data]
+    })
 
 @app.route('/api/activity_breakdown', methods=['GET'])
 def api_activity_breakdown():
     if session.get('user_type') != 'admin':
         return jsonify({'success': False, 'error': 'Please log in as an admin.'}), 401
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
     try:
-        cursor.execute("SELECT COUNT(*) as count FROM courses")
-        courses = cursor.fetchone()['count']
-        cursor.execute("SELECT COUNT(*) as count FROM events")
-        events = cursor.fetchone()['count']
-        cursor.execute("SELECT COUNT(*) as count FROM staff")
-        staff = cursor.fetchone()['count']
-        cursor.execute("SELECT COUNT(*) as count FROM contacts")
-        contacts = cursor.fetchone()['count']
-        cursor.execute("SELECT COUNT(*) as count FROM admissions")
-        admissions = cursor.fetchone()['count']
+        counts = stats.read_counts(get_cursor(), get_db())
+        courses = counts['courses']
+        events = counts['events']
+        staff = counts['staff']
+        contacts = counts['contacts']
+        admissions = counts['admissions']
         return jsonify({
             'success': True,
             'courses': courses,
@@ -711,9 +560,31 @@ def api_activity_breakdown():
     except Exception as e:
         logging.error(f"API activity_breakdown error: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
+
+@app.route('/api/pool_stats', methods=['GET'])
+def api_pool_stats():
+    if session.get('user_type') != 'admin':
+        return jsonify({'success': False, 'error': 'Please log in as an admin.'}), 401
+    return jsonify({'success': True, 'pool': pool_stats()})
+
+@app.route('/api/contact_intake_stats', methods=['GET'])
+def api_contact_intake_stats():
+    if session.get('user_type') != 'admin':
+        return jsonify({'success': False, 'error': 'Please log in as an admin.'}), 401
+    return jsonify({'success': True, 'intake': contact_intake.summary()})
+
+@app.route('/api/throttle_stats', methods=['GET'])
+def api_throttle_stats():
+    if session.get('user_type') != 'admin':
+        return jsonify({'success': False, 'error': 'Please log in as an admin.'}), 401
+    return jsonify({'success': True, 'throttle': throttle.stats()})
+
+@app.route('/api/cache_stats', methods=['GET'])
+def api_cache_stats():
+    if session.get('user_type') != 'admin':
+        return jsonify({'success': False, 'error': 'Please log in as an admin.'}), 401
+    return jsonify({'success': True, 'catalog': catalog_cache.stats(), 'pages': page_cache.stats(),
+                    'compression': compression.stats(), 'credentials': credentials.stats()})
 
 @app.route('/api/admission/<int:id>', methods=['GET'])
 def api_admission(id):
@@ -721,11 +592,11 @@ def api_admission(id):
         logging.warning(f"Unauthorized access attempt to /api/admission/{id}, user_type: {session.get('user_type')}")
         return jsonify({'success': False, 'error': 'Please log in as an admin.'}), 401
     try:
-        conn = get_connection()
+        conn = get_db()
         if not conn.is_connected():
             logging.error("Database connection failed")
             return jsonify({'success': False, 'error': 'Database connection failed'}), 500
-        cursor = conn.cursor(dictionary=True)
+        cursor = get_cursor(dictionary=True)
         logging.debug(f"Executing query for admission ID {id}")
         cursor.execute("""
             SELECT id, student_name, cnic, dob, gender, age, phone, address, student_occupation,
@@ -733,7 +604,7 @@ def api_admission(id):
                    guardian_name, guardian_phone, disability_certificate, disability_name, medical_history,
                    regular_medication, assistive_device, epilepsy, drug_addiction, assistant, communicable_disease,
                    education_level, documents, course, admission_type, duration_stay, pick_drop, affidavit,
-                   admission_date, photo, created_at
+                   admission_date, photo, upload_status, created_at
             FROM admissions
             WHERE id = %s
         """, (id,))
@@ -760,11 +631,76 @@ def api_admission(id):
     except Exception as e:
         logging.error(f"Unexpected error for admission ID {id}: {str(e)}", exc_info=True)
         return jsonify({'success': False, 'error': f'Server error: {str(e)}'}), 500
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals():
-            conn.close()
+
+@app.route('/api/admission/<int:id>/uploads', methods=['GET'])
+def api_admission_uploads(id):
+    if session.get('user_type') != 'admin':
+        return jsonify({'success': False, 'error': 'Please log in as an admin.'}), 401
+    try:
+        cursor = get_cursor(dictionary=True)
+        cursor.execute("SELECT upload_status FROM admissions WHERE id = %s", (id,))
+        admission = cursor.fetchone()
+        if not admission:
+            return jsonify({'success': False, 'error': 'Admission not found'}), 404
+        cursor.execute("SELECT kind, path, status, sha256, size_bytes FROM admission_files WHERE admission_id = %s",
+                       (id,))
+        files = cursor.fetchall()
+        return jsonify({'success': True, 'upload_status': admission['upload_status'], 'files': files})
+    except Exception as e:
+        logging.error(f"API admission uploads error for ID {id}: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/analytics/student/<int:student_id>', methods=['GET'])
+def api_student_analytics(student_id):
+    # Monthly attendance rate and marks for one student; admins or the student's guardian
+    user_type = session.get('user_type')
+    if user_type not in ('admin', 'guardian'):
+        return jsonify({'success': False, 'error': 'Please log in.'}), 401
+    try:
+        cursor = get_cursor()
+        cursor.execute("SELECT guardian_id FROM students WHERE id = %s", (student_id,))
+        student = cursor.fetchone()
+        if not student or (user_type == 'guardian' and student[0] != session.get('guardian_id')):
+            return jsonify({'success': False, 'error': 'Student not found'}), 404
+        months = analytics.parse_months(request.args.get('months'))
+        return jsonify({'success': True, **analytics.student_summary(cursor, student_id, months)})
+    except Exception as e:
+        logging.error(f"API student analytics error for ID {student_id}: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/analytics/overview', methods=['GET'])
+def api_analytics_overview():
+    if session.get('user_type') != 'admin':
+        return jsonify({'success': False, 'error': 'Please log in as an admin.'}), 401
+    try:
+        months = analytics.parse_months(request.args.get('months'))
+        return jsonify({'success': True, **analytics.institute_summary(get_cursor(), months)})
+    except Exception as e:
+        logging.error(f"API analytics overview error: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/ingest/<kind>', methods=['POST'])
+def api_ingest(kind):
+    # Bulk attendance/progress load: a JSON body, a text/csv body, or a CSV upload as 'file'
+    if session.get('user_type') != 'admin':
+        return jsonify({'success': False, 'error': 'Please log in as an admin.'}), 401
+    if kind not in ingestion.KINDS:
+        return jsonify({'success': False, 'error': f'Unknown batch kind: {kind}'}), 404
+    try:
+        if 'file' in request.files:
+            records = ingestion.read_batch(request.files['file'].read(), 'csv')
+        elif request.mimetype == 'text/csv':
+            records = ingestion.read_batch(request.get_data(), 'csv')
+        else:
+            records = ingestion.read_batch(request.get_data(), 'json')
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Invalid batch: {str(e)}'}), 400
+    try:
+        result = ingestion.ingest(get_db(), kind, records)
+        return jsonify({'success': result['inserted'] > 0 or not records, **result})
+    except Exception as e:
+        logging.error(f"API ingest {kind} error: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/add_course', methods=['POST'])
 def add_course():
@@ -782,31 +718,27 @@ def add_course():
         created_at = datetime.utcnow()
         course_id = str(uuid.uuid4())
         image_url = None
+        image_variants = None
+        conn = get_db()
+        cursor = get_cursor()
 
         if 'image' in request.files:
             file = request.files['image']
             if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-                filename = f"course_{timestamp}_{filename}"
-                file_path = os.path.join(app.config['UPLOAD_FOLDER_COURSES'], filename)
-                file.save(file_path)
-                image_url = f"Uploads/courses/{filename}"
-                logging.debug(f"Course image saved: {file_path}")
+                image_url = storage.save(cursor, file, 'courses')
+                image_variants = images.build_variants(app.static_folder, image_url)
+                logging.debug(f"Course image saved: {image_url}")
 
-        conn = get_connection()
-        cursor = conn.cursor()
         cursor.execute(
-            'INSERT INTO courses (course_id, name, description, duration, level, created_at, image_url) VALUES (%s, %s, %s, %s, %s, %s, %s)',
-            (course_id, name, description, duration, level, created_at, image_url))
+            'INSERT INTO courses (course_id, name, description, duration, level, created_at, image_url, image_variants) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)',
+            (course_id, name, description, duration, level, created_at, image_url, image_variants))
+        stats.adjust(cursor, 'courses', 1)
         conn.commit()
+        catalog_cache.bump('courses')
         flash('Course added successfully!', 'success')
     except Exception as e:
         flash(f'Error adding course: {str(e)}', 'error')
         logging.error(f"Add course error: {str(e)}")
-    finally:
-        cursor.close()
-        conn.close()
     return redirect(url_for('admin_courses'))
 
 @app.route('/edit_course/<course_id>', methods=['GET', 'POST'])
@@ -814,8 +746,8 @@ def edit_course(course_id):
     if session.get('user_type') != 'admin':
         flash('Please log in as an admin.', 'error')
         return redirect(url_for('guardian_login_page'))
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+    conn = get_db()
+    cursor = get_cursor(dictionary=True)
     if request.method == 'POST':
         try:
             name = request.form.get('name')
@@ -825,32 +757,31 @@ def edit_course(course_id):
             if not all([name, description, duration, level]):
                 flash('All fields are required.', 'error')
                 return redirect(url_for('admin_courses'))
-            image_url = request.form.get('existing_image_url')
+            cursor.execute('SELECT image_url, image_variants FROM courses WHERE course_id = %s', (course_id,))
+            old = cursor.fetchone()
+            released = []
+            image_url = old['image_url'] if old else None
 
             if 'image' in request.files:
                 file = request.files['image']
                 if file and allowed_file(file.filename):
-                    if image_url and os.path.exists(os.path.join('static', image_url)):
-                        os.remove(os.path.join('static', image_url))
-                    filename = secure_filename(file.filename)
-                    timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-                    filename = f"course_{timestamp}_{filename}"
-                    file_path = os.path.join(app.config['UPLOAD_FOLDER_COURSES'], filename)
-                    file.save(file_path)
-                    image_url = f"Uploads/courses/{filename}"
-                    logging.debug(f"Course image updated: {file_path}")
+                    image_url = storage.save(get_cursor(), file, 'courses')
+                    logging.debug(f"Course image updated: {image_url}")
+                    if old and storage.release(get_cursor(), old['image_url']):
+                        released.append((old['image_url'], old['image_variants']))
+                    cursor.execute('UPDATE courses SET image_variants = %s WHERE course_id = %s',
+                                   (images.build_variants(app.static_folder, image_url), course_id))
 
             cursor.execute(
                 'UPDATE courses SET name = %s, description = %s, duration = %s, level = %s, image_url = %s WHERE course_id = %s',
                 (name, description, duration, level, image_url, course_id))
             conn.commit()
+            remove_released_images(released)
+            catalog_cache.bump('courses')
             flash('Course updated successfully!', 'success')
         except Exception as e:
             flash(f'Error updating course: {str(e)}', 'error')
             logging.error(f"Edit course error: {str(e)}")
-        finally:
-            cursor.close()
-            conn.close()
         return redirect(url_for('admin_courses'))
     try:
         cursor.execute('SELECT * FROM courses WHERE course_id = %s', (course_id,))
@@ -863,9 +794,6 @@ def edit_course(course_id):
         flash(f'Error fetching course: {str(e)}', 'error')
         logging.error(f"Fetch course error: {str(e)}")
         return redirect(url_for('admin_courses'))
-    finally:
-        cursor.close()
-        conn.close()
 
 @app.route('/delete_course', methods=['POST'])
 def delete_course():
@@ -874,21 +802,23 @@ def delete_course():
         return redirect(url_for('guardian_login_page'))
     try:
         course_id = request.form.get('course_id')
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute('SELECT image_url FROM courses WHERE course_id = %s', (course_id,))
+        conn = get_db()
+        cursor = get_cursor(dictionary=True)
+        cursor.execute('SELECT image_url, image_variants FROM courses WHERE course_id = %s', (course_id,))
         course = cursor.fetchone()
-        if course and course['image_url'] and os.path.exists(os.path.join('static', course['image_url'])):
-            os.remove(os.path.join('static', course['image_url']))
+        released = []
+        if course and storage.release(get_cursor(), course['image_url']):
+            released.append((course['image_url'], course['image_variants']))
         cursor.execute('DELETE FROM courses WHERE course_id = %s', (course_id,))
+        stats.adjust(cursor, 'courses', -cursor.rowcount)
         conn.commit()
+        remove_released_images(released)
+        timeseries.invalidate('courses')
+        catalog_cache.bump('courses')
         flash('Course deleted successfully!', 'success')
     except Exception as e:
         flash(f'Error deleting course: {str(e)}', 'error')
         logging.error(f"Delete course error: {str(e)}")
-    finally:
-        cursor.close()
-        conn.close()
     return redirect(url_for('admin_courses'))
 
 
@@ -898,8 +828,7 @@ def admin_courses():
     if session.get('user_type') != 'admin':
         flash('Please log in as an admin.', 'error')
         return redirect(url_for('guardian_login_page'))
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+    cursor = get_cursor(dictionary=True)
     try:
         cursor.execute("SELECT * FROM courses")
         courses = cursor.fetchall()
@@ -907,9 +836,6 @@ def admin_courses():
         flash(f'Error fetching courses: {str(e)}', 'error')
         logging.error(f"Fetch courses error: {str(e)}")
         courses = []
-    finally:
-        cursor.close()
-        conn.close()
     return render_template('admin_courses.html', courses=courses)
 
 @app.route('/admin_staff')
@@ -917,8 +843,7 @@ def admin_staff():
     if session.get('user_type') != 'admin':
         flash('Please log in as an admin.', 'danger')
         return redirect(url_for('guardian_login_page'))
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+    cursor = get_cursor(dictionary=True)
     try:
         cursor.execute("SELECT id, designation, bps_grade, quantity FROM staff")
         staff = cursor.fetchall()
@@ -930,9 +855,6 @@ def admin_staff():
         flash(f'Error fetching staff: {str(e)}', 'danger')
         logging.error(f"Fetch staff error: {str(e)}")
         staff = []
-    finally:
-        cursor.close()
-        conn.close()
     return render_template('admin_staff.html', staff=staff)
 
 @app.route('/staff/add', methods=['POST'])
@@ -955,18 +877,17 @@ def add_staff():
         except ValueError:
             flash('Quantity must be a valid number.', 'danger')
             return redirect(url_for('admin_staff'))
-        conn = get_connection()
-        cursor = conn.cursor()
+        conn = get_db()
+        cursor = get_cursor()
         cursor.execute('INSERT INTO staff (designation, bps_grade, quantity) VALUES (%s, %s, %s)',
                        (designation, bps_grade, quantity))
+        stats.adjust(cursor, 'staff', 1)
         conn.commit()
+        catalog_cache.bump('staff')
         flash('Staff added successfully!', 'success')
     except Exception as e:
         flash(f'Error adding staff: {str(e)}', 'danger')
         logging.error(f"Add staff error: {str(e)}")
-    finally:
-        cursor.close()
-        conn.close()
     return redirect(url_for('admin_staff'))
 
 @app.route('/staff/edit/<int:id>', methods=['GET', 'POST'])
@@ -974,8 +895,8 @@ def edit_staff(id):
     if session.get('user_type') != 'admin':
         flash('Please log in as an admin.', 'danger')
         return redirect(url_for('guardian_login_page'))
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+    conn = get_db()
+    cursor = get_cursor(dictionary=True)
     if request.method == 'POST':
         try:
             designation = request.form.get('designation')
@@ -996,13 +917,11 @@ def edit_staff(id):
                 'UPDATE staff SET designation = %s, bps_grade = %s, quantity = %s WHERE id = %s',
                 (designation, bps_grade, quantity, id))
             conn.commit()
+            catalog_cache.bump('staff')
             flash('Staff updated successfully!', 'success')
         except Exception as e:
             flash(f'Error updating staff: {str(e)}', 'danger')
             logging.error(f"Edit staff error: {str(e)}")
-        finally:
-            cursor.close()
-            conn.close()
         return redirect(url_for('admin_staff'))
     try:
         cursor.execute('SELECT id, designation, bps_grade, quantity FROM staff WHERE id = %s', (id,))
@@ -1015,9 +934,6 @@ def edit_staff(id):
         flash(f'Error fetching staff: {str(e)}', 'danger')
         logging.error(f"Fetch staff error: {str(e)}")
         return redirect(url_for('admin_staff'))
-    finally:
-        cursor.close()
-        conn.close()
 
 @app.route('/staff/delete/<int:id>', methods=['POST'])
 def delete_staff(id):
@@ -1025,20 +941,19 @@ def delete_staff(id):
         flash('Please log in as an admin.', 'danger')
         return redirect(url_for('guardian_login_page'))
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
+        conn = get_db()
+        cursor = get_cursor()
         cursor.execute('DELETE FROM staff WHERE id = %s', (id,))
         if cursor.rowcount == 0:
             flash('Staff member not found.', 'danger')
         else:
+            stats.adjust(cursor, 'staff', -1)
             conn.commit()
+            catalog_cache.bump('staff')
             flash('Staff deleted successfully!', 'success')
     except Exception as e:
         flash(f'Error deleting staff: {str(e)}', 'danger')
         logging.error(f"Delete staff error: {str(e)}")
-    finally:
-        cursor.close()
-        conn.close()
     return redirect(url_for('admin_staff'))
 
 @app.route('/admin_contacts')
@@ -1046,74 +961,125 @@ def admin_contacts():
     if session.get('user_type') != 'admin':
         flash('Please log in as an admin.', 'error')
         return redirect(url_for('guardian_login_page'))
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+    filters = contact_queries.parse_filters(request.args)
     try:
-        cursor.execute("SELECT id, name, email, subject, message, created_at, is_read FROM contacts ORDER BY created_at DESC")
-        contacts = cursor.fetchall()
+        contacts, next_cursor = contact_queries.fetch_page(get_cursor(dictionary=True), filters)
     except Exception as e:
         flash(f'Error fetching contacts: {str(e)}', 'error')
         logging.error(f"Fetch contacts error: {str(e)}")
-        contacts = []
-    finally:
-        cursor.close()
-        conn.close()
-    return render_template('admin_contacts.html', contacts=contacts)
+        contacts, next_cursor = [], None
+    return render_streamed('admin_contacts.html', contacts=contacts, filters=filters, next_cursor=next_cursor)
+
+@app.route('/api/contacts/search')
+def api_contacts_search():
+    if session.get('user_type') != 'admin':
+        return jsonify({'success': False, 'error': 'Please log in as an admin.'}), 401
+    filters = contact_queries.parse_filters(request.args)
+    try:
+        contacts, next_cursor = contact_queries.fetch_page(get_cursor(dictionary=True), filters)
+        return jsonify({'success': True, 'contacts': [contact_queries.serialize(row) for row in contacts],
+                        'next_cursor': next_cursor})
+    except Exception as e:
+        logging.error(f"Search contacts error: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def update_contacts_read(ids, is_read):
+    conn = get_db()
+    cursor = get_cursor()
+    try:
+        changed = contact_queries.set_read(cursor, ids, is_read)
+        stats.adjust(cursor, 'unread_contacts', -changed if is_read else changed)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    unread_counter.adjust(-changed if is_read else changed)
+    return changed
+
+def delete_contacts(ids):
+    conn = get_db()
+    cursor = get_cursor()
+    try:
+        deleted, unread = contact_queries.delete(cursor, ids)
+        stats.adjust(cursor, 'contacts', -deleted)
+        stats.adjust(cursor, 'unread_contacts', -unread)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    unread_counter.adjust(-unread)
+    timeseries.invalidate('contacts')
+    return deleted
 
 @app.route('/mark_contact_read/<int:id>', methods=['POST'])
 def mark_contact_read(id):
     if session.get('user_type') != 'admin':
         return jsonify({'success': False, 'error': 'Please log in as an admin.'}), 401
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("UPDATE contacts SET is_read = TRUE WHERE id = %s", (id,))
-        conn.commit()
+        update_contacts_read([id], True)
         flash('Message marked as read.', 'success')
         return jsonify({'success': True, 'message': 'Message marked as read.'})
     except Exception as e:
         flash(f'Error marking contact as read: {str(e)}', 'error')
         logging.error(f"Mark contact read error: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 @app.route('/mark_contact_unread/<int:id>', methods=['POST'])
 def mark_contact_unread(id):
     if session.get('user_type') != 'admin':
         return jsonify({'success': False, 'error': 'Please log in as an admin.'}), 401
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("UPDATE contacts SET is_read = FALSE WHERE id = %s", (id,))
-        conn.commit()
+        update_contacts_read([id], False)
         flash('Message marked as unread.', 'success')
         return jsonify({'success': True, 'message': 'Message marked as unread.'})
     except Exception as e:
         flash(f'Error marking contact as unread: {str(e)}', 'error')
         logging.error(f"Mark contact unread error: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
+
+@app.route('/api/contacts/mark', methods=['POST'])
+def api_contacts_mark():
+    # Body: {"ids": [...], "read": true|false}; one UPDATE for the whole selection
+    if session.get('user_type') != 'admin':
+        return jsonify({'success': False, 'error': 'Please log in as an admin.'}), 401
+    data = request.get_json(silent=True) or {}
+    try:
+        ids = contact_queries.parse_ids(data.get('ids'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    is_read = bool(data.get('read', True))
+    try:
+        changed = update_contacts_read(ids, is_read)
+        logging.info(f"Marked {changed} of {len(ids)} contacts as {'read' if is_read else 'unread'}")
+        return jsonify({'success': True, 'updated': changed,
+                        'message': f"Marked {len(ids)} message(s) as {'read' if is_read else 'unread'}."})
+    except Exception as e:
+        logging.error(f"Bulk mark contacts error: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/get_unread_count', methods=['GET'])
 def get_unread_count():
+    # Served from the in-process counter. With ?known=N this is the long-poll fallback
+    # for browsers without EventSource: it answers once the count differs from N.
     if session.get('user_type') != 'admin':
         return jsonify({'success': False, 'error': 'Please log in as an admin.'}), 401
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM contacts WHERE is_read = FALSE")
-        unread_count = cursor.fetchone()[0]
+        known = request.args.get('known', type=int)
+        if known is None:
+            unread_count = unread_counter.current()
+        else:
+            unread_count = unread_counter.wait_for_change(known, unread_counter.LONG_POLL_SECONDS)
         return jsonify({'success': True, 'unread_count': unread_count})
     except Exception as e:
         logging.error(f"Get unread count error: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
+
+@app.route('/api/contacts/unread/stream')
+def unread_count_stream():
+    if session.get('user_type') != 'admin':
+        return jsonify({'success': False, 'error': 'Please log in as an admin.'}), 401
+    return Response(unread_counter.stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/delete_contact', methods=['POST'])
 def delete_contact():
@@ -1121,27 +1087,38 @@ def delete_contact():
         return jsonify({'success': False, 'error': 'Please log in as an admin.'}), 401
     try:
         id = request.json.get('id')
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM contacts WHERE id = %s', (id,))
-        conn.commit()
+        delete_contacts([int(id)])
         flash('Message deleted successfully!', 'success')
         return jsonify({'success': True, 'message': 'Message deleted successfully!'})
     except Exception as e:
         flash(f'Error deleting contact: {str(e)}', 'error')
         logging.error(f"Delete contact error: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
+
+@app.route('/api/contacts/delete', methods=['POST'])
+def api_contacts_delete():
+    # Body: {"ids": [...]}; one DELETE for the whole selection
+    if session.get('user_type') != 'admin':
+        return jsonify({'success': False, 'error': 'Please log in as an admin.'}), 401
+    data = request.get_json(silent=True) or {}
+    try:
+        ids = contact_queries.parse_ids(data.get('ids'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    try:
+        deleted = delete_contacts(ids)
+        logging.info(f"Deleted {deleted} of {len(ids)} contacts")
+        return jsonify({'success': True, 'deleted': deleted, 'message': f'Deleted {deleted} message(s).'})
+    except Exception as e:
+        logging.error(f"Bulk delete contacts error: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/admin_popups')
 def admin_popups():
     if session.get('user_type') != 'admin':
         flash('Please log in as an admin.', 'error')
         return redirect(url_for('guardian_login_page'))
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+    cursor = get_cursor(dictionary=True)
     try:
         cursor.execute("SELECT * FROM popups")
         popups = cursor.fetchall()
@@ -1149,9 +1126,6 @@ def admin_popups():
         flash(f'Error fetching popups: {str(e)}', 'error')
         logging.error(f"Fetch popups error: {str(e)}")
         popups = []
-    finally:
-        cursor.close()
-        conn.close()
     return render_template('admin_popups.html', popups=popups)
 
 @app.route('/add_popup', methods=['POST'])
@@ -1162,39 +1136,34 @@ def add_popup():
     try:
         title = request.form.get('title')
         message = request.form.get('message')
-        show_until = request.form.get('show_until')
         popup_type = request.form.get('type')
         if not message:
             flash('Message is required.', 'error')
             return redirect(url_for('admin_popups'))
+        try:
+            show_until = popup_delivery.parse_show_until(request.form.get('show_until'))
+        except ValueError:
+            flash('Show until must be a date (YYYY-MM-DD).', 'error')
+            return redirect(url_for('admin_popups'))
         image_url = None
+        image_variants = None
+        conn = get_db()
+        cursor = get_cursor()
         if 'image' in request.files:
             file = request.files['image']
             if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-                filename = f"popup_{timestamp}_{filename}"
-                upload_folder = os.path.join(app.root_path, 'static', 'Uploads', 'popups')
-                if not os.path.exists(upload_folder):
-                    os.makedirs(upload_folder, exist_ok=True)
-                    os.chmod(upload_folder, 0o755)
-                file_path = os.path.join(upload_folder, filename)
-                file.save(file_path)
-                image_url = f"Uploads/popups/{filename}"
-                logging.debug(f"Popup image saved: {file_path}")
+                image_url = storage.save(cursor, file, 'popups')
+                image_variants = images.build_variants(app.static_folder, image_url)
+                logging.debug(f"Popup image saved: {image_url}")
 
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute('INSERT INTO popups (title, message, image_url, show_until, type) VALUES (%s, %s, %s, %s, %s)',
-                       (title, message, image_url, show_until, popup_type))
+        cursor.execute('INSERT INTO popups (title, message, image_url, image_variants, show_until, type) VALUES (%s, %s, %s, %s, %s, %s)',
+                       (title, message, image_url, image_variants, show_until, popup_type))
         conn.commit()
+        popup_delivery.invalidate()
         flash('Popup added successfully!', 'success')
     except Exception as e:
         flash(f'Error adding popup: {str(e)}', 'error')
         logging.error(f"Add popup error: {str(e)}")
-    finally:
-        cursor.close()
-        conn.close()
     return redirect(url_for('admin_popups'))
 
 @app.route('/edit_popup/<int:id>', methods=['GET', 'POST'])
@@ -1202,45 +1171,44 @@ def edit_popup(id):
     if session.get('user_type') != 'admin':
         flash('Please log in as an admin.', 'error')
         return redirect(url_for('guardian_login_page'))
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+    conn = get_db()
+    cursor = get_cursor(dictionary=True)
     if request.method == 'POST':
         try:
             title = request.form.get('title')
             message = request.form.get('message')
-            show_until = request.form.get('show_until')
             popup_type = request.form.get('type')
             if not message:
                 flash('Message is required.', 'error')
                 return redirect(url_for('admin_popups'))
-            image_url = request.form.get('existing_image_url')
+            try:
+                show_until = popup_delivery.parse_show_until(request.form.get('show_until'))
+            except ValueError:
+                flash('Show until must be a date (YYYY-MM-DD).', 'error')
+                return redirect(url_for('edit_popup', id=id))
+            cursor.execute('SELECT image_url, image_variants FROM popups WHERE id = %s', (id,))
+            old = cursor.fetchone()
+            released = []
+            image_url = old['image_url'] if old else None
             if 'image' in request.files:
                 file = request.files['image']
                 if file and allowed_file(file.filename):
-                    if image_url and os.path.exists(os.path.join(app.root_path, 'static', image_url)):
-                        os.remove(os.path.join(app.root_path, 'static', image_url))
-                    filename = secure_filename(file.filename)
-                    timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-                    filename = f"popup_{timestamp}_{filename}"
-                    upload_folder = os.path.join(app.root_path, 'static', 'Uploads', 'popups')
-                    if not os.path.exists(upload_folder):
-                        os.makedirs(upload_folder, exist_ok=True)
-                        os.chmod(upload_folder, 0o755)
-                    file_path = os.path.join(upload_folder, filename)
-                    file.save(file_path)
-                    image_url = f"Uploads/popups/{filename}"
-                    logging.debug(f"Popup image updated: {file_path}")
+                    image_url = storage.save(get_cursor(), file, 'popups')
+                    logging.debug(f"Popup image updated: {image_url}")
+                    if old and storage.release(get_cursor(), old['image_url']):
+                        released.append((old['image_url'], old['image_variants']))
+                    cursor.execute('UPDATE popups SET image_variants = %s WHERE id = %s',
+                                   (images.build_variants(app.static_folder, image_url), id))
 
             cursor.execute('UPDATE popups SET title = %s, message = %s, image_url = %s, show_until = %s, type = %s WHERE id = %s',
                            (title, message, image_url, show_until, popup_type, id))
             conn.commit()
+            remove_released_images(released)
+            popup_delivery.invalidate()
             flash('Popup updated successfully!', 'success')
         except Exception as e:
             flash(f'Error updating popup: {str(e)}', 'error')
             logging.error(f"Edit popup error: {str(e)}")
-        finally:
-            cursor.close()
-            conn.close()
         return redirect(url_for('admin_popups'))
     try:
         cursor.execute('SELECT * FROM popups WHERE id = %s', (id,))
@@ -1253,9 +1221,6 @@ def edit_popup(id):
         flash(f'Error fetching popup: {str(e)}', 'error')
         logging.error(f"Fetch popup error: {str(e)}")
         return redirect(url_for('admin_popups'))
-    finally:
-        cursor.close()
-        conn.close()
 
 @app.route('/delete_popup', methods=['POST'])
 def delete_popup():
@@ -1264,45 +1229,37 @@ def delete_popup():
         return redirect(url_for('guardian_login_page'))
     try:
         id = request.form.get('id')
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute('SELECT image_url FROM popups WHERE id = %s', (id,))
+        conn = get_db()
+        cursor = get_cursor(dictionary=True)
+        cursor.execute('SELECT image_url, image_variants FROM popups WHERE id = %s', (id,))
         popup = cursor.fetchone()
-        if popup and popup['image_url'] and os.path.exists(os.path.join(app.root_path, 'static', popup['image_url'])):
-            os.remove(os.path.join(app.root_path, 'static', popup['image_url']))
+        released = []
+        if popup and storage.release(get_cursor(), popup['image_url']):
+            released.append((popup['image_url'], popup['image_variants']))
         cursor.execute('DELETE FROM popups WHERE id = %s', (id,))
         conn.commit()
+        remove_released_images(released)
+        popup_delivery.invalidate()
         flash('Popup deleted successfully!', 'success')
     except Exception as e:
         flash(f'Error deleting popup: {str(e)}', 'error')
         logging.error(f"Delete popup error: {str(e)}")
-    finally:
-        cursor.close()
-        conn.close()
     return redirect(url_for('admin_popups'))
 
 @app.route('/get_popups')
 def get_popups():
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
     try:
-        cursor.execute("SELECT id, title, message, image_url, type FROM popups WHERE show_until IS NULL OR show_until >= CURDATE()")
-        popups = cursor.fetchall()
-        return jsonify({'popups': popups})
+        return popup_delivery.respond(popup_delivery.active())
     except Exception as e:
         logging.error(f"Get popups error: {str(e)}")
         return jsonify({'error': str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
         
 @app.route('/admin_events')
 def admin_events():
     if session.get('user_type') != 'admin':
         flash('Please log in as an admin.', 'error')
         return redirect(url_for('guardian_login_page'))
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+    cursor = get_cursor(dictionary=True)
     try:
         cursor.execute("SELECT * FROM events")
         events = cursor.fetchall()
@@ -1310,9 +1267,6 @@ def admin_events():
         flash(f'Error fetching events: {str(e)}', 'error')
         logging.error(f"Fetch events error: {str(e)}")
         events = []
-    finally:
-        cursor.close()
-        conn.close()
     return render_template('admin_events.html', events=events)
 
 @app.route('/add_event', methods=['POST'])
@@ -1328,29 +1282,25 @@ def add_event():
             flash('All fields are required.', 'error')
             return redirect(url_for('admin_events'))
         image_url = None
+        image_variants = None
+        conn = get_db()
+        cursor = get_cursor()
         if 'image' in request.files:
             file = request.files['image']
             if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-                filename = f"{timestamp}_{filename}"
-                file_path = os.path.join(app.config['UPLOAD_FOLDER_EVENTS'], filename)
-                file.save(file_path)
-                image_url = f"Uploads/events/{filename}"
-                logging.debug(f"Event image saved: {file_path}")
-        conn = get_connection()
-        cursor = conn.cursor()
+                image_url = storage.save(cursor, file, 'events')
+                image_variants = images.build_variants(app.static_folder, image_url)
+                logging.debug(f"Event image saved: {image_url}")
         cursor.execute(
-            'INSERT INTO events (title, date, description, image_url, created_at) VALUES (%s, %s, %s, %s, %s)',
-            (title, date, description, image_url, datetime.utcnow()))
+            'INSERT INTO events (title, date, description, image_url, image_variants, created_at) VALUES (%s, %s, %s, %s, %s, %s)',
+            (title, date, description, image_url, image_variants, datetime.utcnow()))
+        stats.adjust(cursor, 'events', 1)
         conn.commit()
+        catalog_cache.bump('events')
         flash('Event added successfully!', 'success')
     except Exception as e:
         flash(f'Error adding event: {str(e)}', 'error')
         logging.error(f"Add event error: {str(e)}")
-    finally:
-        cursor.close()
-        conn.close()
     return redirect(url_for('admin_events'))
 
 @app.route('/edit_event/<int:id>', methods=['GET', 'POST'])
@@ -1358,8 +1308,8 @@ def edit_event(id):
     if session.get('user_type') != 'admin':
         flash('Please log in as an admin.', 'error')
         return redirect(url_for('guardian_login_page'))
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+    conn = get_db()
+    cursor = get_cursor(dictionary=True)
     if request.method == 'POST':
         try:
             title = request.form.get('title')
@@ -1368,29 +1318,28 @@ def edit_event(id):
             if not all([title, date, description]):
                 flash('All fields are required.', 'error')
                 return redirect(url_for('admin_events'))
-            image_url = request.form.get('existing_image_url')
+            cursor.execute('SELECT image_url, image_variants FROM events WHERE id = %s', (id,))
+            old = cursor.fetchone()
+            released = []
+            image_url = old['image_url'] if old else None
             if 'image' in request.files:
                 file = request.files['image']
                 if file and allowed_file(file.filename):
-                    if image_url and os.path.exists(os.path.join('static', image_url)):
-                        os.remove(os.path.join('static', image_url))
-                    filename = secure_filename(file.filename)
-                    timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-                    filename = f"{timestamp}_{filename}"
-                    file_path = os.path.join(app.config['UPLOAD_FOLDER_EVENTS'], filename)
-                    file.save(file_path)
-                    image_url = f"Uploads/events/{filename}"
-                    logging.debug(f"Event image updated: {file_path}")
+                    image_url = storage.save(get_cursor(), file, 'events')
+                    logging.debug(f"Event image updated: {image_url}")
+                    if old and storage.release(get_cursor(), old['image_url']):
+                        released.append((old['image_url'], old['image_variants']))
+                    cursor.execute('UPDATE events SET image_variants = %s WHERE id = %s',
+                                   (images.build_variants(app.static_folder, image_url), id))
             cursor.execute('UPDATE events SET title = %s, date = %s, description = %s, image_url = %s WHERE id = %s',
                            (title, date, description, image_url, id))
             conn.commit()
+            remove_released_images(released)
+            catalog_cache.bump('events')
             flash('Event updated successfully!', 'success')
         except Exception as e:
             flash(f'Error updating event: {str(e)}', 'error')
             logging.error(f"Edit event error: {str(e)}")
-        finally:
-            cursor.close()
-            conn.close()
         return redirect(url_for('admin_events'))
     try:
         cursor.execute('SELECT * FROM events WHERE id = %s', (id,))
@@ -1403,9 +1352,6 @@ def edit_event(id):
         flash(f'Error fetching event: {str(e)}', 'error')
         logging.error(f"Fetch event error: {str(e)}")
         return redirect(url_for('admin_events'))
-    finally:
-        cursor.close()
-        conn.close()
 
 @app.route('/delete_event', methods=['POST'])
 def delete_event():
@@ -1414,21 +1360,23 @@ def delete_event():
         return redirect(url_for('guardian_login_page'))
     try:
         id = request.form.get('id')
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute('SELECT image_url FROM events WHERE id = %s', (id,))
+        conn = get_db()
+        cursor = get_cursor(dictionary=True)
+        cursor.execute('SELECT image_url, image_variants FROM events WHERE id = %s', (id,))
         event = cursor.fetchone()
-        if event and event['image_url'] and os.path.exists(os.path.join('static', event['image_url'])):
-            os.remove(os.path.join('static', event['image_url']))
+        released = []
+        if event and storage.release(get_cursor(), event['image_url']):
+            released.append((event['image_url'], event['image_variants']))
         cursor.execute('DELETE FROM events WHERE id = %s', (id,))
+        stats.adjust(cursor, 'events', -cursor.rowcount)
         conn.commit()
+        remove_released_images(released)
+        timeseries.invalidate('events')
+        catalog_cache.bump('events')
         flash('Event deleted successfully!', 'success')
     except Exception as e:
         flash(f'Error deleting event: {str(e)}', 'error')
         logging.error(f"Delete event error: {str(e)}")
-    finally:
-        cursor.close()
-        conn.close()
     return redirect(url_for('admin_events'))
 
 @app.route('/admin_settings')
@@ -1436,8 +1384,7 @@ def admin_settings():
     if session.get('user_type') != 'admin':
         flash('Please log in as an admin.', 'error')
         return redirect(url_for('guardian_login_page'))
-    conn = get_connection()
-    cursor = conn.cursor()
+    cursor = get_cursor()
     try:
         cursor.execute("SELECT * FROM site_info")
         site_info = cursor.fetchall()
@@ -1445,13 +1392,12 @@ def admin_settings():
         flash(f'Error fetching site info: {str(e)}', 'error')
         logging.error(f"Fetch site info error: {str(e)}")
         site_info = []
-    finally:
-        cursor.close()
-        conn.close()
     return render_template('admin_settings.html', site_info=site_info)
 
 @app.route('/submit_admission', methods=['POST'])
 def submit_admission():
+    staged_files = []
+    committed = False
     try:
         # Retrieve form data with fallback to empty string or None
         student_name = request.form.get('studentName', '').strip()
@@ -1625,80 +1571,69 @@ def submit_admission():
             logging.error(f"Validation error: Duration stay is not a number - Received: {duration_stay}")
             return redirect(url_for('apply_now'))
 
-        # Handle photo upload
-        photo_path = None
-        if 'photo' in request.files:
-            file = request.files['photo']
-            if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = f"photo_{timestamp}_{filename}"
-                file_path = os.path.join(app.config['UPLOAD_FOLDER_ADMISSIONS'], filename)
-                file.save(file_path)
-                photo_path = f"Uploads/admissions/{filename}"
-                logging.info(f"Photo saved: {file_path}")
-            elif file.filename:
-                flash(f'Invalid photo file type for {file.filename}. Allowed types: {", ".join(ALLOWED_EXTENSIONS)}', 'error')
-                logging.error(f"Invalid photo file type: {file.filename}")
-                return redirect(url_for('apply_now'))
-
-        # Handle disability certificate upload
-        disability_certificate_path = None
-        if disability_certificate and disability_certificate.filename:
-            if allowed_file(disability_certificate.filename):
-                filename = secure_filename(disability_certificate.filename)
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = f"disability_{timestamp}_{filename}"
-                file_path = os.path.join(app.config['UPLOAD_FOLDER_ADMISSIONS'], filename)
-                disability_certificate.save(file_path)
-                disability_certificate_path = f"Uploads/admissions/{filename}"
-                logging.info(f"Disability certificate saved: {file_path}")
-            else:
-                flash(f'Invalid disability certificate file type for {disability_certificate.filename}. Allowed types: {", ".join(ALLOWED_EXTENSIONS)}', 'error')
-                logging.error(f"Invalid disability certificate file type: {disability_certificate.filename}")
-                return redirect(url_for('apply_now'))
-
-        # Handle documents upload
-        document_paths = []
+        # Validate every upload before anything is written
+        photo = request.files.get('photo')
+        if photo and photo.filename and not allowed_file(photo.filename):
+            flash(f'Invalid photo file type for {photo.filename}. Allowed types: {", ".join(ALLOWED_EXTENSIONS)}', 'error')
+            logging.error(f"Invalid photo file type: {photo.filename}")
+            return redirect(url_for('apply_now'))
+        if disability_certificate and disability_certificate.filename and not allowed_file(disability_certificate.filename):
+            flash(f'Invalid disability certificate file type for {disability_certificate.filename}. Allowed types: {", ".join(ALLOWED_EXTENSIONS)}', 'error')
+            logging.error(f"Invalid disability certificate file type: {disability_certificate.filename}")
+            return redirect(url_for('apply_now'))
         if not any(file.filename for file in documents):
             flash('At least one degree certificate is required.', 'error')
             logging.error("Validation error: No documents uploaded")
             return redirect(url_for('apply_now'))
         for file in documents:
-            if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = f"document_{timestamp}_{filename}"
-                file_path = os.path.join(app.config['UPLOAD_FOLDER_ADMISSIONS'], filename)
-                file.save(file_path)
-                document_paths.append(f"Uploads/admissions/{filename}")
-                logging.info(f"Document saved: {file_path}")
-            else:
+            if not (file and allowed_file(file.filename)):
                 flash(f'Invalid file type for {file.filename}. Allowed types: {", ".join(ALLOWED_EXTENSIONS)}', 'error')
                 logging.error(f"Invalid file type: {file.filename}")
                 return redirect(url_for('apply_now'))
+
+        # Stream the files to the staging area; the upload pipeline moves them into
+        # static storage in the background once the row is committed
+        staged_files = []
+        photo_path = None
+        if photo and photo.filename:
+            staged_files.append(upload_pipeline.stage_file(photo, 'photo'))
+            photo_path = staged_files[-1]['path']
+        disability_certificate_path = None
+        if disability_certificate and disability_certificate.filename:
+            staged_files.append(upload_pipeline.stage_file(disability_certificate, 'disability_certificate'))
+            disability_certificate_path = staged_files[-1]['path']
+        document_paths = []
+        for file in documents:
+            staged_files.append(upload_pipeline.stage_file(file, 'document'))
+            document_paths.append(staged_files[-1]['path'])
         documents_str = ','.join(document_paths) if document_paths else None
 
         # Insert into database with all parameters
-        conn = get_connection()
-        cursor = conn.cursor()
+        conn = get_db()
+        cursor = get_cursor()
         cursor.execute(
             '''INSERT INTO admissions (student_name, cnic, dob, gender, age, phone, address, student_occupation,
                parent_name, parent_cnic, parent_phone, parent_occupation, num_siblings, sibling_disability,
                guardian_name, guardian_phone, disability_certificate, disability_name, medical_history,
                regular_medication, assistive_device, epilepsy, drug_addiction, assistant, communicable_disease,
                education_level, documents, course, admission_type, duration_stay, pick_drop, affidavit,
-               admission_date, photo)
+               admission_date, photo, upload_status)
                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                       %s, %s, %s, %s, %s, %s, %s, %s, %s)''',
+                       %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)''',
             (student_name, cnic, dob, gender, age, phone, address, student_occupation,
              parent_name, parent_cnic, parent_phone, parent_occupation, num_siblings, sibling_disability,
              guardian_name, guardian_phone, disability_certificate_path, disability_name, medical_history,
              regular_medication, assistive_device, epilepsy, drug_addiction, assistant, communicable_disease,
              education_level, documents_str, course, admission_type, duration_stay, pick_drop, affidavit,
-             admission_date, photo_path)
+             admission_date, photo_path, 'pending' if staged_files else 'complete')
         )
+        admission_id = cursor.lastrowid
+        upload_pipeline.record_staged(cursor, admission_id, staged_files)
+        stats.adjust(cursor, 'admissions', 1)
         conn.commit()
+        committed = True
+        if staged_files:
+            upload_pipeline.submit(admission_id)
         flash('Admission application submitted successfully!', 'success')
         logging.info(f"Admission submitted successfully: {form_data}, Documents: {documents_str}, Photo: {photo_path}, Disability Certificate: {disability_certificate_path}")
         return jsonify({'redirect': url_for('apply_now')})
@@ -1707,11 +1642,8 @@ def submit_admission():
         logging.error(f"Submit admission error: {str(e)} with form data: {form_data}")
         if 'conn' in locals():
             conn.rollback()
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals():
-            conn.close()
+        if not committed:
+            upload_pipeline.discard_staged(staged_files)
     return jsonify({'error': 'Submission failed. Please try again.'})
 
 @app.route('/admin_admissions')
@@ -1719,53 +1651,62 @@ def admin_admissions():
     if session.get('user_type') != 'admin':
         logging.warning(f"Unauthorized access attempt to /admin_admissions, user_type: {session.get('user_type')}")
         flash('Please log in as an admin.', 'danger')
-        return redirect(url_for('guardian'))
+        return redirect(url_for('guardian_login_page'))
+    filters = admission_queries.parse_filters(request.args)
     try:
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-        logging.debug("Executing query for all admissions")
-        cursor.execute("""
-            SELECT id, student_name, cnic, dob, gender, age, phone, address, student_occupation,
-                   parent_name, parent_cnic, parent_phone, parent_occupation, num_siblings, sibling_disability,
-                   guardian_name, guardian_phone, disability_certificate, disability_name, medical_history,
-                   regular_medication, assistive_device, epilepsy, drug_addiction, assistant, communicable_disease,
-                   education_level, documents, course, admission_type, duration_stay, pick_drop, affidavit,
-                   admission_date, photo, created_at
-            FROM admissions
-            ORDER BY created_at DESC
-        """)
-        admissions = cursor.fetchall()  # Fetch once
-        if not admissions:
-            admissions = []
-        for admission in admissions:
-            admission['dob'] = admission['dob'].strftime('%Y-%m-%d') if admission['dob'] else 'N/A'
-            admission['admission_date'] = admission['admission_date'].strftime('%Y-%m-%d') if admission['admission_date'] else 'N/A'
-            admission['created_at'] = admission['created_at'].strftime('%Y-%m-%d %H:%M:%S') if admission['created_at'] else 'N/A'
-            admission['documents'] = admission['documents'].split(',') if admission['documents'] else []
-            for key in admission:
-                if admission[key] is None:
-                    admission[key] = 'N/A'
-        logging.info(f"Fetched {len(admissions)} admissions: {admissions[:1]}...")  # Log first record for debug
-        return render_template('admin_admissions.html', admissions=admissions)
+        course_names = [course['name'] for course in catalog_cache.get('courses', 'courses', load_courses)]
+        admissions, next_cursor = admission_queries.fetch_page(get_cursor(dictionary=True), filters)
+        logging.info(f"Fetched {len(admissions)} admissions with filters: {filters}")
     except mysql.connector.Error as db_error:
         logging.error(f"Database error in admin_admissions: {str(db_error)}")
         flash(f"Database error: {str(db_error)}", 'error')
-        return render_template('admin_admissions.html', admissions=[])
+        admissions, next_cursor, course_names = [], None, []
     except Exception as e:
         logging.error(f"Unexpected error in admin_admissions: {str(e)}")
         flash(f"Server error: {str(e)}", 'error')
-        return render_template('admin_admissions.html', admissions=[])
-    finally:
-        cursor.close()
-        conn.close()
+        admissions, next_cursor, course_names = [], None, []
+    return render_streamed('admin_admissions.html', admissions=admissions, filters=filters,
+                           next_cursor=next_cursor, course_names=course_names,
+                           admission_types=admission_queries.ADMISSION_TYPES)
+
+@app.route('/admin_admissions/export')
+def export_admissions():
+    if session.get('user_type') != 'admin':
+        flash('Please log in as an admin.', 'danger')
+        return redirect(url_for('guardian_login_page'))
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'xlsx'):
+        flash('Unsupported export format.', 'error')
+        return redirect(url_for('admin_admissions'))
+    filters = admission_queries.parse_filters(request.args)
+
+    def generate():
+        # Uses its own pooled connection: the rows are read while the response streams
+        conn = get_connection()
+        rows = admission_queries.iter_export_rows(conn, filters)
+        try:
+            header = admission_queries.EXPORT_COLUMNS
+            if export_format == 'xlsx':
+                yield from exports.xlsx_stream(header, rows, sheet_name='Admissions')
+            else:
+                yield from exports.csv_stream(header, rows)
+        finally:
+            rows.close()
+            conn.close()
+
+    filename = f"admissions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+    mimetype = ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+                if export_format == 'xlsx' else 'text/csv')
+    logging.info(f"Exporting admissions as {export_format} with filters: {filters}")
+    return Response(stream_with_context(generate()), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
 
 @app.route('/view_admission/<int:id>')
 def view_admission(id):
     if session.get('user_type') != 'admin':
         flash('Please log in as an admin.', 'error')
         return redirect(url_for('guardian_login_page'))
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+    cursor = get_cursor(dictionary=True)
     try:
         cursor.execute("SELECT * FROM admissions WHERE id = %s", (id,))
         admission = cursor.fetchone()
@@ -1777,9 +1718,6 @@ def view_admission(id):
         flash(f'Error fetching admission details: {str(e)}', 'error')
         logging.error(f"View admission error: {str(e)}")
         admission = None
-    finally:
-        cursor.close()
-        conn.close()
     return render_template('view_admission.html', admission=admission)
 
 @app.route('/api/admission/delete', methods=['POST'])
@@ -1794,48 +1732,53 @@ def delete_admissions():
             logging.error("No admission IDs provided for deletion")
             return jsonify({'success': False, 'error': 'No admissions selected'}), 400
 
-        conn = get_connection()
+        conn = get_db()
         if not conn.is_connected():
             logging.error("Database connection failed")
             return jsonify({'success': False, 'error': 'Database connection failed'}), 500
-        cursor = conn.cursor(dictionary=True)
+        cursor = get_cursor(dictionary=True)
 
-        # Fetch file paths for deletion
+        # Fetch file paths for deletion; the row locks keep the upload pipeline from
+        # storing these admissions' files until the delete has committed
         placeholders = ','.join(['%s'] * len(ids))
         cursor.execute(f"""
             SELECT id, photo, disability_certificate, documents
             FROM admissions
             WHERE id IN ({placeholders})
+            FOR UPDATE
         """, ids)
         admissions = cursor.fetchall()
 
-        # Delete associated files
+        # Release the admissions' file references; files no other row uses are removed
+        # once the delete has committed
+        blob_cursor = get_cursor()
+        released = []
         for admission in admissions:
-            # Delete photo
-            if admission['photo'] and os.path.exists(os.path.join(app.config['UPLOAD_FOLDER_ADMISSIONS'], os.path.relpath(admission['photo'], 'Uploads/admissions'))):
-                os.remove(os.path.join(app.config['UPLOAD_FOLDER_ADMISSIONS'], os.path.relpath(admission['photo'], 'Uploads/admissions')))
-                logging.info(f"Deleted photo: {admission['photo']} for admission ID {admission['id']}")
-            # Delete disability certificate
-            if admission['disability_certificate'] and os.path.exists(os.path.join(app.config['UPLOAD_FOLDER_ADMISSIONS'], os.path.relpath(admission['disability_certificate'], 'Uploads/admissions'))):
-                os.remove(os.path.join(app.config['UPLOAD_FOLDER_ADMISSIONS'], os.path.relpath(admission['disability_certificate'], 'Uploads/admissions')))
-                logging.info(f"Deleted disability certificate: {admission['disability_certificate']} for admission ID {admission['id']}")
-            # Delete documents
-            if admission['documents']:
-                for doc in admission['documents'].split(','):
-                    if doc and os.path.exists(os.path.join(app.config['UPLOAD_FOLDER_ADMISSIONS'], os.path.relpath(doc, 'Uploads/admissions'))):
-                        os.remove(os.path.join(app.config['UPLOAD_FOLDER_ADMISSIONS'], os.path.relpath(doc, 'Uploads/admissions')))
-                        logging.info(f"Deleted document: {doc} for admission ID {admission['id']}")
+            for path in [admission['photo'], admission['disability_certificate']] + (admission['documents'] or '').split(','):
+                if storage.release(blob_cursor, path):
+                    released.append(path)
+        # Files the pipeline hasn't picked up yet, removed once the delete has committed
+        cursor.execute(f"SELECT staged_path AS staged FROM admission_files WHERE admission_id IN ({placeholders}) AND staged_path IS NOT NULL", ids)
+        staged = cursor.fetchall()
 
         # Delete admissions from database
         cursor.execute(f"DELETE FROM admissions WHERE id IN ({placeholders})", ids)
-        if cursor.rowcount == 0:
+        deleted = cursor.rowcount
+        cursor.execute(f"DELETE FROM admission_files WHERE admission_id IN ({placeholders})", ids)
+        if deleted == 0:
             logging.warning(f"No admissions found for IDs: {ids}")
             conn.rollback()
             return jsonify({'success': False, 'error': 'No admissions found for the provided IDs'}), 404
 
+        stats.adjust(cursor, 'admissions', -deleted)
         conn.commit()
-        logging.info(f"Successfully deleted {cursor.rowcount} admissions with IDs: {ids}")
-        return jsonify({'success': True, 'message': f'Deleted {cursor.rowcount} admissions successfully'})
+        upload_pipeline.discard_staged(staged)
+        for path in released:
+            if storage.remove(conn, path):
+                upload_pipeline.remove_thumbnail(path)
+        timeseries.invalidate('admissions')
+        logging.info(f"Successfully deleted {deleted} admissions with IDs: {ids}")
+        return jsonify({'success': True, 'message': f'Deleted {deleted} admissions successfully'})
     except mysql.connector.Error as db_error:
         logging.error(f"Database error in delete_admissions: {str(db_error)}", exc_info=True)
         if 'conn' in locals():
@@ -1846,11 +1789,137 @@ def delete_admissions():
         if 'conn' in locals():
             conn.rollback()
         return jsonify({'success': False, 'error': f'Server error: {str(e)}'}), 500
+
+# CLI commands run in their own process: without CATALOG_CACHE_DIR their cache bumps
+# never reach the running workers, which keep serving the old data until the TTL expires
+def warn_unshared_cache():
+    if not catalog_cache.shared_dir:
+        click.echo(f"Warning: CATALOG_CACHE_DIR is not set, so running workers keep serving cached pages "
+                   f"for up to {int(catalog_cache.ttl)} seconds. Set it for the app and this command, "
+                   f"or restart the workers, to show the change now.", err=True)
+
+@app.cli.command('migrate')
+def migrate_command():
+    init_db()
+
+@app.cli.command('explain-report')
+def explain_report_command():
+    # Shows which index (if any) MySQL picks for the hot queries in this file
+    conn = get_connection()
+    try:
+        for row in migrations.explain_report(conn):
+            print(f"{row['route']:<22} {str(row['table']):<18} {str(row['type']):<8} "
+                  f"key={row['key'] or '-':<34} rows={row['rows']} {row['extra'] or ''}")
     finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals():
-            conn.close()
+        conn.close()
+
+@app.cli.command('process-uploads')
+def process_uploads_command():
+    # Finishes uploads left in staging by a worker that stopped mid-job
+    admission_ids = upload_pipeline.resume_pending()
+    print(f"Processed staged uploads for {len(admission_ids)} admissions")
+
+@app.cli.command('build-image-variants')
+def build_image_variants_command():
+    # Backfills responsive image copies for rows uploaded before they were generated on save
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        for table, key in (('courses', 'course_id'), ('events', 'id'), ('popups', 'id')):
+            cursor.execute(f"SELECT {key}, image_url FROM {table} WHERE image_url IS NOT NULL AND image_variants IS NULL")
+            built = 0
+            for row_id, image_url in cursor.fetchall():
+                image_variants = images.build_variants(app.static_folder, image_url)
+                if image_variants:
+                    cursor.execute(f"UPDATE {table} SET image_variants = %s WHERE {key} = %s", (image_variants, row_id))
+                    built += 1
+            conn.commit()
+            print(f"{table}: built variants for {built} images")
+    finally:
+        cursor.close()
+        conn.close()
+    catalog_cache.bump('courses')
+    catalog_cache.bump('events')
+    popup_delivery.invalidate()
+    warn_unshared_cache()
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    # Run on deploy: bundles are rebuilt, then precompressed .gz/.br copies are served for fingerprinted assets
+    bundles = assets.build_bundles(app.static_folder)
+    written = assets.precompress(app.static_folder)
+    print(f"Rebuilt {bundles} bundles, wrote {written} compressed assets for "
+          f"{len(assets.build_manifest(app.static_folder))} static files")
+
+@app.cli.command('template-size-report')
+@click.option('--baseline', type=click.Path(exists=True, file_okay=False),
+              help='Templates directory of an older checkout to compare against')
+def template_size_report_command(baseline):
+    # Per-page HTML bytes; shared bundles are downloaded once and then served from cache
+    after = assets.template_sizes(app)
+    before = assets.template_sizes(app, baseline) if baseline else {}
+    for name in sorted(after):
+        if name in before:
+            print(f"{name:<28} {before[name]:>8} -> {after[name]:>8} ({after[name] - before[name]:+d})")
+        else:
+            print(f"{name:<28} {after[name]:>8}")
+    if before:
+        common = [name for name in after if name in before]
+        print(f"{'total':<28} {sum(before[n] for n in common):>8} -> {sum(after[n] for n in common):>8}")
+    for name in assets.bundle_sources(app.static_folder):
+        path = os.path.join(app.static_folder, name)
+        if os.path.exists(path):
+            print(f"{name:<36} {os.path.getsize(path):>8} (cached)")
+
+@app.cli.command('precompile-templates')
+def precompile_templates_command():
+    # Fills the bytecode cache on deploy; the first worker to boot then skips compilation
+    timings = template_cache.precompile(app)
+    for name, ms in sorted(timings.items(), key=lambda item: -item[1]):
+        print(f"{name:<28} {ms:>8.1f} ms")
+    print(f"{'total':<28} {sum(timings.values()):>8.1f} ms")
+
+@app.cli.command('ingest')
+@click.argument('kind', type=click.Choice(sorted(ingestion.KINDS)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+def ingest_command(kind, path):
+    # Loads a CSV or JSON batch file, e.g. `flask ingest attendance today.csv`
+    with open(path, 'rb') as f:
+        records = ingestion.read_batch(f.read(), 'json' if path.endswith('.json') else 'csv')
+    conn = get_connection()
+    try:
+        result = ingestion.ingest(conn, kind, records)
+    finally:
+        conn.close()
+    for error in result['errors']:
+        print(f"row {error['row']}: {error['error']}")
+    print(f"Inserted {result['inserted']} of {result['received']} rows, {result['error_count']} errors")
+    if result['inserted']:
+        warn_unshared_cache()
+
+@app.cli.command('rebuild-analytics')
+def rebuild_analytics_command():
+    # Recomputes every monthly rollup; only needed after editing attendance/progress rows by hand
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        analytics.rebuild(cursor)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+@app.cli.command('reconcile-stats')
+def reconcile_stats_command():
+    # Run periodically (e.g. from cron) to correct any drift in entity_counts
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        stats.reconcile(cursor)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
 
 if __name__ == '__main__':
     init_db()
@@ -0,0 +1,235 @@
+from flask import current_app, request, send_from_directory
+from jinja2 import ChainableUndefined, FileSystemLoader
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; without it only .gz variants are built
+    brotli = None
+
+HASH_LENGTH = 12
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# User uploads have their own lifecycle and are never fingerprinted
+SKIP_DIRS = {'Uploads', 'uploads'}
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt', '.html', '.map'}
+# Preferred first; a variant is only sent if its file was built and the client accepts it
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+# Shared bundles referenced by the base layouts; css/pages/<name>.css and js/pages/<name>.js
+# are added as dist/pages/<name>.min.css|js by bundle_sources
+BUNDLES = {
+    'dist/site.min.css': ['css/style.css', 'css/footer.css'],
+    'dist/site.min.js': ['js/script.js', 'js/site.js'],
+    'dist/auth.min.css': ['css/auth.css'],
+    'dist/auth.min.js': ['js/auth.js'],
+    'dist/admin.min.js': ['js/admin.js'],
+}
+
+# Layouts and partials are only rendered through the pages that use them
+LAYOUTS = {'base.html', 'admin_base.html', 'auth_base.html', 'navbar.html', 'footer.html'}
+
+_FINGERPRINTED = re.compile(r'^(.*)\.([0-9a-f]{%d})(\.[^./]+)$' % HASH_LENGTH)
+# Content-addressed uploads (see storage.blob_path) and their derivatives never change either
+_CONTENT_ADDRESSED = re.compile(r'^Uploads/[^/]+/[0-9a-f]{2}/(variants/)?[0-9a-f]{64}')
+
+_manifest = {}  # 'css/style.css' -> 'css/style.3f2a9c1b04de.css'
+_originals = {}  # the reverse
+
+
+def init_app(app):
+    try:
+        build_bundles(app.static_folder)
+        precompress(app.static_folder)
+    except OSError as e:
+        # Read-only deploys ship prebuilt bundles (flask build-assets); assets without
+        # a precompressed copy are then compressed per response by compression.py
+        logging.warning(f"Could not rebuild static bundles: {e}")
+    build_manifest(app.static_folder)
+    app.url_defaults(fingerprint_static)
+    app.view_functions['static'] = serve_static
+
+
+def iter_assets(static_root):
+    for root, dirs, files in os.walk(static_root):
+        if root == static_root:
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for name in files:
+            if name.endswith(('.gz', '.br')):
+                continue
+            path = os.path.join(root, name)
+            yield os.path.relpath(path, static_root).replace(os.sep, '/'), path
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def build_manifest(static_root):
+    # Hashes every asset once per process; restart after changing static files
+    manifest = {}
+    for filename, path in iter_assets(static_root):
+        root, ext = os.path.splitext(filename)
+        manifest[filename] = f"{root}.{file_hash(path)}{ext}"
+    _manifest.clear()
+    _manifest.update(manifest)
+    _originals.clear()
+    _originals.update({hashed: filename for filename, hashed in manifest.items()})
+    logging.info(f"Fingerprinted {len(manifest)} static assets")
+    return manifest
+
+
+def minify_css(text):
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{};,])\s*', r'\1', text)
+    return text.replace(';}', '}').strip()
+
+
+def minify_js(text):
+    # Line-preserving so automatic semicolon insertion is unaffected: drops indentation,
+    # blank lines and whole-line // comments only
+    lines = (line.strip() for line in text.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//'))
+
+
+def bundle_sources(static_root):
+    bundles = {name: list(sources) for name, sources in BUNDLES.items()}
+    for kind in ('css', 'js'):
+        pages = os.path.join(static_root, kind, 'pages')
+        if os.path.isdir(pages):
+            for name in sorted(os.listdir(pages)):
+                stem, ext = os.path.splitext(name)
+                if ext == f".{kind}":
+                    bundles[f"dist/pages/{stem}.min.{kind}"] = [f"{kind}/pages/{name}"]
+    return bundles
+
+
+def build_bundles(static_root):
+    # Concatenates and minifies each bundle into static/dist; unchanged output is not
+    # rewritten so fingerprints and precompressed variants stay valid
+    written = 0
+    for name, sources in bundle_sources(static_root).items():
+        parts = []
+        for source in sources:
+            with open(os.path.join(static_root, source), encoding='utf-8') as f:
+                parts.append(f.read())
+        if name.endswith('.css'):
+            data = '\n'.join(minify_css(part) for part in parts)
+        else:
+            data = '\n;\n'.join(minify_js(part) for part in parts)
+        target = os.path.join(static_root, name)
+        if os.path.exists(target):
+            with open(target, encoding='utf-8') as f:
+                if f.read() == data:
+                    continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = f"{target}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp, target)
+        written += 1
+    return written
+
+
+def fingerprint_static(endpoint, values):
+    # url_defaults hook: url_for('static', filename='css/style.css') -> /static/css/style.<hash>.css
+    if endpoint == 'static' and values.get('filename') in _manifest:
+        values['filename'] = _manifest[values['filename']]
+
+
+def precompress(static_root):
+    # Writes .gz (and .br when available) next to each text asset, skipping up-to-date ones
+    written = 0
+    for filename, path in iter_assets(static_root):
+        if os.path.splitext(filename)[1] not in COMPRESSIBLE:
+            continue
+        with open(path, 'rb') as f:
+            data = f.read()
+        variants = {'.gz': lambda: gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants['.br'] = lambda: brotli.compress(data, quality=11)
+        for suffix, compress in variants.items():
+            target = path + suffix
+            if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+                continue
+            tmp = f"{target}.{os.getpid()}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(compress())
+            os.replace(tmp, target)
+            written += 1
+    return written
+
+
+def serve_static(filename):
+    # Replaces Flask's static view: fingerprinted names get a year of immutable caching
+    # and a precompressed body when one exists; everything else is served as before
+    original = _originals.get(filename)
+    if original is None:
+        match = _FINGERPRINTED.match(filename)
+        stale = f"{match.group(1)}{match.group(3)}" if match else None
+        if stale in _manifest:
+            # Page cached before a deploy asked for an old hash: serve the current file, uncached
+            response = current_app.send_static_file(stale)
+            response.cache_control.no_cache = True
+            return response
+        response = current_app.send_static_file(filename)
+        if _CONTENT_ADDRESSED.match(filename):
+            _immutable(response)
+        return response
+
+    static_root = current_app.static_folder
+    response = None
+    if os.path.splitext(original)[1] in COMPRESSIBLE:
+        for encoding, suffix in ENCODINGS:
+            if encoding in request.accept_encodings and os.path.exists(os.path.join(static_root, original + suffix)):
+                response = send_from_directory(static_root, original + suffix,
+                                               mimetype=mimetypes.guess_type(original)[0])
+                response.headers['Content-Encoding'] = encoding
+                break
+        if response is None:
+            response = send_from_directory(static_root, original)
+            # No precompressed copy: buffer the file so compress_response compresses it
+            # once and serves the cached body afterwards
+            response.direct_passthrough = False
+            response.make_sequence()
+        response.vary.add('Accept-Encoding')
+    else:
+        response = send_from_directory(static_root, original)
+    return _immutable(response)
+
+
+def _immutable(response):
+    response.cache_control.no_cache = None  # send_file's default when SEND_FILE_MAX_AGE_DEFAULT is unset
+    response.cache_control.public = True
+    response.cache_control.max_age = IMMUTABLE_MAX_AGE
+    response.cache_control.immutable = True
+    return response
+
+
+def template_sizes(app, template_dir=None):
+    # Bytes of HTML each page template renders to with an empty context (no rows, no
+    # session); template_dir renders another checkout's templates for comparison
+    env = app.jinja_env
+    if template_dir:
+        env = env.overlay(loader=FileSystemLoader(template_dir))
+    env = env.overlay(undefined=ChainableUndefined)
+    sizes = {}
+    with app.test_request_context('/'):
+        context = {}
+        app.update_template_context(context)
+        for name in env.list_templates(extensions=['html']):
+            if name in LAYOUTS:
+                continue
+            try:
+                sizes[name] = len(env.get_template(name).render(context).encode('utf-8'))
+            except Exception as e:
+                logging.warning(f"Could not render {name}: {e}")
+    return sizes
@@ -0,0 +1,183 @@
+from flask import request, session, make_response, Response
+from flask.globals import request_ctx
+from collections import OrderedDict
+from datetime import datetime, timezone
+import functools
+import hashlib
+import logging
+import os
+import threading
+import time
+
+# Seconds a cached dataset is served before it is reloaded even without a version bump
+CACHE_TTL = float(os.environ.get('CATALOG_CACHE_TTL', 300))
+# Optional directory shared by all gunicorn workers; when set, version stamps live
+# there so a bump in one worker invalidates the copies held by every other worker
+CACHE_DIR = os.environ.get('CATALOG_CACHE_DIR')
+# Seconds a rendered anonymous page is reused before it is rendered again
+PAGE_CACHE_TTL = float(os.environ.get('PAGE_CACHE_TTL', 600))
+# Rendered pages kept per worker; the least recently used are dropped first
+PAGE_CACHE_SIZE = int(os.environ.get('PAGE_CACHE_SIZE', 64))
+
+
+class ContentCache:
+    # In-process cache of datasets, each tied to a namespace ('courses', 'events', ...).
+    # Bumping a namespace's version makes every dataset built from it stale.
+    def __init__(self, ttl=CACHE_TTL, shared_dir=CACHE_DIR):
+        self.ttl = ttl
+        self.shared_dir = shared_dir
+        self._entries = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'bumps': 0}
+        if shared_dir:
+            os.makedirs(shared_dir, exist_ok=True)
+
+    def _version_path(self, namespace):
+        return os.path.join(self.shared_dir, f"{namespace}.version")
+
+    def version(self, namespace):
+        if self.shared_dir:
+            try:
+                with open(self._version_path(namespace)) as f:
+                    return f.read().strip() or '0'
+            except FileNotFoundError:
+                return '0'
+        with self._lock:
+            return str(self._versions.get(namespace, 0))
+
+    def bump(self, namespace):
+        if self.shared_dir:
+            stamp = f"{time.time_ns()}-{os.getpid()}"
+            tmp_path = f"{self._version_path(namespace)}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(stamp)
+            os.replace(tmp_path, self._version_path(namespace))
+        else:
+            with self._lock:
+                self._versions[namespace] = self._versions.get(namespace, 0) + 1
+        with self._lock:
+            self._stats['bumps'] += 1
+        logging.debug(f"Cache namespace '{namespace}' bumped to version {self.version(namespace)}")
+
+    def get(self, key, namespace, loader):
+        # namespace may be a tuple when the dataset is built from several sources
+        if isinstance(namespace, tuple):
+            version = tuple(self.version(ns) for ns in namespace)
+        else:
+            version = self.version(namespace)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry['version'] == version and entry['expires'] > now:
+                self._stats['hits'] += 1
+                return entry['value']
+            self._stats['misses'] += 1
+        value = loader()
+        with self._lock:
+            self._entries[key] = {'value': value, 'version': version, 'expires': now + self.ttl}
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        stats['shared'] = bool(self.shared_dir)
+        return stats
+
+
+class PageCache:
+    # Rendered HTML for anonymous visitors, keyed by path and the data versions the
+    # page was built from, so a hit can answer If-None-Match without rendering
+    def __init__(self, content_cache, ttl=PAGE_CACHE_TTL, max_pages=PAGE_CACHE_SIZE):
+        self.content_cache = content_cache
+        self.ttl = ttl
+        self.max_pages = max_pages
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'bypassed': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def lookup(self, key, versions):
+        with self._lock:
+            page = self._pages.get(key)
+            if page:
+                self._pages.move_to_end(key)
+        if page and page['versions'] == versions and page['expires'] > time.monotonic():
+            return page
+        return None
+
+    def store(self, key, versions, response):
+        body = response.get_data()
+        page = {
+            'versions': versions,
+            'body': body,
+            'mimetype': response.mimetype,
+            'etag': hashlib.sha256(body).hexdigest()[:32],
+            'last_modified': datetime.now(timezone.utc).replace(microsecond=0),
+            'expires': time.monotonic() + self.ttl,
+        }
+        with self._lock:
+            self._pages[key] = page
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+        return page
+
+    def respond(self, page):
+        response = Response(page['body'], mimetype=page['mimetype'])
+        response.set_etag(page['etag'])
+        response.last_modified = page['last_modified']
+        response.headers['Cache-Control'] = 'no-cache'
+        response.make_conditional(request)
+        if response.status_code == 304:
+            self._count('not_modified')
+        return response
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pages'] = len(self._pages)
+        return stats
+
+    def cached(self, *namespaces):
+        # Decorator for public GET views; logged-in users and pending flash
+        # messages change the markup, so those requests skip the cache
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method != 'GET' or session.get('user_type') or session.get('_flashes'):
+                    self._count('bypassed')
+                    return view(*args, **kwargs)
+                # The cached views ignore the query string, so '?utm_source=...' or a
+                # random one must not create a new entry
+                key = request.path
+                versions = tuple(self.content_cache.version(ns) for ns in namespaces)
+                page = self.lookup(key, versions)
+                if page:
+                    self._count('hits')
+                    return self.respond(page)
+                self._count('misses')
+                response = make_response(view(*args, **kwargs))
+                # The view may have flashed an error (e.g. a failed query) that the
+                # template already rendered; don't keep that page
+                if response.status_code != 200 or request_ctx.flashes or session.get('_flashes'):
+                    return response
+                return self.respond(self.store(key, versions, response))
+            return wrapper
+        return decorator
+
+
+catalog_cache = ContentCache()
+page_cache = PageCache(catalog_cache)
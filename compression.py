@@ -0,0 +1,156 @@
+from flask import request
+from collections import OrderedDict
+import os
+import threading
+import zlib
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; without it responses are gzip-only
+    brotli = None
+
+# Bodies smaller than this are sent as-is; the headers would outweigh the saving
+MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+# Streamed output is collected into pieces of at least this many bytes before each flush
+STREAM_CHUNK = int(os.environ.get('COMPRESS_STREAM_CHUNK', 4096))
+# Compressed copies of responses with an ETag (cached pages, popups) kept for reuse
+CACHE_SIZE = int(os.environ.get('COMPRESS_CACHE_SIZE', 256))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # per-request compression; static assets are prebuilt at quality 11
+COMPRESSIBLE_TYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+    'application/javascript', 'application/json', 'application/xml', 'image/svg+xml',
+}
+
+_cache = OrderedDict()  # (etag, encoding) -> compressed body
+_cache_lock = threading.Lock()
+_stats = {'compressed': 0, 'streamed': 0, 'cache_hits': 0, 'skipped_small': 0}
+
+
+def _count(name):
+    with _cache_lock:
+        _stats[name] += 1
+
+
+def init_app(app):
+    app.after_request(compress_response)
+
+
+def available_encodings():
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def choose_encoding():
+    # Honours the client's q-values; on a tie the first (smaller) encoding wins
+    return request.accept_encodings.best_match(available_encodings())
+
+
+class _Compressor:
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def flush(self, data):
+        # Everything passed so far becomes decodable by the client
+        if self.encoding == 'br':
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data):
+        if self.encoding == 'br':
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._zlib.compress(data) + self._zlib.flush()
+
+
+def compress(data, encoding):
+    return _Compressor(encoding).finish(data)
+
+
+def buffered(chunks, size=STREAM_CHUNK):
+    # Joins the many small strings a template stream yields into network-sized pieces
+    buffer, length = [], 0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            buffer.append(chunk)
+            length += len(chunk)
+            if length >= size:
+                yield b''.join(buffer)
+                buffer, length = [], 0
+        if buffer:
+            yield b''.join(buffer)
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close:
+            close()
+
+
+def stream_compress(chunks, encoding):
+    compressor = _Compressor(encoding)
+    pieces = buffered(chunks)
+    try:
+        for piece in pieces:
+            yield compressor.flush(piece)
+        yield compressor.finish(b'')
+    finally:
+        pieces.close()
+
+
+def _cached_compress(data, encoding, etag):
+    if not etag:
+        return compress(data, encoding)
+    key = (etag, encoding)
+    with _cache_lock:
+        body = _cache.get(key)
+        if body is not None:
+            _cache.move_to_end(key)
+            _stats['cache_hits'] += 1
+            return body
+    body = compress(data, encoding)
+    with _cache_lock:
+        _cache[key] = body
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return body
+
+
+def compress_response(response):
+    if (request.method == 'HEAD' or response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.direct_passthrough  # send_file; assets.serve_static clears it when no .br/.gz exists
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding()
+    if not encoding:
+        return response
+    if response.is_streamed:
+        response.response = stream_compress(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+        response.headers['Content-Encoding'] = encoding
+        _count('streamed')
+        return response
+    data = response.get_data()
+    if len(data) < MIN_SIZE:
+        _count('skipped_small')
+        return response
+    etag, weak = response.get_etag()
+    response.set_data(_cached_compress(data, encoding, etag))
+    response.headers['Content-Encoding'] = encoding
+    if etag and not weak:
+        # Same content, different bytes: a weak validator still matches If-None-Match
+        response.set_etag(etag, weak=True)
+    _count('compressed')
+    return response
+
+
+def stats():
+    with _cache_lock:
+        result = dict(_stats)
+        result['cached_bodies'] = len(_cache)
+    result['encodings'] = available_encodings()
+    return result
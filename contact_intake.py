@@ -0,0 +1,178 @@
+from collections import OrderedDict
+from db import get_connection
+import atexit
+import hashlib
+import logging
+import os
+import threading
+import time
+import stats
+import unread_counter
+
+# Per-IP token bucket: a burst of CONTACT_BURST posts, then one every 60/CONTACT_RATE seconds
+RATE_PER_MINUTE = float(os.environ.get('CONTACT_RATE', 5))
+BURST = float(os.environ.get('CONTACT_BURST', 3))
+# Identical messages (same email, subject and text) within this many seconds are dropped
+DUPLICATE_WINDOW = float(os.environ.get('CONTACT_DUPLICATE_WINDOW', 600))
+# Accepted messages are written in one multi-row INSERT after this long or this many rows
+FLUSH_INTERVAL = float(os.environ.get('CONTACT_FLUSH_INTERVAL', 0.3))
+FLUSH_ROWS = int(os.environ.get('CONTACT_FLUSH_ROWS', 50))
+# Beyond this many unwritten messages (database down) new ones are refused, not queued
+MAX_BUFFERED = int(os.environ.get('CONTACT_MAX_BUFFERED', 5000))
+# A failing batch is retried after 2, 4, 8... seconds (capped) before its rows are dropped
+FLUSH_ATTEMPTS = 6
+MAX_RETRY_DELAY = 60
+# Bounds for the per-IP and duplicate tables; the least recently seen entries go first
+MAX_TRACKED = int(os.environ.get('CONTACT_MAX_TRACKED', 10000))
+
+FIELD_LIMITS = {'name': 100, 'email': 100, 'subject': 200, 'message': 65535}
+
+ACCEPTED = 'accepted'
+DUPLICATE = 'duplicate'
+RATE_LIMITED = 'rate_limited'
+BUSY = 'busy'
+
+_buckets = OrderedDict()  # ip -> (tokens, last refill)
+_recent = OrderedDict()  # message digest -> accepted at
+_buffer = []  # [(row values, attempts)]
+_stats = {ACCEPTED: 0, DUPLICATE: 0, RATE_LIMITED: 0, BUSY: 0, 'written': 0, 'flushes': 0, 'failed_flushes': 0}
+_lock = threading.Lock()
+_wakeup = threading.Condition(_lock)
+_flusher_pid = None
+
+
+def validate(name, email, subject, message):
+    # Returns an error message, or None; over-long fields would fail the whole batch
+    if not all([name, email, message]):
+        return 'Please fill all required fields.'
+    for field, value in (('name', name), ('email', email), ('subject', subject), ('message', message)):
+        if value and len(value) > FIELD_LIMITS[field]:
+            return f'The {field} may be at most {FIELD_LIMITS[field]} characters.'
+    return None
+
+
+def _digest(email, subject, message):
+    normalized = '\x1f'.join(' '.join((value or '').lower().split()) for value in (email, subject, message))
+    return hashlib.sha256(normalized.encode()).digest()
+
+
+def _take_token(ip, now):
+    tokens, refilled = _buckets.pop(ip, (BURST, now))
+    tokens = min(BURST, tokens + (now - refilled) * RATE_PER_MINUTE / 60.0)
+    allowed = tokens >= 1
+    _buckets[ip] = (tokens - 1 if allowed else tokens, now)
+    while len(_buckets) > MAX_TRACKED:
+        _buckets.popitem(last=False)
+    return allowed
+
+
+def _seen_recently(digest, now):
+    accepted_at = _recent.get(digest)
+    return accepted_at is not None and now - accepted_at < DUPLICATE_WINDOW
+
+
+def submit(ip, name, email, subject, message):
+    # Returns ACCEPTED, DUPLICATE, RATE_LIMITED or BUSY; accepted messages are written
+    # by the background flusher shortly after
+    _ensure_flusher()
+    now = time.monotonic()
+    digest = _digest(email, subject, message)
+    with _lock:
+        if not _take_token(ip, now):
+            outcome = RATE_LIMITED
+        elif _seen_recently(digest, now):
+            outcome = DUPLICATE
+        elif len(_buffer) >= MAX_BUFFERED:
+            outcome = BUSY
+        else:
+            _recent.pop(digest, None)
+            _recent[digest] = now
+            while len(_recent) > MAX_TRACKED:
+                _recent.popitem(last=False)
+            _buffer.append(((name, email, subject, message, False), 0))
+            if len(_buffer) >= FLUSH_ROWS:
+                _wakeup.notify()
+            outcome = ACCEPTED
+        _stats[outcome] += 1
+    if outcome != ACCEPTED:
+        logging.info(f"Contact submission from {ip} not queued: {outcome}")
+    return outcome
+
+
+def _ensure_flusher():
+    # Threads don't survive fork, so each gunicorn worker starts its own flusher
+    global _flusher_pid
+    pid = os.getpid()
+    if _flusher_pid != pid:
+        with _lock:
+            if _flusher_pid != pid:
+                threading.Thread(target=_run, name='contact-flusher', daemon=True).start()
+                _flusher_pid = pid
+
+
+def _run():
+    failures = 0
+    while True:
+        with _lock:
+            _wakeup.wait_for(lambda: len(_buffer) >= FLUSH_ROWS, timeout=FLUSH_INTERVAL)
+        if flush():
+            failures = 0
+        else:
+            failures += 1
+            time.sleep(min(2 ** failures, MAX_RETRY_DELAY))
+
+
+def flush():
+    # Writes everything buffered in FLUSH_ROWS-sized multi-row INSERTs; a failed batch
+    # goes back to the front of the buffer for the next attempt. Returns False on failure.
+    while True:
+        with _lock:
+            batch, _buffer[:FLUSH_ROWS] = _buffer[:FLUSH_ROWS], []
+        if not batch:
+            return True
+        try:
+            _write([values for values, _ in batch])
+        except Exception as e:
+            logging.error(f"Contact flush of {len(batch)} messages failed: {str(e)}")
+            retry = [(values, attempts + 1) for values, attempts in batch if attempts + 1 < FLUSH_ATTEMPTS]
+            for values, attempts in batch:
+                if attempts + 1 >= FLUSH_ATTEMPTS:
+                    logging.error(f"Dropping contact message after {FLUSH_ATTEMPTS} attempts: {values!r}")
+            with _lock:
+                _buffer[:0] = retry
+                _stats['failed_flushes'] += 1
+            return False
+        with _lock:
+            _stats['written'] += len(batch)
+            _stats['flushes'] += 1
+
+
+def _write(rows):
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        # mysql-connector rewrites an INSERT executemany into one multi-row INSERT
+        cursor.executemany("""INSERT INTO contacts (name, email, subject, message, is_read)
+                              VALUES (%s, %s, %s, %s, %s)""", rows)
+        stats.adjust(cursor, 'contacts', len(rows))
+        stats.adjust(cursor, 'unread_contacts', len(rows))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+    unread_counter.adjust(len(rows))
+
+
+def summary():
+    with _lock:
+        result = dict(_stats)
+        result['buffered'] = len(_buffer)
+        result['tracked_ips'] = len(_buckets)
+    return result
+
+
+# Write out whatever is still buffered when a worker exits normally
+atexit.register(flush)
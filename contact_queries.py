@@ -0,0 +1,116 @@
+from datetime import datetime
+import re
+from admission_queries import encode_cursor, decode_cursor
+
+# Columns shown in the inbox
+LIST_COLUMNS = ['id', 'name', 'email', 'subject', 'message', 'created_at', 'is_read']
+
+STATUSES = ['read', 'unread']
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# Upper bound for one bulk mark/delete; the IN list is a single statement
+MAX_BULK_IDS = 1000
+MAX_QUERY_LENGTH = 200
+
+# Characters with a meaning in boolean-mode full-text search
+_SEARCH_OPERATORS = re.compile(r'[+\-<>()~*"@]+')
+
+
+def parse_filters(args):
+    # Reads inbox filters from a request's query string, ignoring invalid values
+    return {
+        'q': args.get('q', '').strip()[:MAX_QUERY_LENGTH],
+        'status': args.get('status', '') if args.get('status') in STATUSES else '',
+        'after': args.get('after', ''),
+        'limit': min(max(args.get('limit', DEFAULT_PAGE_SIZE, type=int) or DEFAULT_PAGE_SIZE, 1), MAX_PAGE_SIZE),
+    }
+
+
+def search_expression(query):
+    # Every word must match, as a prefix ("invoic" finds "invoice"); the user's own
+    # operators are dropped so a stray quote or dash can't make the query invalid
+    words = _SEARCH_OPERATORS.sub(' ', query).split()
+    return ' '.join(f'+{word}*' for word in words)
+
+
+def where_clause(filters):
+    conditions = []
+    params = []
+    if filters.get('status'):
+        conditions.append("is_read = %s")
+        params.append(filters['status'] == 'read')
+    expression = search_expression(filters.get('q', ''))
+    if expression:
+        # Served by the ft_contacts_subject_message FULLTEXT index
+        conditions.append("MATCH(subject, message) AGAINST (%s IN BOOLEAN MODE)")
+        params.append(expression)
+    return (" WHERE " + " AND ".join(conditions)) if conditions else "", params
+
+
+def page_query(filters):
+    # (SQL, params) for one page of the inbox, fetching one extra row to detect a next page
+    where, params = where_clause(filters)
+    after = decode_cursor(filters['after']) if filters.get('after') else None
+    if after:
+        keyset = "(created_at < %s OR (created_at = %s AND id < %s))"
+        where = f"{where} AND {keyset}" if where else f" WHERE {keyset}"
+        params += [after[0], after[0], after[1]]
+    return (f"SELECT {', '.join(LIST_COLUMNS)} FROM contacts{where} ORDER BY created_at DESC, id DESC LIMIT %s",
+            params + [filters['limit'] + 1])
+
+
+def fetch_page(cursor, filters):
+    # Newest first, resuming after the (created_at, id) of the last row shown.
+    # Returns (rows, next cursor).
+    cursor.execute(*page_query(filters))
+    rows = cursor.fetchall()
+    limit = filters['limit']
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['created_at'], rows[-1]['id'])
+    return rows, next_cursor
+
+
+def serialize(row):
+    row = dict(row)
+    if isinstance(row['created_at'], datetime):
+        row['created_at'] = row['created_at'].strftime('%Y-%m-%d %H:%M:%S')
+    row['is_read'] = bool(row['is_read'])
+    return row
+
+
+def parse_ids(values):
+    # Distinct positive integer IDs from a JSON list; raises ValueError for anything else
+    if not isinstance(values, list) or not values:
+        raise ValueError('No messages selected')
+    try:
+        ids = sorted({int(value) for value in values})
+    except (TypeError, ValueError):
+        raise ValueError('Message IDs must be whole numbers')
+    if ids[0] < 1:
+        raise ValueError('Message IDs must be positive')
+    if len(ids) > MAX_BULK_IDS:
+        raise ValueError(f'At most {MAX_BULK_IDS} messages can be changed at once')
+    return ids
+
+
+def set_read(cursor, ids, is_read):
+    # One UPDATE for the whole selection; rows already in that state are not counted.
+    # Returns the number of rows changed.
+    placeholders = ', '.join(['%s'] * len(ids))
+    cursor.execute(f"UPDATE contacts SET is_read = %s WHERE id IN ({placeholders}) AND is_read = %s",
+                   [is_read] + ids + [not is_read])
+    return cursor.rowcount
+
+
+def delete(cursor, ids):
+    # Locks the selection, counts how many were unread (for the counters), then deletes
+    # it in one statement. Returns (deleted, unread deleted).
+    placeholders = ', '.join(['%s'] * len(ids))
+    cursor.execute(f"SELECT COALESCE(SUM(is_read = FALSE), 0) FROM contacts "
+                   f"WHERE id IN ({placeholders}) FOR UPDATE", ids)
+    unread = cursor.fetchone()[0]
+    cursor.execute(f"DELETE FROM contacts WHERE id IN ({placeholders})", ids)
+    return cursor.rowcount, int(unread)
@@ -0,0 +1,179 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+import hashlib
+import hmac
+import logging
+import os
+import re
+import threading
+import time
+
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import VerificationError, InvalidHashError
+except ImportError:  # argon2-cffi is optional; without it the werkzeug methods are used
+    PasswordHasher = None
+
+# Hash for new and upgraded passwords. werkzeug method strings carry their cost
+# ('scrypt:32768:8:1', 'pbkdf2:sha256:600000'); 'argon2' needs argon2-cffi.
+METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+ARGON2_TIME_COST = int(os.environ.get('ARGON2_TIME_COST', 3))
+ARGON2_MEMORY_COST = int(os.environ.get('ARGON2_MEMORY_COST', 65536))  # KiB
+# Hashes run at most this many at a time per worker; scrypt and argon2 use tens of MB each
+HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+# Seconds a successful (email, password, stored hash) check is remembered, so repeated
+# logins skip the hash; a changed password has a different stored hash and misses
+VERIFY_CACHE_TTL = float(os.environ.get('LOGIN_CACHE_TTL', 300))
+VERIFY_CACHE_SIZE = 1024
+
+# Account kind -> table and the column holding the display name
+ACCOUNT_TABLES = {
+    'admin': ('admins', 'name'),
+    'guardian': ('guardians', 'full_name'),
+}
+
+# Admins first, so an address registered as both still signs in as the admin
+FIND_ACCOUNTS_SQL = """
+    SELECT 'admin' AS user_type, id, name, email, password FROM admins WHERE email = %s
+    UNION ALL
+    SELECT 'guardian' AS user_type, id, full_name AS name, email, password FROM guardians WHERE email = %s
+    ORDER BY user_type"""
+
+_WERKZEUG_HASH = re.compile(r'^(scrypt|pbkdf2):[^$]+\$[^$]+\$[0-9a-f]+$')
+
+_executor = None
+_executor_pid = None
+_lock = threading.Lock()
+_verified = OrderedDict()  # keyed digest -> verified at
+_cache_key = os.urandom(32)  # per process; cache keys are useless outside it
+_stats = {'hashes': 0, 'verifications': 0, 'cache_hits': 0, 'rehashed': 0}
+
+
+def _argon2():
+    if PasswordHasher is None:
+        raise RuntimeError('PASSWORD_HASH_METHOD is argon2 but argon2-cffi is not installed')
+    return PasswordHasher(time_cost=ARGON2_TIME_COST, memory_cost=ARGON2_MEMORY_COST)
+
+
+def _get_executor():
+    # Threads don't survive fork, so each gunicorn worker builds its own pool. The
+    # hashes release the GIL, so the worker's other threads keep serving meanwhile.
+    global _executor, _executor_pid
+    pid = os.getpid()
+    if _executor is None or _executor_pid != pid:
+        with _lock:
+            if _executor is None or _executor_pid != pid:
+                _executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix='password-hash')
+                _executor_pid = pid
+    return _executor
+
+
+def _run(function, *args):
+    return _get_executor().submit(function, *args).result(timeout=HASH_TIMEOUT)
+
+
+def _count(name):
+    with _lock:
+        _stats[name] += 1
+
+
+def is_hashed(stored):
+    return bool(stored) and (stored.startswith('$argon2') or bool(_WERKZEUG_HASH.match(stored)))
+
+
+def _hash(password):
+    if METHOD == 'argon2':
+        return _argon2().hash(password)
+    return generate_password_hash(password, method=METHOD)
+
+
+def _check(stored, password):
+    if stored.startswith('$argon2'):
+        try:
+            return _argon2().verify(stored, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    return check_password_hash(stored, password)
+
+
+def needs_rehash(stored):
+    if not is_hashed(stored):
+        return True
+    if METHOD == 'argon2':
+        return not stored.startswith('$argon2') or _argon2().check_needs_rehash(stored)
+    return not stored.startswith(METHOD + '$')
+
+
+def hash_password(password):
+    _count('hashes')
+    return _run(_hash, password)
+
+
+def _cache_digest(email, password, stored):
+    message = '\x1f'.join([email.lower(), password, stored]).encode()
+    return hmac.new(_cache_key, message, hashlib.sha256).digest()
+
+
+def verify(email, password, stored):
+    # Returns (matches, replacement hash or None). Legacy plaintext values and hashes
+    # made with an older METHOD get a replacement to store on a successful login.
+    if not stored:
+        return False, None
+    digest = _cache_digest(email, password, stored)
+    now = time.monotonic()
+    with _lock:
+        verified_at = _verified.get(digest)
+        if verified_at is not None and now - verified_at < VERIFY_CACHE_TTL:
+            _verified.move_to_end(digest)
+            _stats['cache_hits'] += 1
+            return True, None
+    _count('verifications')
+    if is_hashed(stored):
+        matches = _run(_check, stored, password)
+    else:
+        matches = hmac.compare_digest(stored.encode(), password.encode())
+    if not matches:
+        return False, None
+    with _lock:
+        _verified[digest] = now
+        while len(_verified) > VERIFY_CACHE_SIZE:
+            _verified.popitem(last=False)
+    return True, (hash_password(password) if needs_rehash(stored) else None)
+
+
+def find_accounts(cursor, email):
+    # Admin and guardian rows for an address in one round trip (dictionary cursor)
+    cursor.execute(FIND_ACCOUNTS_SQL, (email, email))
+    return cursor.fetchall()
+
+
+def authenticate(conn, cursor, email, password):
+    # Returns the matching account row, or None; upgrades its stored hash if needed
+    for account in find_accounts(cursor, email):
+        matches, new_hash = verify(email, password, account['password'])
+        if not matches:
+            continue
+        if new_hash:
+            table = ACCOUNT_TABLES[account['user_type']][0]
+            try:
+                # Only if nobody changed the password in the meantime
+                cursor.execute(f"UPDATE {table} SET password = %s WHERE id = %s AND password = %s",
+                               (new_hash, account['id'], account['password']))
+                conn.commit()
+                _count('rehashed')
+                logging.info(f"Upgraded password hash for {account['user_type']} {account['id']}")
+            except Exception as e:
+                conn.rollback()
+                logging.error(f"Password rehash for {account['user_type']} {account['id']} failed: {str(e)}")
+        return account
+    return None
+
+
+def stats():
+    with _lock:
+        result = dict(_stats)
+        result['cached'] = len(_verified)
+    result['method'] = METHOD
+    return result
@@ -1,22 +1,257 @@
+from flask import g
 import mysql.connector
+from mysql.connector.errors import PoolError
 import logging
+import os
+import threading
+import time
+from collections import deque
 
 logging.basicConfig(level=logging.DEBUG)
 
-def get_connection():
+DB_CONFIG = {
+    'host': os.environ.get('DB_HOST', 'localhost'),
+    'user': os.environ.get('DB_USER', 'root'),
+    'password': os.environ.get('DB_PASSWORD', ''),  # Update with your MySQL root password if set
+    'database': os.environ.get('DB_NAME', 'nasheeman_db'),
+}
+
+# Pool settings (per gunicorn worker)
+POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))              # connections kept open while idle
+POOL_MAX_OVERFLOW = int(os.environ.get('DB_POOL_MAX_OVERFLOW', 10))  # extra connections allowed under load
+POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))     # seconds to wait for a free connection
+POOL_RECYCLE = float(os.environ.get('DB_POOL_RECYCLE', 1800))   # seconds before a connection is replaced
+
+
+def _connect():
     try:
-        conn = mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="",  # Update with your MySQL root password if set
-            database="nasheeman_db"
-        )
+        conn = mysql.connector.connect(**DB_CONFIG)
         if not conn.is_connected():
             logging.error("Failed to establish database connection")
             raise mysql.connector.Error("Connection not established")
-        logging.info("Successfully connected to nasheeman_db")
+        logging.info(f"Successfully connected to {DB_CONFIG['database']}")
         return conn
     except mysql.connector.Error as e:
         logging.error(f"Database connection failed: {str(e)}")
         raise  # Re-raise to be caught by the calling function
 
+
+class PooledConnection:
+    # Thin wrapper around a mysql connection; close() hands it back to the pool
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._created = time.monotonic()
+        self._checked_out = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    @property
+    def age(self):
+        return time.monotonic() - self._created
+
+    def close(self):
+        if self._checked_out:
+            self._checked_out = False
+            self._pool._release(self)
+
+    def invalidate(self):
+        # Close the server connection instead of returning it, e.g. when a streamed
+        # result was abandoned halfway and the rest isn't worth reading
+        self._dispose()
+        self.close()
+
+    def _dispose(self):
+        try:
+            self._raw.close()
+        except Exception as e:
+            logging.debug(f"Error closing pooled connection: {str(e)}")
+
+
+class ConnectionPool:
+    def __init__(self, size=POOL_SIZE, max_overflow=POOL_MAX_OVERFLOW, timeout=POOL_TIMEOUT,
+                 recycle=POOL_RECYCLE, connect=_connect):
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self._connect = connect
+        self._idle = deque()
+        self._open = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'created': 0,
+            'recycles': 0,
+            'failed_pings': 0,
+        }
+
+    def connect(self):
+        deadline = time.monotonic() + self.timeout
+        waited = False
+        with self._cond:
+            while not self._idle and self._open >= self.size + self.max_overflow:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolError(f"Connection pool exhausted after waiting {self.timeout}s")
+                if not waited:
+                    self._stats['waits'] += 1
+                    waited = True
+                self._cond.wait(remaining)
+            if self._idle:
+                conn = self._idle.pop()
+            else:
+                conn = None
+                self._open += 1
+        if conn is None:
+            conn = self._create()
+        elif not self._checkout_ok(conn):
+            conn = self._replace(conn)
+        conn._checked_out = True
+        with self._cond:
+            self._stats['checkouts'] += 1
+        return conn
+
+    def _create(self):
+        try:
+            raw = self._connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats['created'] += 1
+        return PooledConnection(self, raw)
+
+    def _replace(self, conn):
+        conn._dispose()
+        return self._create()
+
+    def _checkout_ok(self, conn):
+        # Recycle old connections, then make sure the server is still there
+        if self.recycle and conn.age > self.recycle:
+            with self._cond:
+                self._stats['recycles'] += 1
+            return False
+        try:
+            conn._raw.ping(reconnect=False)
+            return True
+        except Exception as e:
+            logging.warning(f"Discarding stale pooled connection: {str(e)}")
+            with self._cond:
+                self._stats['failed_pings'] += 1
+            return False
+
+    def _release(self, conn):
+        # Reset any open transaction so the next borrower starts clean
+        try:
+            if conn._raw.is_connected():
+                conn._raw.consume_results()
+                if conn._raw.in_transaction:
+                    conn._raw.rollback()
+                healthy = True
+            else:
+                healthy = False
+        except Exception as e:
+            logging.warning(f"Error resetting pooled connection: {str(e)}")
+            healthy = False
+        with self._cond:
+            if healthy and self._open <= self.size:
+                self._idle.append(conn)
+                conn = None
+            else:
+                self._open -= 1
+            self._cond.notify()
+        if conn is not None:
+            conn._dispose()
+
+    def dispose(self):
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+        for conn in idle:
+            conn._dispose()
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                'size': self.size,
+                'max_overflow': self.max_overflow,
+                'open': self._open,
+                'idle': len(self._idle),
+                'in_use': self._open - len(self._idle),
+                'overflow': max(0, self._open - self.size),
+            })
+        return stats
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    # One pool per process: a pool inherited through fork (gunicorn preload_app)
+    # shares sockets with the parent, so each worker builds its own
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = ConnectionPool()
+                _pool_pid = pid
+    return _pool
+
+
+def get_connection():
+    return get_pool().connect()
+
+
+def pool_stats():
+    stats = get_pool().stats()
+    stats['pid'] = os.getpid()
+    return stats
+
+
+# Request-scoped access: one pooled connection per request, shared by every
+# query the view runs and handed back to the pool in teardown_appcontext
+def get_db():
+    if 'db_conn' not in g:
+        g.db_conn = get_connection()
+        g.db_cursors = {}
+    return g.db_conn
+
+
+def get_cursor(dictionary=False):
+    conn = get_db()
+    cursor = g.db_cursors.get(dictionary)
+    if cursor is None:
+        # Buffered so the cursor can be reused even if a query's rows aren't all read
+        cursor = conn.cursor(dictionary=dictionary, buffered=True)
+        g.db_cursors[dictionary] = cursor
+    return cursor
+
+
+def close_db(e=None):
+    conn = g.pop('db_conn', None)
+    cursors = g.pop('db_cursors', {})
+    if conn is None:
+        return
+    for cursor in cursors.values():
+        try:
+            cursor.close()
+        except Exception as exc:
+            logging.debug(f"Error closing cursor: {str(exc)}")
+    if e is not None:
+        try:
+            conn.rollback()
+        except Exception as exc:
+            logging.debug(f"Error rolling back after request error: {str(exc)}")
+    conn.close()
@@ -0,0 +1,78 @@
+from cache import catalog_cache
+from db import get_db, get_cursor
+
+# Rows shown in each "recent"/"upcoming" panel of the guardian dashboard
+RECENT_LIMIT = 3
+
+CHILDREN_SQL = "SELECT id, name, age FROM students WHERE guardian_id = %s"
+
+
+def namespace(guardian_id):
+    return f"guardian-{guardian_id}"
+
+
+def invalidate(guardian_id):
+    catalog_cache.bump(namespace(guardian_id))
+
+
+def invalidate_students(cursor, student_ids):
+    # Call after attendance or progress rows for these students change
+    student_ids = list(set(student_ids))
+    if not student_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(student_ids))
+    cursor.execute(f"SELECT DISTINCT guardian_id FROM students WHERE id IN ({placeholders}) "
+                   "AND guardian_id IS NOT NULL", student_ids)
+    for (guardian_id,) in cursor.fetchall():
+        invalidate(guardian_id)
+
+
+def recent_queries(student_ids):
+    # [(SQL, params)] for the upcoming events and, if there are children, their latest
+    # attendance and progress rows; the student ids are already known, so neither query
+    # has to join students or guardians again
+    queries = [("SELECT title, date FROM events WHERE date >= CURDATE() ORDER BY date ASC LIMIT %s",
+                [RECENT_LIMIT])]
+    if student_ids:
+        placeholders = ', '.join(['%s'] * len(student_ids))
+        queries.append((f"""SELECT id, student_id, date, status FROM attendance
+                            WHERE student_id IN ({placeholders}) ORDER BY date DESC LIMIT %s""",
+                        list(student_ids) + [RECENT_LIMIT]))
+        queries.append((f"""SELECT id, student_id, subject, marks, report_date FROM progress_reports
+                            WHERE student_id IN ({placeholders}) ORDER BY report_date DESC LIMIT %s""",
+                        list(student_ids) + [RECENT_LIMIT]))
+    return queries
+
+
+def load(guardian_id):
+    cursor = get_cursor(dictionary=True)
+    cursor.execute(CHILDREN_SQL, (guardian_id,))
+    children = cursor.fetchall()
+    names = {child['id']: child['name'] for child in children}
+
+    # Events, attendance and progress in one round trip
+    queries = recent_queries(list(names))
+    multi = get_db().cursor(dictionary=True)
+    try:
+        multi.execute(';\n'.join(sql for sql, _ in queries), [p for _, params in queries for p in params],
+                      map_results=True)
+        result_sets = [rows for _, rows in multi.fetchsets()]
+    finally:
+        multi.close()
+
+    events = result_sets[0]
+    attendance, progress_reports = (result_sets[1], result_sets[2]) if names else ([], [])
+    for row in attendance + progress_reports:
+        row['student_name'] = names.get(row.pop('student_id'))
+    return {
+        'events': events,
+        'children': children,
+        'attendance': attendance,
+        'progress_reports': progress_reports,
+    }
+
+
+def get(guardian_id):
+    # Rebuilt when this guardian's records or the events table change, or after the cache TTL
+    return catalog_cache.get(f"guardian_overview:{guardian_id}", ('events', namespace(guardian_id)),
+                             lambda: load(guardian_id))
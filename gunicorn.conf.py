@@ -0,0 +1,18 @@
+# Read automatically by `gunicorn app:app` (see Procfile.txt)
+import os
+
+# Import the app once in the master and fork workers from it: templates precompiled
+# below, the static manifest and bundles are then shared instead of rebuilt per worker.
+# Connection pools and upload executors are created per process (see db.get_pool).
+preload_app = True
+
+# Threads per worker (gthread). Admin tabs hold an unread-counter event stream open;
+# with plain sync workers each one would occupy a whole worker.
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app is imported, before workers are forked
+    from app import app
+    import template_cache
+    template_cache.precompile(app)
@@ -0,0 +1,103 @@
+from flask import url_for
+from markupsafe import Markup, escape
+import base64
+import io
+import json
+import logging
+import os
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # without Pillow uploads are served as-is
+    Image = None
+
+# Widths generated for every uploaded image; larger originals are never upscaled
+VARIANT_WIDTHS = (320, 640, 1024)
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+PLACEHOLDER_WIDTH = 16
+DEFAULT_SIZES = '(max-width: 767px) 100vw, 33vw'  # the col-md-4 card grid
+
+
+def _variant_path(image_url, width, ext):
+    folder, filename = os.path.split(image_url)
+    root = os.path.splitext(filename)[0]
+    return f"{folder}/variants/{root}_{width}.{ext}"
+
+
+def build_variants(static_root, image_url):
+    # Writes resized WebP and JPEG copies next to the upload and returns the JSON
+    # stored in image_variants, or None when the file can't be processed
+    if Image is None or not image_url:
+        return None
+    source = os.path.join(static_root, image_url)
+    try:
+        with Image.open(source) as original:
+            image = ImageOps.exif_transpose(original).convert('RGB')
+    except Exception as e:
+        logging.warning(f"Skipping image variants for {image_url}: {str(e)}")
+        return None
+    os.makedirs(os.path.join(os.path.dirname(source), 'variants'), exist_ok=True)
+    widths = sorted({min(width, image.width) for width in VARIANT_WIDTHS})
+    variants = {'width': image.width, 'height': image.height, 'webp': [], 'jpeg': []}
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for fmt, ext, options in (('webp', 'webp', {'quality': WEBP_QUALITY, 'method': 4}),
+                                  ('jpeg', 'jpg', {'quality': JPEG_QUALITY, 'optimize': True, 'progressive': True})):
+            path = _variant_path(image_url, width, ext)
+            if not os.path.exists(os.path.join(static_root, path)):  # stored uploads are shared by content
+                resized.save(os.path.join(static_root, path), fmt.upper(), **options)
+            variants[fmt].append([path, width])
+    tiny = image.resize((PLACEHOLDER_WIDTH, max(1, round(image.height * PLACEHOLDER_WIDTH / image.width))))
+    buffer = io.BytesIO()
+    tiny.save(buffer, 'JPEG', quality=40)
+    variants['placeholder'] = 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode()
+    logging.debug(f"Built {len(widths) * 2} variants for {image_url}")
+    return json.dumps(variants)
+
+
+def remove_variants(static_root, image_variants):
+    if not image_variants:
+        return
+    try:
+        variants = json.loads(image_variants)
+    except ValueError:
+        return
+    for fmt in ('webp', 'jpeg'):
+        for path, _ in variants.get(fmt, []):
+            full_path = os.path.join(static_root, path)
+            if os.path.exists(full_path):
+                os.remove(full_path)
+
+
+def srcset(image_variants, fmt='jpeg'):
+    if not image_variants:
+        return ''
+    try:
+        variants = json.loads(image_variants)
+    except ValueError:
+        return ''
+    return ', '.join(f"{url_for('static', filename=path)} {width}w" for path, width in variants.get(fmt, []))
+
+
+def responsive_image(image_url, image_variants=None, alt='', css_class='', fallback=None, sizes=DEFAULT_SIZES):
+    # Jinja helper: <picture> with WebP and JPEG srcsets and a blurred inline placeholder,
+    # or a plain <img> for rows without variants
+    src = url_for('static', filename=image_url or fallback)
+    try:
+        variants = json.loads(image_variants) if image_url and image_variants else None
+    except ValueError:
+        variants = None
+    if not variants:
+        return Markup(f'<img src="{escape(src)}" alt="{escape(alt)}" class="{escape(css_class)}" loading="lazy" />')
+    webp = srcset(image_variants, 'webp')
+    jpeg = srcset(image_variants, 'jpeg')
+    src = url_for('static', filename=variants['jpeg'][-1][0])  # largest derivative, not the raw upload
+    return Markup(
+        f'<picture>'
+        f'<source type="image/webp" srcset="{escape(webp)}" sizes="{escape(sizes)}">'
+        f'<img src="{escape(src)}" srcset="{escape(jpeg)}" sizes="{escape(sizes)}" alt="{escape(alt)}" '
+        f'class="{escape(css_class)}" width="{variants["width"]}" height="{variants["height"]}" loading="lazy" '
+        f'style="background-size: cover; background-image: url({escape(variants["placeholder"])})" />'
+        f'</picture>')
@@ -0,0 +1,184 @@
+from datetime import datetime
+import csv
+import io
+import json
+import logging
+import os
+import analytics
+import guardian_overview
+
+# Rows written per transaction; a failing chunk is rolled back without losing the others
+CHUNK_SIZE = int(os.environ.get('INGEST_CHUNK_SIZE', 1000))
+# Upper bound for one batch (a whole institute's day is a few thousand rows)
+MAX_ROWS = int(os.environ.get('INGEST_MAX_ROWS', 50000))
+# Per-row errors returned to the caller; the total is always reported
+MAX_REPORTED_ERRORS = 500
+
+# Batch kind -> target table, columns in insert order, and which are required
+KINDS = {
+    'attendance': {
+        'table': 'attendance',
+        'columns': ['student_id', 'date', 'status'],
+        'required': ['student_id', 'date', 'status'],
+        # Re-loading a day replaces that day's rows instead of duplicating them
+        'key': ['student_id', 'date'],
+        'date_column': 'date',
+    },
+    'progress': {
+        'table': 'progress_reports',
+        'columns': ['student_id', 'subject', 'marks', 'comments', 'report_date'],
+        'required': ['student_id', 'subject', 'report_date'],
+        'key': None,
+        'date_column': 'report_date',
+    },
+}
+
+
+def _int(value):
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        raise ValueError('must be a whole number')
+
+
+def _date(value):
+    try:
+        return datetime.strptime(str(value).strip(), '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError('must be a date (YYYY-MM-DD)')
+
+
+def _text(limit):
+    def parse(value):
+        value = str(value).strip()
+        if len(value) > limit:
+            raise ValueError(f'must be at most {limit} characters')
+        return value
+    return parse
+
+
+# Column -> parser; parsers raise ValueError with the reason shown to the caller
+PARSERS = {
+    'student_id': _int,
+    'date': _date,
+    'report_date': _date,
+    'status': _text(20),
+    'subject': _text(100),
+    'marks': _int,
+    'comments': _text(65535),
+}
+
+
+def read_batch(data, fmt):
+    # Returns a list of dicts from a CSV (header row required) or JSON body; JSON may be
+    # a list of objects or {"rows": [...]}
+    if isinstance(data, bytes):
+        data = data.decode('utf-8-sig')
+    if fmt == 'csv':
+        records = list(csv.DictReader(io.StringIO(data)))
+    else:
+        records = json.loads(data)
+        if isinstance(records, dict):
+            records = records.get('rows', [])
+        if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+            raise ValueError('JSON batch must be a list of objects')
+    if len(records) > MAX_ROWS:
+        raise ValueError(f'Batch has {len(records)} rows; the limit is {MAX_ROWS}')
+    return records
+
+
+def _existing_students(cursor, student_ids):
+    existing = set()
+    ids = list(student_ids)
+    for i in range(0, len(ids), CHUNK_SIZE):
+        chunk = ids[i:i + CHUNK_SIZE]
+        placeholders = ', '.join(['%s'] * len(chunk))
+        cursor.execute(f"SELECT id FROM students WHERE id IN ({placeholders})", chunk)
+        existing.update(row[0] for row in cursor.fetchall())
+    return existing
+
+
+def validate(cursor, kind, records):
+    # Returns ([(row number, values tuple)], [error dicts]); rows are numbered from 1
+    spec = KINDS[kind]
+    parsed, errors = [], []
+    for number, record in enumerate(records, 1):
+        values = {}
+        problems = []
+        for column in spec['columns']:
+            raw = record.get(column)
+            if raw is None or str(raw).strip() == '':
+                if column in spec['required']:
+                    problems.append(f'{column} is required')
+                values[column] = None
+                continue
+            try:
+                values[column] = PARSERS[column](raw)
+            except ValueError as e:
+                problems.append(f'{column} {e}')
+        if problems:
+            errors.append({'row': number, 'error': '; '.join(problems)})
+        else:
+            parsed.append((number, values))
+
+    existing = _existing_students(cursor, {values['student_id'] for _, values in parsed})
+    rows, seen = [], set()
+    for number, values in parsed:
+        if values['student_id'] not in existing:
+            errors.append({'row': number, 'error': f"student_id {values['student_id']} does not exist"})
+            continue
+        if spec['key']:
+            key = tuple(values[column] for column in spec['key'])
+            if key in seen:
+                errors.append({'row': number, 'error': 'duplicate of an earlier row in this batch'})
+                continue
+            seen.add(key)
+        rows.append((number, tuple(values[column] for column in spec['columns'])))
+    return rows, errors
+
+
+def _write_chunk(cursor, kind, spec, values):
+    if spec['key']:
+        positions = [spec['columns'].index(column) for column in spec['key']]
+        keys = [tuple(row[p] for p in positions) for row in values]
+        tuple_sql = '(' + ', '.join(['%s'] * len(positions)) + ')'
+        cursor.execute(f"DELETE FROM {spec['table']} WHERE ({', '.join(spec['key'])}) IN "
+                       f"({', '.join([tuple_sql] * len(keys))})", [v for key in keys for v in key])
+    # mysql-connector rewrites an INSERT executemany into multi-row INSERT statements
+    cursor.executemany(f"INSERT INTO {spec['table']} ({', '.join(spec['columns'])}) "
+                       f"VALUES ({', '.join(['%s'] * len(spec['columns']))})", values)
+    # Rollups commit with the rows they summarize
+    day_position = spec['columns'].index(spec['date_column'])
+    analytics.refresh(cursor, kind, [row[0] for row in values], [row[day_position] for row in values])
+
+
+def ingest(conn, kind, records):
+    # Validates the whole batch, then writes valid rows in CHUNK_SIZE transactions
+    spec = KINDS[kind]
+    cursor = conn.cursor()
+    try:
+        rows, errors = validate(cursor, kind, records)
+        inserted = 0
+        for i in range(0, len(rows), CHUNK_SIZE):
+            chunk = rows[i:i + CHUNK_SIZE]
+            values = [row for _, row in chunk]
+            try:
+                _write_chunk(cursor, kind, spec, values)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logging.error(f"Ingest {kind} rows {chunk[0][0]}-{chunk[-1][0]} failed: {str(e)}")
+                errors.extend({'row': number, 'error': f'not written: {str(e)}'} for number, _ in chunk)
+                continue
+            inserted += len(chunk)
+            guardian_overview.invalidate_students(cursor, [row[0] for row in values])
+        errors.sort(key=lambda error: error['row'])
+        logging.info(f"Ingested {inserted} of {len(records)} {kind} rows ({len(errors)} errors)")
+        return {
+            'received': len(records),
+            'inserted': inserted,
+            'error_count': len(errors),
+            'errors': errors[:MAX_REPORTED_ERRORS],
+        }
+    finally:
+        cursor.close()
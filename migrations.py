@@ -0,0 +1,399 @@
+from datetime import date, datetime
+from werkzeug.datastructures import MultiDict
+import admission_queries
+import analytics
+import contact_queries
+import credentials
+import guardian_overview
+import logging
+import popup_delivery
+import re
+import stats
+import storage
+import timeseries
+import upload_pipeline
+
+MIGRATIONS_TABLE = '''CREATE TABLE IF NOT EXISTS schema_migrations
+                      (version INT PRIMARY KEY,
+                       name VARCHAR(255) NOT NULL,
+                       applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)'''
+
+
+# Migration steps. Each receives a cursor; append new steps with the next version
+# number and never edit applied ones. MySQL commits DDL implicitly, so a step that
+# fails halfway is retried from the start and must be safe to re-run.
+
+def baseline_schema(cursor):
+    # Tables and column fixes previously run by init_db on every start
+    cursor.execute('''CREATE TABLE IF NOT EXISTS popups
+                      (id INTEGER PRIMARY KEY AUTO_INCREMENT,
+                       title VARCHAR(255),
+                       message TEXT NOT NULL,
+                       image_url VARCHAR(255),
+                       show_until TEXT,
+                       type TEXT)''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS attendance
+                      (id INT(11) PRIMARY KEY AUTO_INCREMENT,
+                       student_id INT(11),
+                       date DATE,
+                       status VARCHAR(20),
+                       created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS students
+                      (id INT(11) PRIMARY KEY AUTO_INCREMENT,
+                       name VARCHAR(100) NOT NULL,
+                       age INT,
+                       guardian_id INT(11),
+                       created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS contacts
+                      (id INT(11) PRIMARY KEY AUTO_INCREMENT,
+                       name VARCHAR(100) NOT NULL,
+                       email VARCHAR(100) NOT NULL,
+                       subject VARCHAR(200),
+                       message TEXT,
+                       created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                       is_read BOOLEAN DEFAULT FALSE)''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS progress_reports
+                      (id INT(11) PRIMARY KEY AUTO_INCREMENT,
+                       student_id INT(11),
+                       subject VARCHAR(100),
+                       marks INT,
+                       comments TEXT,
+                       report_date DATE,
+                       created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS staff
+                      (id INT(11) PRIMARY KEY AUTO_INCREMENT,
+                       designation VARCHAR(100) NOT NULL,
+                       bps_grade VARCHAR(10) NOT NULL,
+                       quantity INT NOT NULL)''')
+    # Add missing columns if table exists
+    cursor.execute("SHOW COLUMNS FROM staff LIKE 'bps_grade'")
+    if not cursor.fetchone():
+        cursor.execute('''ALTER TABLE staff ADD COLUMN bps_grade VARCHAR(10) NOT NULL AFTER designation''')
+    cursor.execute("SHOW COLUMNS FROM staff LIKE 'quantity'")
+    if not cursor.fetchone():
+        cursor.execute('''ALTER TABLE staff ADD COLUMN quantity INT NOT NULL AFTER bps_grade''')
+    # Remove obsolete columns
+    cursor.execute("SHOW COLUMNS FROM staff LIKE 'name'")
+    if cursor.fetchone():
+        cursor.execute('''ALTER TABLE staff DROP COLUMN name''')
+    cursor.execute("SHOW COLUMNS FROM staff LIKE 'qualification'")
+    if cursor.fetchone():
+        cursor.execute('''ALTER TABLE staff DROP COLUMN qualification''')
+    cursor.execute("SHOW COLUMNS FROM staff LIKE 'photo_url'")
+    if cursor.fetchone():
+        cursor.execute('''ALTER TABLE staff DROP COLUMN photo_url''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS guardians
+                      (id INT(11) PRIMARY KEY AUTO_INCREMENT,
+                       full_name VARCHAR(100) NOT NULL,
+                       email VARCHAR(100) NOT NULL UNIQUE,
+                       password VARCHAR(255) NOT NULL,
+                       phone VARCHAR(15),
+                       cnic VARCHAR(15),
+                       created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS admissions
+                  (id INT(11) PRIMARY KEY AUTO_INCREMENT,
+                   student_name VARCHAR(100) NOT NULL,
+                   cnic VARCHAR(15) NOT NULL,
+                   dob DATE,
+                   gender VARCHAR(10),
+                   age INT,
+                   phone VARCHAR(15),
+                   address TEXT,
+                   student_occupation VARCHAR(100),
+                   parent_name VARCHAR(100),
+                   parent_cnic VARCHAR(15),
+                   parent_phone VARCHAR(15),
+                   parent_occupation VARCHAR(100),
+                   num_siblings INT,
+                   sibling_disability VARCHAR(100),
+                   guardian_name VARCHAR(100),
+                   guardian_phone VARCHAR(15),
+                   disability_certificate VARCHAR(255),
+                   disability_name VARCHAR(100),
+                   medical_history TEXT,
+                   regular_medication TEXT,
+                   assistive_device VARCHAR(100),
+                   epilepsy VARCHAR(10),
+                   drug_addiction VARCHAR(10),
+                   assistant VARCHAR(10),
+                   communicable_disease TEXT,
+                   education_level VARCHAR(100),
+                   documents VARCHAR(255),
+                   course VARCHAR(100),
+                   admission_type VARCHAR(20),
+                   duration_stay INT,
+                   pick_drop VARCHAR(100),
+                   affidavit VARCHAR(10),
+                   admission_date DATE,
+                   photo VARCHAR(255),
+                   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    # Dynamically add missing columns to admissions table
+    cursor.execute("SHOW COLUMNS FROM admissions")
+    existing_columns = [col[0] for col in cursor.fetchall()]
+    required_columns = {
+        'phone': 'VARCHAR(15) AFTER age',
+        'address': 'TEXT AFTER phone',
+        'student_occupation': 'VARCHAR(100) AFTER address',
+        'parent_name': 'VARCHAR(100) AFTER student_occupation',
+        'parent_cnic': 'VARCHAR(15) AFTER parent_name',
+        'parent_phone': 'VARCHAR(15) AFTER parent_cnic',
+        'parent_occupation': 'VARCHAR(100) AFTER parent_phone',
+        'num_siblings': 'INT AFTER parent_occupation',
+        'sibling_disability': 'VARCHAR(100) AFTER num_siblings',
+        'guardian_name': 'VARCHAR(100) AFTER sibling_disability',
+        'guardian_phone': 'VARCHAR(15) AFTER guardian_name',
+        'disability_certificate': 'VARCHAR(255) AFTER guardian_phone',
+        'disability_name': 'VARCHAR(100) AFTER disability_certificate',
+        'medical_history': 'TEXT AFTER disability_name',
+        'regular_medication': 'TEXT AFTER medical_history',
+        'assistive_device': 'VARCHAR(100) AFTER regular_medication',
+        'epilepsy': 'VARCHAR(10) AFTER assistive_device',
+        'drug_addiction': 'VARCHAR(10) AFTER epilepsy',
+        'assistant': 'VARCHAR(10) AFTER drug_addiction',
+        'communicable_disease': 'TEXT AFTER assistant',
+        'education_level': 'VARCHAR(100) AFTER communicable_disease',
+        'documents': 'VARCHAR(255) AFTER education_level',
+        'course': 'VARCHAR(100) AFTER documents',
+        'admission_type': 'VARCHAR(20) AFTER course',
+        'duration_stay': 'INT AFTER admission_type',
+        'pick_drop': 'VARCHAR(100) AFTER duration_stay',
+        'affidavit': 'VARCHAR(10) AFTER pick_drop',
+        'admission_date': 'DATE AFTER affidavit',
+        'photo': 'VARCHAR(255) AFTER admission_date'
+    }
+    for col, definition in required_columns.items():
+        if col not in existing_columns:
+            cursor.execute(f"ALTER TABLE admissions ADD COLUMN {col} {definition}")
+    cursor.execute("SHOW COLUMNS FROM admissions LIKE 'photo'")
+    if not cursor.fetchone():
+        cursor.execute('''ALTER TABLE admissions ADD COLUMN photo VARCHAR(255)''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS courses
+                      (id INT(11) PRIMARY KEY AUTO_INCREMENT,
+                       course_id VARCHAR(36) NOT NULL,
+                       name VARCHAR(100) NOT NULL,
+                       description TEXT,
+                       duration VARCHAR(50),
+                       level VARCHAR(50),
+                       created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                       image_url VARCHAR(255))''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS events
+                      (id INT(11) PRIMARY KEY AUTO_INCREMENT,
+                       title VARCHAR(100) NOT NULL,
+                       date DATE,
+                       description TEXT,
+                       image_url VARCHAR(255),
+                       created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+
+
+def entity_counts_table(cursor):
+    cursor.execute(stats.CREATE_TABLE)
+
+
+# (table, index name, columns) for the predicates and sort orders app.py uses
+INDEXES = [
+    ('events', 'idx_events_date', 'date'),
+    ('events', 'idx_events_created_at', 'created_at'),
+    ('courses', 'idx_courses_course_id', 'course_id'),
+    ('courses', 'idx_courses_created_at', 'created_at'),
+    ('contacts', 'idx_contacts_is_read_created_at', 'is_read, created_at'),
+    ('contacts', 'idx_contacts_created_at', 'created_at'),
+    ('admissions', 'idx_admissions_created_at', 'created_at'),
+    ('students', 'idx_students_guardian_id', 'guardian_id'),
+    ('students', 'idx_students_created_at', 'created_at'),
+    ('attendance', 'idx_attendance_student_date', 'student_id, date'),
+    ('progress_reports', 'idx_progress_student_report_date', 'student_id, report_date'),
+]
+
+
+def create_index(cursor, table, name, columns, kind=''):
+    # MySQL has no CREATE INDEX IF NOT EXISTS; skip indexes someone already added by hand.
+    # kind is an index prefix such as 'FULLTEXT'.
+    cursor.execute(f"SHOW INDEX FROM {table} WHERE Key_name = %s", (name,))
+    if cursor.fetchall():
+        return
+    cursor.execute(f"CREATE {kind + ' ' if kind else ''}INDEX {name} ON {table} ({columns})")
+
+
+def hot_path_indexes(cursor):
+    for table, name, columns in INDEXES:
+        create_index(cursor, table, name, columns)
+
+
+def admissions_filter_indexes(cursor):
+    # Filtered admin list: equality on the filter column, then keyset order on created_at
+    create_index(cursor, 'admissions', 'idx_admissions_course_created_at', 'course, created_at')
+    create_index(cursor, 'admissions', 'idx_admissions_type_created_at', 'admission_type, created_at')
+    create_index(cursor, 'admissions', 'idx_admissions_student_name', 'student_name')
+
+
+def admission_upload_tracking(cursor):
+    cursor.execute(upload_pipeline.CREATE_TABLE)
+    cursor.execute("SHOW COLUMNS FROM admissions LIKE 'upload_status'")
+    if not cursor.fetchone():
+        cursor.execute("ALTER TABLE admissions ADD COLUMN upload_status VARCHAR(20) NOT NULL DEFAULT 'complete' AFTER photo")
+
+
+def image_variants_columns(cursor):
+    # JSON describing the resized WebP/JPEG copies of image_url (see images.build_variants)
+    for table in ('courses', 'events', 'popups'):
+        cursor.execute(f"SHOW COLUMNS FROM {table} LIKE 'image_variants'")
+        if not cursor.fetchone():
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN image_variants TEXT AFTER image_url")
+
+
+def upload_blob_store(cursor):
+    # Existing uploads keep their paths; each referencing column counts as one reference
+    cursor.execute(storage.CREATE_TABLE)
+    paths = []
+    for table in ('courses', 'events', 'popups'):
+        cursor.execute(f"SELECT image_url FROM {table} WHERE image_url IS NOT NULL")
+        paths += [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT photo, disability_certificate, documents FROM admissions")
+    for photo, disability_certificate, documents in cursor.fetchall():
+        paths += [photo, disability_certificate] + (documents.split(',') if documents else [])
+    registered = storage.register_existing(cursor, paths)
+    logging.info(f"Registered {registered} existing uploads")
+
+
+def popup_show_until_date(cursor):
+    # show_until was TEXT, so the active-popup filter compared strings and could not use
+    # an index; values that are not YYYY-MM-DD dates become NULL (no end date)
+    cursor.execute("SHOW COLUMNS FROM popups LIKE 'show_until'")
+    column = cursor.fetchone()
+    column_type = column[1].decode() if isinstance(column[1], bytes) else column[1]
+    if not column_type.lower().startswith('date'):
+        cursor.execute("""UPDATE popups SET show_until = NULL
+                          WHERE show_until NOT REGEXP '^[0-9]{4}-(0[1-9]|1[0-2])-(0[1-9]|[12][0-9]|3[01])$'""")
+        cursor.execute("ALTER TABLE popups MODIFY show_until DATE NULL")
+    create_index(cursor, 'popups', 'idx_popups_show_until', 'show_until')
+
+
+def analytics_rollups(cursor):
+    # Monthly per-student attendance and marks, backfilled from the existing raw rows
+    for statement in analytics.CREATE_TABLES:
+        cursor.execute(statement)
+    analytics.rebuild(cursor)
+
+
+def contacts_fulltext(cursor):
+    # Inbox search (contact_queries.where_clause) matches against both columns together
+    create_index(cursor, 'contacts', 'ft_contacts_subject_message', 'subject, message', kind='FULLTEXT')
+
+
+def password_hash_columns(cursor):
+    # Hashes are up to ~160 characters (credentials.METHOD); plaintext values stay and are
+    # upgraded at each account's next login. admins is created outside these migrations.
+    cursor.execute("SHOW TABLES LIKE 'admins'")
+    if not cursor.fetchone():
+        return
+    cursor.execute("SHOW COLUMNS FROM admins LIKE 'password'")
+    column = cursor.fetchone()
+    column_type = column[1].decode() if isinstance(column[1], bytes) else column[1]
+    size = re.search(r'char\((\d+)\)', column_type.lower())
+    if size and int(size.group(1)) < 255:
+        cursor.execute("ALTER TABLE admins MODIFY password VARCHAR(255) NOT NULL")
+
+
+def admission_documents_text(cursor):
+    # documents holds every uploaded document's path joined with commas; content-addressed
+    # paths are ~90 characters each (storage.blob_path), so VARCHAR(255) fits only two
+    cursor.execute("SHOW COLUMNS FROM admissions LIKE 'documents'")
+    column = cursor.fetchone()
+    column_type = column[1].decode() if isinstance(column[1], bytes) else column[1]
+    if column_type.lower() != 'text':
+        cursor.execute("ALTER TABLE admissions MODIFY documents TEXT")
+
+
+MIGRATIONS = [
+    (1, 'baseline schema', baseline_schema),
+    (2, 'entity counts table', entity_counts_table),
+    (3, 'hot path indexes', hot_path_indexes),
+    (4, 'admissions filter indexes', admissions_filter_indexes),
+    (5, 'admission upload tracking', admission_upload_tracking),
+    (6, 'image variants columns', image_variants_columns),
+    (7, 'upload blob store', upload_blob_store),
+    (8, 'popup show_until date', popup_show_until_date),
+    (9, 'analytics rollups', analytics_rollups),
+    (10, 'contacts fulltext index', contacts_fulltext),
+    (11, 'password hash columns', password_hash_columns),
+    (12, 'admission documents text', admission_documents_text),
+]
+
+
+def applied_versions(cursor):
+    cursor.execute(MIGRATIONS_TABLE)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def migrate(conn):
+    # Runs only the steps not yet recorded in schema_migrations; returns the versions applied
+    cursor = conn.cursor()
+    applied = []
+    try:
+        done = applied_versions(cursor)
+        for version, name, step in MIGRATIONS:
+            if version in done:
+                continue
+            logging.info(f"Applying migration {version}: {name}")
+            step(cursor)
+            cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+            conn.commit()
+            applied.append(version)
+        if not applied:
+            logging.info("Database schema is up to date")
+        return applied
+    except Exception as e:
+        logging.error(f"Migration failed: {str(e)}")
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def report_queries():
+    # Queries from app.py checked by explain_report(): [(where it runs, SQL, sample params)].
+    # Built by the same functions the routes call, with sample filters and a keyset cursor
+    # for the paginated lists; the chart window is the dashboard's, ending this month.
+    first_page = MultiDict()
+    next_page = MultiDict({'after': admission_queries.encode_cursor(datetime.utcnow(), 1)})
+    filtered = MultiDict({'course': 'sample', 'admission_type': admission_queries.ADMISSION_TYPES[0]})
+    starts = timeseries.bucket_starts('month', 6, datetime.utcnow())
+    series_window = (starts[0], timeseries.next_bucket('month', starts[-1]))
+    queries = [
+        ('index', "SELECT * FROM events ORDER BY date DESC LIMIT 3", ()),
+        ('guardian_login', credentials.FIND_ACCOUNTS_SQL, ('', '')),
+        ('edit_course', "SELECT * FROM courses WHERE course_id = %s", ('',)),
+        ('get_popups', popup_delivery.ACTIVE_SQL, (date.today(),)),
+        ('guardian_dashboard', guardian_overview.CHILDREN_SQL, (0,)),
+    ]
+    for args in (first_page, next_page, MultiDict({'status': 'unread'}), MultiDict({'q': 'refund'})):
+        queries.append(('admin_contacts', *contact_queries.page_query(contact_queries.parse_filters(args))))
+    for args in (first_page, next_page, filtered, MultiDict({'sort': 'student_name', 'order': 'asc'})):
+        queries.append(('admin_admissions', *admission_queries.page_query(admission_queries.parse_filters(args))))
+    for entity in ('courses', 'events'):
+        queries.append(('api_courses_events', timeseries.bucket_query(entity, 'month'), series_window))
+    for query, params in guardian_overview.recent_queries([1, 2, 3]):
+        queries.append(('guardian_dashboard', query, params))
+    return queries
+
+
+def explain_report(conn):
+    # Returns one row per table access: route, table, chosen key, access type and row estimate
+    cursor = conn.cursor(dictionary=True)
+    report = []
+    try:
+        for route, query, params in report_queries():
+            cursor.execute(f"EXPLAIN {query}", params)
+            for row in cursor.fetchall():
+                report.append({
+                    'route': route,
+                    'table': row.get('table'),
+                    'type': row.get('type'),
+                    'key': row.get('key'),
+                    'rows': row.get('rows'),
+                    'extra': row.get('Extra'),
+                })
+    finally:
+        cursor.close()
+    return report
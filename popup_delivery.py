@@ -0,0 +1,59 @@
+from flask import Response, request
+from datetime import date, datetime, time as dt_time, timedelta
+import hashlib
+import json
+import os
+import images
+from cache import catalog_cache
+from db import get_cursor
+
+# Seconds a browser may reuse /get_popups before revalidating it with the ETag
+MAX_AGE = int(os.environ.get('POPUP_CACHE_MAX_AGE', 60))
+# Embed the active popups in the landing page so it needs no second request
+INLINE = os.environ.get('POPUP_INLINE', '1') != '0'
+
+ACTIVE_SQL = """SELECT id, title, message, image_url, image_variants, type FROM popups
+                WHERE show_until IS NULL OR show_until >= %s ORDER BY id"""
+
+
+def parse_show_until(value):
+    # Empty date input means the popup has no end date; raises ValueError on anything else
+    if not value:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def load_active(today):
+    cursor = get_cursor(dictionary=True)
+    cursor.execute(ACTIVE_SQL, (today,))
+    popups = cursor.fetchall()
+    for popup in popups:
+        popup['image_srcset'] = images.srcset(popup.pop('image_variants'))
+    body = json.dumps({'popups': popups}, separators=(',', ':')).encode('utf-8')
+    return {'popups': popups, 'body': body, 'etag': hashlib.sha256(body).hexdigest()[:32]}
+
+
+def active():
+    # Keyed by date so the set rolls over at midnight even if no admin touches a popup;
+    # add/edit/delete_popup bump the 'popups' namespace via invalidate()
+    today = date.today()
+    return catalog_cache.get(f"active_popups:{today.isoformat()}", 'popups', lambda: load_active(today))
+
+
+def invalidate():
+    catalog_cache.bump('popups')
+
+
+def seconds_until_midnight():
+    now = datetime.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), dt_time.min)
+    return int((midnight - now).total_seconds())
+
+
+def respond(active_set):
+    response = Response(active_set['body'], mimetype='application/json')
+    response.set_etag(active_set['etag'])
+    response.cache_control.public = True
+    # Never let a browser keep yesterday's set past the day's rollover
+    response.cache_control.max_age = min(MAX_AGE, seconds_until_midnight())
+    return response.make_conditional(request)
@@ -0,0 +1,50 @@
+// Keeps every [data-unread-count] element on admin pages in step with the unread message
+// count: pushed over Server-Sent Events, or long-polled where EventSource is unavailable
+(function() {
+    const script = document.currentScript;
+    const streamUrl = script.dataset.unreadStream;
+    const pollUrl = script.dataset.unreadPoll;
+    let known = null;
+
+    function show(count) {
+        known = count;
+        document.querySelectorAll('[data-unread-count]').forEach(element => {
+            element.textContent = count;
+            // The sidebar badge hides itself at zero; the dashboard card always shows
+            if (element.classList.contains('badge')) {
+                element.hidden = count === 0;
+            }
+        });
+    }
+
+    function longPoll() {
+        const url = known === null ? pollUrl : `${pollUrl}?known=${known}`;
+        fetch(url, { credentials: 'same-origin' })
+            .then(response => response.json())
+            .then(data => {
+                if (!data.success) {
+                    throw new Error(data.error);
+                }
+                show(data.unread_count);
+                longPoll();
+            })
+            .catch(() => {
+                setTimeout(longPoll, 10000);
+            });
+    }
+
+    document.addEventListener('DOMContentLoaded', function() {
+        if (!document.querySelector('[data-unread-count]')) {
+            return;
+        }
+        if (window.EventSource) {
+            // EventSource reconnects by itself when the server closes the stream
+            const source = new EventSource(streamUrl);
+            source.addEventListener('unread', event => {
+                show(JSON.parse(event.data).unread_count);
+            });
+        } else {
+            longPoll();
+        }
+    });
+})();
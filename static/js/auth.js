@@ -0,0 +1,19 @@
+// Rotating quotes under the animation on the guardian auth pages
+const quotes = [
+    "Every child is a different kind of flower.",
+    "Together they make this world a beautiful garden.",
+    "Believe in their strength.",
+    "Special needs, special love, special dreams.",
+    "Ability over disability.",
+    "Hope. Care. Empower."
+];
+let index = 0;
+const quoteBox = document.getElementById("quoteBox");
+setInterval(() => {
+    index = (index + 1) % quotes.length;
+    quoteBox.style.opacity = 0;
+    setTimeout(() => {
+        quoteBox.textContent = quotes[index];
+        quoteBox.style.opacity = 1;
+    }, 500);
+}, 4000);
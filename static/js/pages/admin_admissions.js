@@ -0,0 +1,462 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Select all checkboxes
+    const selectAllCheckbox = document.getElementById('selectAll');
+    if (selectAllCheckbox) {
+        selectAllCheckbox.addEventListener('change', function() {
+            const checkboxes = document.querySelectorAll('.admission-checkbox');
+            checkboxes.forEach(checkbox => {
+                checkbox.checked = selectAllCheckbox.checked;
+            });
+        });
+    }
+
+    // Delete selected admissions
+    window.deleteSelectedAdmissions = function() {
+        const checkboxes = document.querySelectorAll('.admission-checkbox:checked');
+        const ids = Array.from(checkboxes).map(checkbox => checkbox.value);
+        if (ids.length === 0) {
+            alert('Please select at least one admission to delete.');
+            return;
+        }
+        if (confirm(`Are you sure you want to delete ${ids.length} admission(s)? This action cannot be undone.`)) {
+            $.ajax({
+                url: '/api/admission/delete',
+                method: 'POST',
+                contentType: 'application/json',
+                data: JSON.stringify({ ids: ids }),
+                success: function(data) {
+                    if (data.success) {
+                        alert('Selected admissions deleted successfully.');
+                        location.reload(); // Reload to update the table
+                    } else {
+                        console.error('API Error:', data.error || 'Failed to delete admissions');
+                        alert('Error: ' + (data.error || 'Failed to delete admissions'));
+                    }
+                },
+                error: function(xhr, status, error) {
+                    const errorMsg = xhr.responseJSON && xhr.responseJSON.error ? xhr.responseJSON.error : 'Failed to delete admissions';
+                    console.error('Error deleting admissions:', status, error, xhr.responseText);
+                    alert('Error deleting admissions: ' + errorMsg);
+                }
+            });
+        }
+    };
+});
+
+// Print Application Summary
+function printAdmission(admissionId) {
+    admissionId = String(admissionId);
+    $.ajax({
+        url: '/api/admission/' + admissionId,
+        method: 'GET',
+        success: function(data) {
+            if (data.success && data.admission) {
+                const admission = data.admission;
+                const staticBaseUrl = '/static';
+                const photoPath = admission.photo && admission.photo !== 'N/A' ? admission.photo.replace(/^\/|\/$/g, '') : null;
+                const photoUrl = photoPath ? `${staticBaseUrl}/${photoPath}` : null;
+                const documents = admission.documents && Array.isArray(admission.documents) ? admission.documents : (admission.documents ? admission.documents.split(',') : []);
+                const printWindow = window.open('', '_blank');
+                printWindow.document.write(`
+                    <html>
+                    <head>
+                        <title>Admission Form - ${admission.student_name || 'Unknown'}</title>
+                        <style>
+                            body {
+                                font-family: 'Open Sans', sans-serif;
+                                font-size: 11pt;
+                                margin: 20px;
+                                color: #2c3e50;
+                            }
+                            .print-container {
+                                max-width: 900px;
+                                margin: 0 auto;
+                                padding: 30px;
+                                border: 2px solid #009970;
+                                border-radius: 10px;
+                                background: #ffffff;
+                            }
+                            .logos {
+                                display: flex;
+                                justify-content: space-between;
+                                margin-bottom: 20px;
+                            }
+                            .logos img {
+                                max-width: 100px;
+                                height: auto;
+                            }
+                            .header {
+                                text-align: center;
+                                margin-bottom: 20px;
+                                border-bottom: 2px solid #009970;
+                                padding-bottom: 10px;
+                            }
+                            .header h1 {
+                                font-family: 'Poppins', sans-serif;
+                                font-weight: 700;
+                                font-size: 1.8rem;
+                                color: #009970;
+                                margin: 0;
+                            }
+                            .header h2 {
+                                font-family: 'Poppins', sans-serif;
+                                font-weight: 600;
+                                font-size: 1.4rem;
+                                color: #2c3e50;
+                                margin: 5px 0;
+                            }
+                            .photo-box {
+                                width: 120px;
+                                height: 150px;
+                                border: 2px dashed #000;
+                                float: right;
+                                margin: 10px 0 10px 20px;
+                                display: flex;
+                                align-items: center;
+                                justify-content: center;
+                                font-size: 0.9rem;
+                                color: #6c757d;
+                                text-align: center;
+                                background: #ffffff;
+                                overflow: hidden;
+                            }
+                            .photo-box img {
+                                width: 100%;
+                                height: 100%;
+                                object-fit: cover;
+                            }
+                            .section-title {
+                                font-family: 'Poppins', sans-serif;
+                                font-weight: 600;
+                                font-size: 1.2rem;
+                                color: #009970;
+                                margin: 20px 0 10px;
+                                border-left: 4px solid #009970;
+                                padding-left: 10px;
+                            }
+                            table {
+                                width: 100%;
+                                border-collapse: collapse;
+                                margin-bottom: 20px;
+                            }
+                            th, td {
+                                border: 1px solid #d1d8dd;
+                                padding: 10px;
+                                text-align: left;
+                                vertical-align: top;
+                            }
+                            th {
+                                background: #f1f5f9;
+                                font-family: 'Poppins', sans-serif;
+                                font-weight: 600;
+                                color: #34495e;
+                                width: 30%;
+                                text-transform: uppercase;
+                                font-size: 0.9rem;
+                            }
+                            td {
+                                font-family: 'Open Sans', sans-serif;
+                                color: #2c3e50;
+                                font-size: 0.95rem;
+                            }
+                            .documents-list {
+                                list-style-type: none;
+                                padding: 0;
+                                margin: 0;
+                            }
+                            .documents-list li {
+                                margin-bottom: 5px;
+                                font-size: 0.95rem;
+                            }
+                            .signature-section {
+                                display: flex;
+                                justify-content: space-between;
+                                margin-top: 30px;
+                                flex-wrap: wrap;
+                            }
+                            .signature-section div {
+                                width: 30%;
+                                text-align: center;
+                            }
+                            .signature-section p {
+                                border-top: 1px solid #2c3e50;
+                                padding-top: 10px;
+                                margin: 0;
+                            }
+                            .print-btn {
+                                display: block;
+                                margin: 30px auto 0;
+                                padding: 10px 25px;
+                                background: #009970;
+                                color: #ffffff;
+                                border: none;
+                                border-radius: 6px;
+                                font-family: 'Poppins', sans-serif;
+                                font-weight: 500;
+                                cursor: pointer;
+                            }
+                            @media print {
+                                .no-print {
+                                    display: none !important;
+                                }
+                            }
+                        </style>
+                    </head>
+                    <body>
+                        <div class="print-container">
+                            <div class="logos">
+                                <img src="/static/image1.png" alt="Government Logo 1" onerror="this.src='https://via.placeholder.com/100x50?text=Logo+1';" />
+                                <img src="/static/image2.png" alt="Government Logo 2" onerror="this.src='https://via.placeholder.com/100x50?text=Logo+2';" />
+                            </div>
+                            <div class="header">
+                                <h1>Skill Development Center for Persons with Disabilities, Lahore</h1>
+                                <h2>Social Welfare & Bait ul Maal Department Punjab, Lahore</h2>
+                                <h2>Social Welfare Complex, Sector D-1, Near Umar Chowk, Town Ship, Lahore</h2>
+                                <h2>Admission Registration Form</h2>
+                            </div>
+                            <div class="photo-box">
+                                ${photoUrl ? `<img src="${photoUrl}" alt="Student Photo" onerror="this.parentNode.innerHTML='Passport Size Photo';" />` : 'Passport Size Photo'}
+                            </div>
+                            <div class="section-title">Personal Information</div>
+                            <table>
+                                <tr><th>Student Name</th><td>${admission.student_name || 'N/A'}</td></tr>
+                                <tr><th>Gender</th><td>${admission.gender || 'N/A'}</td></tr>
+                                <tr><th>Age</th><td>${admission.age || 'N/A'}</td></tr>
+                                <tr><th>Phone #</th><td>${admission.phone || 'N/A'}</td></tr>
+                                <tr><th>Date of Birth</th><td>${admission.dob || 'N/A'}</td></tr>
+                                <tr><th>Address</th><td>${admission.address || 'N/A'}</td></tr>
+                                <tr><th>Disability Certificate</th><td>${admission.disability_certificate && admission.disability_certificate !== 'N/A' ? admission.disability_certificate.split('/').pop() : 'None'}</td></tr>
+                                <tr><th>Student CNIC</th><td>${admission.cnic || 'N/A'}</td></tr>
+                                <tr><th>Student Contact No.</th><td>${admission.phone || 'N/A'}</td></tr>
+                                <tr><th>Student Occupation</th><td>${admission.student_occupation || 'None'}</td></tr>
+                            </table>
+                            <div class="section-title">Guardian Information</div>
+                            <table>
+                                <tr><th>Father/Mother Name</th><td>${admission.parent_name || 'N/A'}</td></tr>
+                                <tr><th>Contact Number</th><td>${admission.parent_phone || 'N/A'}</td></tr>
+                                <tr><th>Occupation</th><td>${admission.parent_occupation || 'N/A'}</td></tr>
+                                <tr><th>CNIC Number</th><td>${admission.parent_cnic || 'N/A'}</td></tr>
+                                <tr><th>Number of Siblings</th><td>${admission.num_siblings || 'N/A'}</td></tr>
+                                <tr><th>Disability in Siblings</th><td>${admission.sibling_disability || 'None'}</td></tr>
+                                <tr><th>Guardian Name & Relationship</th><td>${admission.guardian_name || 'N/A'}</td></tr>
+                                <tr><th>Guardian Contact Number</th><td>${admission.guardian_phone || 'N/A'}</td></tr>
+                            </table>
+                            <div class="section-title">Medical History</div>
+                            <table>
+                                <tr><th>Brief Medical History</th><td>${admission.medical_history || 'None'}</td></tr>
+                                <tr><th>Name of Disability</th><td>${admission.disability_name || 'N/A'}</td></tr>
+                                <tr><th>Regular Medication</th><td>${admission.regular_medication || 'None'}</td></tr>
+                                <tr><th>Assistive Device</th><td>${admission.assistive_device || 'None'}</td></tr>
+                                <tr><th>Epilepsy</th><td>${admission.epilepsy || 'Not provided'}</td></tr>
+                                <tr><th>Drug Addiction/Smoking</th><td>${admission.drug_addiction || 'Not provided'}</td></tr>
+                                <tr><th>Accompanied by Assistant</th><td>${admission.assistant || 'Not provided'}</td></tr>
+                                <tr><th>Communicable Disease</th><td>${admission.communicable_disease || 'None'}</td></tr>
+                            </table>
+                            <div class="section-title">Education & Preferences</div>
+                            <table>
+                                <tr><th>Education Level</th><td>${admission.education_level || 'N/A'}</td></tr>
+                                <tr><th>Degree Certificate</th><td>${documents.length > 0 ? '<ul class="documents-list">' + documents.map(doc => `<li>${doc.split('/').pop()}</li>`).join('') + '</ul>' : 'None'}</td></tr>
+                                <tr><th>Course Taken</th><td>${admission.course || 'N/A'}</td></tr>
+                                <tr><th>Admission Type</th><td>${admission.admission_type || 'N/A'}</td></tr>
+                                <tr><th>Duration of Stay</th><td>${admission.duration_stay ? `${admission.duration_stay} month(s)` : 'None'}</td></tr>
+                                <tr><th>Hostel</th><td>${admission.admission_type === 'Hostel Boarder' ? 'Yes' : 'No'}</td></tr>
+                                <tr><th>Pick & Drop Responsibility</th><td>${admission.pick_drop || 'None'}</td></tr>
+                                <tr><th>Attached Affidavit</th><td>${admission.affidavit || 'Not provided'}</td></tr>
+                                <tr><th>Date of Admission</th><td>${admission.admission_date || 'N/A'}</td></tr>
+                            </table>
+                            <div class="signature-section">
+                                <div>
+                                    <p>Signature of Candidate</p>
+                                </div>
+                                <div>
+                                    <p>Prepared by Assistant Director</p>
+                                </div>
+                                <div>
+                                    <p>Approved by Deputy Director</p>
+                                </div>
+                            </div>
+                            <button class="print-btn no-print" onclick="window.print()">Print Application</button>
+                        </div>
+                    </body>
+                    </html>
+                `);
+                printWindow.document.close();
+            } else {
+                console.error('API Error:', data.error || 'No admission data found');
+                alert('Error: ' + (data.error || 'No admission data found'));
+            }
+        },
+        error: function(xhr, status, error) {
+            const errorMsg = xhr.responseJSON && xhr.responseJSON.error ? xhr.responseJSON.error : 'Failed to fetch admission data';
+            console.error('Error fetching admission data:', status, error, xhr.responseText);
+            alert('Error fetching admission data: ' + errorMsg);
+        }
+    });
+}
+
+// Print Affidavit Separately
+function printAffidavit(admissionId) {
+    admissionId = String(admissionId);
+    $.ajax({
+        url: '/api/admission/' + admissionId,
+        method: 'GET',
+        success: function(data) {
+            if (data.success && data.admission && data.admission.affidavit === 'Yes') {
+                const admission = data.admission;
+                const printWindow = window.open('', '_blank');
+                printWindow.document.write(`
+                    <html>
+                    <head>
+                        <title>Affidavit - ${admission.student_name || 'Unknown'}</title>
+                        <style>
+                            body {
+                                font-family: 'Open Sans', sans-serif;
+                                font-size: 11pt;
+                                margin: 20px;
+                                color: #2c3e50;
+                            }
+                            .affidavit-card {
+                                max-width: 900px;
+                                margin: 0 auto;
+                                padding: 30px;
+                                border: 2px solid #009970;
+                                border-radius: 10px;
+                                background: #ffffff;
+                            }
+                            .logos {
+                                display: flex;
+                                justify-content: space-between;
+                                margin-bottom: 20px;
+                            }
+                            .logos img {
+                                max-width: 100px;
+                                height: auto;
+                            }
+                            .header {
+                                text-align: center;
+                                margin-bottom: 20px;
+                                border-bottom: 2px solid #009970;
+                                padding-bottom: 10px;
+                            }
+                            .header h1 {
+                                font-family: 'Poppins', sans-serif;
+                                font-weight: 700;
+                                font-size: 1.8rem;
+                                color: #009970;
+                                margin: 0;
+                            }
+                            .header h2 {
+                                font-family: 'Poppins', sans-serif;
+                                font-weight: 600;
+                                font-size: 1.4rem;
+                                color: #2c3e50;
+                                margin: 5px 0;
+                            }
+                            .affidavit-card h3 {
+                                font-family: 'Poppins', sans-serif;
+                                font-weight: 600;
+                                font-size: 1.6rem;
+                                color: #2c3e50;
+                                text-align: center;
+                                margin-bottom: 20px;
+                                border-bottom: 2px solid #009970;
+                                padding-bottom: 10px;
+                            }
+                            .affidavit-content p, .affidavit-content li {
+                                font-family: 'Open Sans', sans-serif;
+                                font-size: 0.95rem;
+                                color: #2c3e50;
+                                margin-bottom: 10px;
+                            }
+                            .affidavit-content ol {
+                                padding-left: 20px;
+                                margin-bottom: 20px;
+                            }
+                            .signature-section {
+                                display: flex;
+                                justify-content: space-between;
+                                margin-top: 30px;
+                                flex-wrap: wrap;
+                            }
+                            .signature-section div {
+                                width: 30%;
+                                text-align: center;
+                            }
+                            .signature-section p {
+                                border-top: 1px solid #2c3e50;
+                                padding-top: 10px;
+                                margin: 0;
+                            }
+                            .print-btn {
+                                display: block;
+                                margin: 30px auto 0;
+                                padding: 10px 25px;
+                                background: #009970;
+                                color: #ffffff;
+                                border: none;
+                                border-radius: 6px;
+                                font-family: 'Poppins', sans-serif;
+                                font-weight: 500;
+                                cursor: pointer;
+                            }
+                            @media print {
+                                .no-print {
+                                    display: none !important;
+                                }
+                            }
+                        </style>
+                    </head>
+                    <body>
+                        <div class="affidavit-card">
+                            <div class="logos">
+                                <img src="/static/image1.png" alt="Government Logo 1" onerror="this.src='https://via.placeholder.com/100x50?text=Logo+1';" />
+                                <img src="/static/image2.png" alt="Government Logo 2" onerror="this.src='https://via.placeholder.com/100x50?text=Logo+2';" />
+                            </div>
+                            <div class="header">
+                                <h1>Skill Development Center for Persons with Disabilities, Lahore</h1>
+                                <h2>Social Welfare & Bait ul Maal Department Punjab, Lahore</h2>
+                                <h2>Social Welfare Complex, Sector D-1, Near Umar Chowk, Town Ship, Lahore</h2>
+                                <h3>Student Affidavit</h3>
+                            </div>
+                            <div class="affidavit-content">
+                                <p>I <strong>${admission.student_name || 'N/A'}</strong> residing at <strong>${admission.address || 'N/A'}</strong> solemnly affirm and declare as follows:</p>
+                                <ol>
+                                    <li>I am a student currently enrolled at Nasheman for course <strong>${admission.course || 'N/A'}</strong>.</li>
+                                    <li>I have never been involved in any criminal activities.</li>
+                                    <li>I do not have any police record.</li>
+                                    <li>I understand that any involvement in criminal activities or discovery of a police record during my enrollment may result in legal action against me. Additionally, I acknowledge that the institution reserves the right to cancel my admission in such circumstances.</li>
+                                    <li>I understand the importance of maintaining a clean record and commit to continue abiding by the law.</li>
+                                    <li>I affirm that the information provided in this affidavit is true and correct to the best of my knowledge.</li>
+                                </ol>
+                                <p><strong>Date:</strong> ${admission.admission_date || 'N/A'}</p>
+                                <p><strong>Agreement:</strong> Agreed</p>
+                            </div>
+                            <div class="signature-section">
+                                <div>
+                                    <p>Student's Signature</p>
+                                </div>
+                                <div>
+                                    <p>Parent's Signature</p>
+                                </div>
+                                <div>
+                                    <p>Signature of Assistant Director</p>
+                                </div>
+                            </div>
+                            <button class="print-btn no-print" onclick="window.print()">Print Affidavit</button>
+                        </div>
+                    </body>
+                    </html>
+                `);
+                printWindow.document.close();
+            } else {
+                console.error('API Error:', data.error || 'No admission data found or no affidavit');
+                alert('Error: ' + (data.error || 'No affidavit available for this admission'));
+            }
+        },
+        error: function(xhr, status, error) {
+            const errorMsg = xhr.responseJSON && xhr.responseJSON.error ? xhr.responseJSON.error : 'Failed to fetch affidavit data';
+            console.error('Error fetching affidavit data:', status, error, xhr.responseText);
+            alert('Error fetching affidavit data: ' + errorMsg);
+        }
+    });
+}
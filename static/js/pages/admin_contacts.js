@@ -0,0 +1,106 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Marks or deletes the given IDs in one request; resolves with the response JSON
+    function contactsRequest(action, ids) {
+        const url = action === 'delete' ? '/api/contacts/delete' : '/api/contacts/mark';
+        const body = action === 'delete' ? { ids: ids } : { ids: ids, read: action === 'read' };
+        return fetch(url, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify(body)
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) {
+                throw new Error(data.error);
+            }
+            return data;
+        });
+    }
+
+    // Reflects a mark/delete in the rows without reloading the page
+    function applyToRows(action, ids) {
+        ids.forEach(id => {
+            const row = document.querySelector(`tr[data-id="${id}"]`);
+            if (!row) {
+                return;
+            }
+            if (action === 'delete') {
+                row.remove();
+                return;
+            }
+            const isRead = action === 'read';
+            const button = row.querySelector('.mark-read');
+            row.classList.toggle('unread', !isRead);
+            button.textContent = isRead ? 'Mark as Unread' : 'Mark as Read';
+            button.setAttribute('data-read', isRead ? '1' : '0');
+        });
+    }
+
+    // Mark as Read/Unread
+    document.querySelectorAll('.mark-read').forEach(button => {
+        button.addEventListener('click', function() {
+            const contactId = this.getAttribute('data-id');
+            const action = this.getAttribute('data-read') === '1' ? 'unread' : 'read';
+            contactsRequest(action, [contactId])
+                .then(() => applyToRows(action, [contactId]))
+                .catch(error => {
+                    alert('Error: ' + error.message);
+                });
+        });
+    });
+
+    // Delete Contact
+    document.querySelectorAll('.delete-contact').forEach(button => {
+        button.addEventListener('click', function() {
+            if (confirm('Are you sure you want to delete this message?')) {
+                const contactId = this.getAttribute('data-id');
+                contactsRequest('delete', [contactId])
+                    .then(() => applyToRows('delete', [contactId]))
+                    .catch(error => {
+                        alert('Error: ' + error.message);
+                    });
+            }
+        });
+    });
+
+    // Select all checkboxes on this page
+    const selectAllCheckbox = document.getElementById('selectAll');
+    if (selectAllCheckbox) {
+        selectAllCheckbox.addEventListener('change', function() {
+            document.querySelectorAll('.contact-checkbox').forEach(checkbox => {
+                checkbox.checked = selectAllCheckbox.checked;
+            });
+        });
+    }
+
+    // Bulk actions on the selected messages
+    document.querySelectorAll('.bulk-action').forEach(button => {
+        button.addEventListener('click', function() {
+            const action = this.getAttribute('data-action');
+            const ids = Array.from(document.querySelectorAll('.contact-checkbox:checked')).map(checkbox => checkbox.value);
+            if (ids.length === 0) {
+                alert('Please select at least one message.');
+                return;
+            }
+            if (action === 'delete' && !confirm(`Are you sure you want to delete ${ids.length} message(s)? This action cannot be undone.`)) {
+                return;
+            }
+            contactsRequest(action, ids)
+                .then(data => {
+                    applyToRows(action, ids);
+                    if (selectAllCheckbox) {
+                        selectAllCheckbox.checked = false;
+                    }
+                    document.querySelectorAll('.contact-checkbox:checked').forEach(checkbox => {
+                        checkbox.checked = false;
+                    });
+                    alert(data.message);
+                })
+                .catch(error => {
+                    alert('Error: ' + error.message);
+                });
+        });
+    });
+});
@@ -0,0 +1,110 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Fetch data for Courses and Events Bar Chart
+    $.ajax({
+        url: document.getElementById('coursesEventsChart').dataset.src,
+        method: 'GET',
+        success: function(data) {
+            console.log('Courses/Events API response:', data); // Debug log
+            if (data.success) {
+                const ctxBar = document.getElementById('coursesEventsChart').getContext('2d');
+                new Chart(ctxBar, {
+                    type: 'bar',
+                    data: {
+                        labels: data.months || ['Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul'],
+                        datasets: [
+                            {
+                                label: 'Courses Added',
+                                data: data.courses,
+                                backgroundColor: 'rgba(76, 175, 80, 0.6)',
+                                borderColor: 'rgba(76, 175, 80, 1)',
+                                borderWidth: 1
+                            },
+                            {
+                                label: 'Events Created',
+                                data: data.events,
+                                backgroundColor: 'rgba(139, 195, 74, 0.6)',
+                                borderColor: 'rgba(139, 195, 74, 1)',
+                                borderWidth: 1
+                            }
+                        ]
+                    },
+                    options: {
+                        responsive: true,
+                        scales: {
+                            y: {
+                                beginAtZero: true
+                            }
+                        }
+                    }
+                });
+            } else {
+                console.error('Error fetching courses and events data:', data.error);
+                const ctxBar = document.getElementById('coursesEventsChart').getContext('2d');
+                ctxBar.font = '16px Arial';
+                ctxBar.fillStyle = 'red';
+                ctxBar.textAlign = 'center';
+                ctxBar.fillText('Error loading data: ' + data.error, ctxBar.canvas.width / 2, ctxBar.canvas.height / 2);
+            }
+        },
+        error: function(xhr, status, error) {
+            console.error('Error fetching courses and events data:', error);
+            const ctxBar = document.getElementById('coursesEventsChart').getContext('2d');
+            ctxBar.font = '16px Arial';
+            ctxBar.fillStyle = 'red';
+            ctxBar.textAlign = 'center';
+            ctxBar.fillText('Error loading data', ctxBar.canvas.width / 2, ctxBar.canvas.height / 2);
+        }
+    });
+
+    // Fetch data for Activity Pie Chart
+    $.ajax({
+        url: document.getElementById('activityPieChart').dataset.src,
+        method: 'GET',
+        success: function(data) {
+            const ctxPie = document.getElementById('activityPieChart').getContext('2d');
+            new Chart(ctxPie, {
+                type: 'pie',
+                data: {
+                    labels: ['Courses', 'Events', 'Staff', 'Messages', 'Admissions'],
+                    datasets: [{
+                        data: [
+                            data.courses,
+                            data.events,
+                            data.staff,
+                            data.contacts,
+                            data.admissions
+                        ],
+                        backgroundColor: [
+                            'rgba(76, 175, 80, 0.8)',
+                            'rgba(139, 195, 74, 0.8)',
+                            'rgba(205, 220, 57, 0.8)',
+                            'rgba(104, 159, 56, 0.8)',
+                            'rgba(174, 213, 129, 0.8)'
+                        ],
+                        borderColor: [
+                            'rgba(76, 175, 80, 1)',
+                            'rgba(139, 195, 74, 1)',
+                            'rgba(205, 220, 57, 1)',
+                            'rgba(104, 159, 56, 1)',
+                            'rgba(174, 213, 129, 1)'
+                        ],
+                        borderWidth: 1
+                    }]
+                },
+                options: {
+                    responsive: true,
+                    maintainAspectRatio: false,
+                    aspectRatio: 1.2
+                }
+            });
+        },
+        error: function(xhr, status, error) {
+            console.error('Error fetching activity breakdown data:', error);
+            const ctxPie = document.getElementById('activityPieChart').getContext('2d');
+            ctxPie.font = '16px Arial';
+            ctxPie.fillStyle = 'red';
+            ctxPie.textAlign = 'center';
+            ctxPie.fillText('Error loading data', ctxPie.canvas.width / 2, ctxPie.canvas.height / 2);
+        }
+    });
+});
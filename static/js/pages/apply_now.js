@@ -0,0 +1,480 @@
+$(document).ready(function() {
+    let currentStep = 1;
+    let totalSteps = 5; // Default to 5 steps (no affidavit)
+    const $steps = $('.step');
+    const $progressBar = $('#progressBar');
+    const $submitButton = $('#submitApplication');
+    const $stepIcons = $('.step-icon');
+    let affidavitRequired = false;
+    let photoDataUrl = ''; // Store photo data URL
+
+    // Ensure submit button exists
+    if ($submitButton.length === 0) {
+        console.error('Submit button (#submitApplication) not found in DOM');
+        alert('Error: Submit button not found in the form. Please check the HTML.');
+    } else {
+        console.log('Submit button found:', $submitButton);
+    }
+
+    // Function to format CNIC
+    window.formatCNIC = function(input) {
+        let value = input.value.replace(/[^0-9]/g, '');
+        if (value.length > 13) value = value.slice(0, 13);
+        let formatted = '';
+        if (value.length > 0) formatted = value.slice(0, 5);
+        if (value.length > 5) formatted += '-' + value.slice(5, 12);
+        if (value.length > 12) formatted += '-' + value.slice(12, 13);
+        input.value = formatted;
+        validateStep(currentStep);
+    };
+
+    // Function to calculate age based on DOB
+    window.calculateAge = function() {
+        const dob = new Date($('#dob').val());
+        const today = new Date();
+        if (isNaN(dob) || dob > today) {
+            $('#age').val('');
+            $('#ageError').text('Date of birth cannot be in the future.').addClass('show');
+            return;
+        }
+        let age = today.getFullYear() - dob.getFullYear();
+        const monthDiff = today.getMonth() - dob.getMonth();
+        if (monthDiff < 0 || (monthDiff === 0 && today.getDate() < dob.getDate())) {
+            age--;
+        }
+        $('#age').val(age >= 1 && age <= 120 ? age : '');
+        validateStep(1);
+    };
+
+    // Photo preview and update
+    $('#photo').on('change', function() {
+        const file = this.files[0];
+        const $preview = $('#photoPreview');
+        const $error = $('#photoError');
+        photoDataUrl = ''; // Reset photo data URL
+        if (file) {
+            const maxSize = 5 * 1024 * 1024;
+            const allowedTypes = ['image/png', 'image/jpeg', 'image/jpg'];
+            if (!allowedTypes.includes(file.type)) {
+                $error.text('Invalid file type. Only PNG, JPG, JPEG allowed.').addClass('show');
+                $preview.hide().attr('src', '');
+                this.value = '';
+                $('#reviewPhotoContainer').addClass('no-photo');
+                $('#reviewPhoto').attr('src', '').hide();
+                console.log('Photo validation failed: Invalid file type');
+                return;
+            }
+            if (file.size > maxSize) {
+                $error.text('File size exceeds 5MB.').addClass('show');
+                $preview.hide().attr('src', '');
+                this.value = '';
+                $('#reviewPhotoContainer').addClass('no-photo');
+                $('#reviewPhoto').attr('src', '').hide();
+                console.log('Photo validation failed: File size exceeds 5MB');
+                return;
+            }
+            const reader = new FileReader();
+            reader.onload = function(e) {
+                photoDataUrl = e.target.result;
+                $preview.attr('src', photoDataUrl).show();
+                $error.text('').removeClass('show');
+                $('#reviewPhoto').attr('src', photoDataUrl).show();
+                $('#reviewPhotoContainer').removeClass('no-photo');
+                console.log('Photo preview set successfully:', photoDataUrl.substring(0, 50) + '...');
+                if (currentStep === 6) updateSummary();
+            };
+            reader.onerror = function() {
+                $error.text('Error reading photo file.').addClass('show');
+                $preview.hide().attr('src', '');
+                $('#reviewPhotoContainer').addClass('no-photo');
+                $('#reviewPhoto').attr('src', '').hide();
+                console.error('FileReader error for photo');
+            };
+            reader.readAsDataURL(file);
+        } else {
+            $preview.hide().attr('src', '');
+            $error.text('Please upload a photo.').addClass('show');
+            $('#reviewPhotoContainer').addClass('no-photo');
+            $('#reviewPhoto').attr('src', '').hide();
+            console.log('No photo selected');
+        }
+        validateStep(1);
+    });
+
+    // Documents validation
+    $('#documents').on('change', function() {
+        const files = this.files;
+        const $error = $('#documentsError');
+        if (files.length === 0) {
+            $error.text('Please upload at least one degree certificate.').addClass('show');
+            validateStep(4);
+            return;
+        }
+        const maxSize = 5 * 1024 * 1024;
+        const allowedTypes = ['application/pdf', 'application/msword', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document', 'image/png', 'image/jpeg', 'image/jpg'];
+        for (let file of files) {
+            if (!allowedTypes.includes(file.type)) {
+                $error.text('Invalid file type. Only PDF, DOC, DOCX, PNG, JPG, JPEG allowed.').addClass('show');
+                this.value = '';
+                validateStep(4);
+                return;
+            }
+            if (file.size > maxSize) {
+                $error.text('File size exceeds 5MB.').addClass('show');
+                this.value = '';
+                validateStep(4);
+                return;
+            }
+        }
+        $error.text('').removeClass('show');
+        validateStep(4);
+    });
+
+    // Show step function
+    function showStep(step) {
+        console.log('Showing step:', step, 'Affidavit required:', affidavitRequired, 'Total steps:', totalSteps);
+        if (step === 5 && !affidavitRequired) {
+            step = 6; // Skip Step 5 if affidavit is not required
+        }
+        currentStep = step;
+        $steps.removeClass('active').filter(`[data-step="${step}"]`).addClass('active');
+        $stepIcons.removeClass('active').filter(`[data-step="${step}"]`).addClass('active');
+        const progress = ((step - 1) / 5) * 100; // Always 6 steps for progress bar
+        $progressBar.css('width', `${progress}%`);
+        $('.prev-step').toggle(step !== 1);
+        $('.next-step').toggle(step < 6);
+
+        // Force submit button visibility on Step 6
+        if (step === 6) {
+            $submitButton.addClass('show').prop('disabled', false);
+            console.log('Submit button forced to show on Step 6');
+        } else {
+            $submitButton.removeClass('show');
+        }
+
+        if (step === 5 || step === 6) {
+            updateSummary();
+        }
+        validateStep(step);
+        console.log('Submit button state:', $submitButton.is(':visible') ? 'Visible' : 'Hidden', 'Disabled:', $submitButton.prop('disabled'));
+    }
+
+    // Update summary
+    function updateSummary() {
+        console.log('Updating summary for step', currentStep);
+        $('#reviewStudentName').text($('#studentName').val() || 'Not provided');
+        $('#reviewGender').text($('#gender').val() === 'M' ? 'Male' : $('#gender').val() === 'F' ? 'Female' : 'Not provided');
+        $('#reviewAge').text($('#age').val() || 'Not provided');
+        $('#reviewPhone').text($('#phone').val() || 'Not provided');
+        $('#reviewDob').text($('#dob').val() || 'Not provided');
+        $('#reviewAddress').text($('#address').val() || 'Not provided');
+        $('#reviewCnic').text($('#cnic').val() || 'Not provided');
+        $('#reviewStudentOccupation').text($('#studentOccupation').val() || 'Not provided');
+        $('#reviewParentName').text($('#parentName').val() || 'Not provided');
+        $('#reviewParentCnic').text($('#parentCnic').val() || 'Not provided');
+        $('#reviewParentPhone').text($('#parentPhone').val() || 'Not provided');
+        $('#reviewParentOccupation').text($('#parentOccupation').val() || 'Not provided');
+        $('#reviewNumSiblings').text($('#numSiblings').val() || 'Not provided');
+        $('#reviewSiblingDisability').text($('#siblingDisability').val() || 'None');
+        $('#reviewGuardianName').text($('#guardianName').val() || 'Not provided');
+        $('#reviewGuardianPhone').text($('#guardianPhone').val() || 'Not provided');
+        $('#reviewDisabilityCertificate').text($('#disabilityCertificate')[0].files[0] ? $('#disabilityCertificate')[0].files[0].name : 'Not provided');
+        $('#reviewDisabilityName').text($('#disabilityName').val() || 'Not provided');
+        $('#reviewMedicalHistory').text($('#medicalHistory').val() || 'None');
+        $('#reviewRegularMedication').text($('#regularMedication').val() || 'None');
+        $('#reviewAssistiveDevice').text($('#assistiveDevice').val() || 'None');
+        $('#reviewEpilepsy').text($('#epilepsy').val() || 'Not provided');
+        $('#reviewDrugAddiction').text($('#drugAddiction').val() || 'Not provided');
+        $('#reviewAssistant').text($('#assistant').val() || 'Not provided');
+        $('#reviewCommunicableDisease').text($('#communicableDisease').val() || 'None');
+        $('#reviewEducationLevel').text($('#educationLevel').val() || 'Not provided');
+        $('#reviewDocuments').text($('#documents')[0].files[0] ? Array.from($('#documents')[0].files).map(file => file.name).join(', ') : 'Not provided');
+        $('#reviewCourse').text($('#course').val() || 'Not provided');
+        $('#reviewAdmissionType').text($('#admissionType').val() || 'Not provided');
+        $('#reviewDurationStay').text($('#durationStay').val() ? `${$('#durationStay').val()} months` : 'None');
+        $('#reviewPickDrop').text($('#pickDrop').val() || 'None');
+        $('#reviewAffidavit').text($('#affidavit').val() || 'Not provided');
+        $('#reviewAdmissionDate').text($('#admissionDate').val() || 'Not provided');
+
+        // Photo in summary
+        if (photoDataUrl) {
+            $('#reviewPhoto').attr('src', photoDataUrl).show();
+            $('#reviewPhotoContainer').removeClass('no-photo');
+            console.log('Summary photo set from cached data:', photoDataUrl.substring(0, 50) + '...');
+        } else {
+            $('#reviewPhoto').attr('src', '').hide();
+            $('#reviewPhotoContainer').addClass('no-photo');
+            console.log('No photo available for summary');
+        }
+
+        // Affidavit section
+        if (affidavitRequired) {
+            $('#reviewAffidavitSection').show();
+            $('#affidavitName').text($('#studentName').val() || 'Not provided');
+            $('#affidavitAddress').text($('#address').val() || 'Not provided');
+            $('#affidavitCourse').text($('#course').val() || 'Not provided');
+            $('#reviewAffidavitName').text($('#affidavitName').text());
+            $('#reviewAffidavitAddress').text($('#affidavitAddress').text());
+            $('#reviewAffidavitCourse').text($('#affidavitCourse').text());
+            $('#reviewAffidavitDate').text($('#affidavitDate').val() || 'Not provided');
+        } else {
+            $('#reviewAffidavitSection').hide();
+        }
+    }
+
+    // Handle affidavit toggle
+    $('#affidavit').on('change', function() {
+        affidavitRequired = $(this).val() === 'Yes';
+        console.log('Affidavit changed to:', $(this).val(), 'Affidavit required:', affidavitRequired);
+        if (affidavitRequired) {
+            $('.step-icon[data-step="5"]').show();
+            $steps.filter('[data-step="5"]').css('display', '');
+            totalSteps = 6;
+        } else {
+            $('.step-icon[data-step="5"]').hide();
+            $steps.filter('[data-step="5"]').hide();
+            totalSteps = 5;
+        }
+        if (currentStep === 6) updateSummary();
+        validateStep(currentStep);
+    }).trigger('change');
+
+    // Validate step
+    function validateStep(step) {
+        let isValid = true;
+        console.log('Validating step:', step);
+
+        if (step === 5 && !affidavitRequired) {
+            return true; // Skip validation for Step 5 if affidavit not required
+        }
+
+        $(`.step[data-step="${step}"] .form-control[required], .step[data-step="${step}"] .form-control-file[required]`).each(function() {
+            const $input = $(this);
+            const $error = $(`#${$input.attr('id')}Error`);
+
+            if ($input.attr('id') === 'affidavitAgreement' && !affidavitRequired) {
+                $error.text('').removeClass('show');
+                return true;
+            }
+
+            if ($input.attr('type') === 'file' && $input.attr('id') === 'photo' && step === 1) {
+                if ($input[0].files.length === 0) {
+                    isValid = false;
+                    $error.text('Please upload a photo.').addClass('show');
+                } else {
+                    const maxSize = 5 * 1024 * 1024;
+                    const allowedTypes = ['image/png', 'image/jpeg', 'image/jpg'];
+                    const file = $input[0].files[0];
+                    if (!allowedTypes.includes(file.type)) {
+                        isValid = false;
+                        $error.text('Invalid file type. Only PNG, JPG, JPEG allowed.').addClass('show');
+                    } else if (file.size > maxSize) {
+                        isValid = false;
+                        $error.text('File size exceeds 5MB.').addClass('show');
+                    } else {
+                        $error.text('').removeClass('show');
+                    }
+                }
+            } else if ($input.attr('type') === 'file' && $input.attr('id') === 'documents' && step === 4) {
+                if ($input[0].files.length === 0) {
+                    isValid = false;
+                    $error.text('Please upload at least one degree certificate.').addClass('show');
+                } else {
+                    const maxSize = 5 * 1024 * 1024;
+                    const allowedTypes = ['application/pdf', 'application/msword', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document', 'image/png', 'image/jpeg', 'image/jpg'];
+                    for (let file of $input[0].files) {
+                        if (!allowedTypes.includes(file.type)) {
+                            isValid = false;
+                            $error.text('Invalid file type. Only PDF, DOC, DOCX, PNG, JPG, JPEG allowed.').addClass('show');
+                            return;
+                        }
+                        if (file.size > maxSize) {
+                            isValid = false;
+                            $error.text('File size exceeds 5MB.').addClass('show');
+                            return;
+                        }
+                    }
+                    $error.text('').removeClass('show');
+                }
+            } else if (!$input.val().trim() && $input.attr('required')) {
+                isValid = false;
+                $error.text('This field is required.').addClass('show');
+            } else if ($input.attr('id') === 'cnic' && !/^\d{5}-\d{7}-\d{1}$/.test($input.val()) && step === 1) {
+                isValid = false;
+                $error.text('CNIC must be in the format 12345-1234567-1.').addClass('show');
+            } else if ($input.attr('id') === 'parentCnic' && !/^\d{5}-\d{7}-\d{1}$/.test($input.val()) && step === 2) {
+                isValid = false;
+                $error.text('CNIC must be in the format 12345-1234567-1.').addClass('show');
+            } else if (($input.attr('id') === 'phone' || $input.attr('id') === 'parentPhone' || $input.attr('id') === 'guardianPhone') && !/^\+92[0-9]{10}$/.test($input.val())) {
+                isValid = false;
+                $error.text('Phone must be in the format +923123456789.').addClass('show');
+            } else if ($input.attr('id') === 'age' && ($input.val() < 1 || $input.val() > 120) && step === 1) {
+                isValid = false;
+                $error.text('Age must be between 1 and 120.').addClass('show');
+            } else if ($input.attr('type') === 'date' && $input.attr('max') && new Date($input.val()) > new Date($input.attr('max'))) {
+                isValid = false;
+                $error.text('Date cannot be in the future.').addClass('show');
+            } else if ($input.attr('id') === 'affidavitAgreement' && $input.attr('required') && !$input.is(':checked') && step === 5) {
+                isValid = false;
+                $error.text('You must agree to the affidavit terms.').addClass('show');
+            } else {
+                $error.text('').removeClass('show');
+            }
+        });
+
+        console.log('Validation result for step', step, ':', isValid);
+        $('.next-step').prop('disabled', !isValid);
+        if (step === 6) {
+            const requiredSteps = affidavitRequired ? [1, 2, 3, 4, 5] : [1, 2, 3, 4];
+            let allStepsValid = true;
+            requiredSteps.forEach(s => {
+                if (!validateStep(s)) {
+                    allStepsValid = false;
+                }
+            });
+            $submitButton.prop('disabled', !allStepsValid);
+            console.log('Submit button state:', $submitButton.is(':visible') ? 'Visible' : 'Hidden', 'Disabled:', $submitButton.prop('disabled'));
+        }
+        return isValid;
+    }
+
+    // Next step
+    $('.next-step').click(function() {
+        if (validateStep(currentStep)) {
+            if (currentStep === 4 && !affidavitRequired) {
+                currentStep = 6;
+            } else {
+                currentStep++;
+            }
+            if (currentStep > 6) currentStep = 6;
+            console.log('Moving to step:', currentStep);
+            showStep(currentStep);
+        } else {
+            console.log('Validation failed on step:', currentStep);
+            alert('Please fill all required fields correctly.');
+        }
+    });
+
+    // Previous step
+    $('.prev-step').click(function() {
+        if (currentStep === 6 && !affidavitRequired) {
+            currentStep = 4;
+        } else {
+            currentStep--;
+        }
+        if (currentStep < 1) currentStep = 1;
+        console.log('Moving to step:', currentStep);
+        showStep(currentStep);
+    });
+
+    // Form submission
+    $('#applicationForm').on('submit', function(e) {
+        e.preventDefault();
+        console.log('Form submit event triggered, currentStep:', currentStep);
+        if (currentStep !== 6) {
+            alert('Please review your application on the final step before submitting.');
+            currentStep = 6;
+            showStep(currentStep);
+            return;
+        }
+        const requiredSteps = affidavitRequired ? [1, 2, 3, 4, 5] : [1, 2, 3, 4];
+        let isFormValid = true;
+        requiredSteps.forEach(step => {
+            if (!validateStep(step)) {
+                isFormValid = false;
+            }
+        });
+        console.log('Form validation result:', isFormValid);
+        if (isFormValid) {
+            console.log('Submitting form via AJAX');
+            $submitButton.prop('disabled', true).text('Submitting...');
+            const formData = new FormData(this);
+            $.ajax({
+                url: $(this).attr('action'),
+                type: 'POST',
+                data: formData,
+                processData: false,
+                contentType: false,
+                success: function(response) {
+                    console.log('AJAX success:', response);
+                    alert('Application submitted successfully!');
+                    window.location.href = response.redirect || $('#applicationForm').data('redirect');
+                },
+                error: function(xhr, status, error) {
+                    console.error('AJAX error:', status, error, xhr.responseText);
+                    let errorMessage = 'Error submitting application. Please try again.';
+                    try {
+                        const response = JSON.parse(xhr.responseText);
+                        if (response.error) errorMessage = response.error;
+                    } catch (e) {
+                        const match = xhr.responseText.match(/<div class="alert alert-error alert-dismissible fade show" role="alert">(.+?)<button/);
+                        if (match && match[1]) errorMessage = match[1].trim();
+                    }
+                    alert(errorMessage);
+                    $submitButton.prop('disabled', false).text('Submit Application');
+                }
+            });
+        } else {
+            alert('Please complete all required fields correctly.');
+            for (let step of requiredSteps) {
+                if (!validateStep(step)) {
+                    currentStep = step;
+                    showStep(currentStep);
+                    break;
+                }
+            }
+        }
+    });
+
+    // Close flash messages
+    document.querySelectorAll('.alert .close').forEach(closeBtn => {
+        closeBtn.addEventListener('click', () => {
+            closeBtn.parentElement.style.display = 'none';
+        });
+    });
+
+    // Phone number formatting
+    $('#phone, #parentPhone, #guardianPhone').on('input', function() {
+        let value = $(this).val().replace(/[^0-9+]/g, '');
+        if (!value.startsWith('+92')) {
+            value = '+92' + value.replace(/^\+92/, '');
+        }
+        let digits = value.replace('+92', '').slice(0, 10);
+        $(this).val('+92' + digits);
+        validateStep(currentStep);
+    }).on('focus', function() {
+        if (!$(this).val()) $(this).val('+92');
+    }).on('blur', function() {
+        if ($(this).val() === '+92') $(this).val('');
+    }).on('keypress', function(e) {
+        const charCode = e.which ? e.which : e.keyCode;
+        if (charCode !== 8 && (charCode < 48 || charCode > 57)) {
+            e.preventDefault();
+        }
+        let currentValue = $(this).val().replace('+92', '');
+        if (currentValue.length >= 10 && charCode !== 8) {
+            e.preventDefault();
+        }
+    });
+
+    // CNIC input restrictions
+    $('#cnic, #parentCnic').on('keypress', function(e) {
+        const charCode = e.which ? e.which : e.keyCode;
+        if (charCode !== 8 && (charCode < 48 || charCode > 57)) {
+            e.preventDefault();
+        }
+        if ($(this).val().length >= 15 && charCode !== 8) {
+            e.preventDefault();
+        }
+    });
+
+    // Input change event
+    $('.form-control[required], .form-control-file[required]').on('input change', function() {
+        validateStep(currentStep);
+        if (currentStep === 6) updateSummary();
+    });
+
+    // Initial display
+    showStep(currentStep);
+    validateStep(currentStep);
+});
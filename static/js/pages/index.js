@@ -0,0 +1,90 @@
+$(document).ready(function() {
+    // Quote Slider
+    $('.quotes').slick({
+        autoplay: true,
+        autoplaySpeed: 4000,
+        arrows: false,
+        fade: true,
+        speed: 1000
+    });
+    // Testimonial Slider
+    var swiper = new Swiper(".mySwiper", {
+        slidesPerView: 1,
+        loop: true,
+        autoplay: {
+            delay: 6000,
+            disableOnInteraction: false
+        },
+        speed: 1000,
+        breakpoints: {
+            768: {
+                slidesPerView: 2,
+                spaceBetween: 20
+            },
+            1024: {
+                slidesPerView: 3,
+                spaceBetween: 30
+            }
+        }
+    });
+    // Popup Modal: the active set is inlined as data-popups, or fetched when inlining is off.
+    // Dismissed popups are remembered per visitor in localStorage and not shown again.
+    const $popupModal = $('#popupModal');
+    function loadDismissed() {
+        try {
+            return JSON.parse(localStorage.getItem('dismissedPopups') || '[]');
+        } catch (e) {
+            return [];
+        }
+    }
+    function saveDismissed(ids) {
+        try {
+            localStorage.setItem('dismissedPopups', JSON.stringify(ids));
+        } catch (e) {
+            // Storage disabled (private mode); popups just show again next visit
+        }
+    }
+    function showPopups(popups) {
+        const activeIds = popups.map(popup => popup.id);
+        // Forget popups that are no longer active so the list cannot grow forever
+        const dismissed = loadDismissed().filter(id => activeIds.includes(id));
+        saveDismissed(dismissed);
+        const pending = popups.filter(popup => !dismissed.includes(popup.id));
+        let index = 0;
+        function showPopup() {
+            if (index >= pending.length) return;
+            const popup = pending[index];
+            $('#popupModalLabel').text(popup.title || 'Notification');
+            $('#popupMessage').text(popup.message);
+            if (popup.image_url) {
+                $('#popupImage').attr('src', $popupModal.data('static-root') + popup.image_url)
+                    .attr('srcset', popup.image_srcset || null).attr('sizes', popup.image_srcset ? '500px' : null).show();
+            } else {
+                $('#popupImage').hide();
+            }
+            $('#popupModal .modal-header').removeClass('info warning event').addClass(popup.type || 'info');
+            $popupModal.modal({ backdrop: 'static', keyboard: false });
+            $popupModal.modal('show');
+            $popupModal.on('hidden.bs.modal', function() {
+                $(this).off('hidden.bs.modal');
+                dismissed.push(popup.id);
+                saveDismissed(dismissed);
+                index++;
+                showPopup();
+            });
+        }
+        showPopup();
+    }
+    const inlinePopups = $popupModal.data('popups');
+    if (inlinePopups) {
+        showPopups(inlinePopups);
+    } else {
+        $.get($popupModal.data('src'), function(data) {
+            if (data.popups && data.popups.length > 0) {
+                showPopups(data.popups);
+            }
+        }).fail(function(jqXHR, textStatus, errorThrown) {
+            console.error('Error fetching popups:', textStatus, errorThrown);
+        });
+    }
+});
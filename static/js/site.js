@@ -0,0 +1,41 @@
+// Behaviour shared by every page; page-specific code lives in js/pages/
+document.addEventListener('DOMContentLoaded', function() {
+    // Rotate motivational quotes: <div id="quote" data-quotes='[...]' data-interval="2500">
+    const quoteElement = document.getElementById('quote');
+    if (quoteElement && quoteElement.dataset.quotes) {
+        const quotes = JSON.parse(quoteElement.dataset.quotes);
+        let quoteIndex = 0;
+        function rotateQuote() {
+            quoteElement.style.opacity = '0'; // Fade out
+            setTimeout(() => {
+                quoteElement.textContent = quotes[quoteIndex];
+                quoteElement.classList.add('fade');
+                quoteElement.style.opacity = '1'; // Fade in
+                setTimeout(() => {
+                    quoteElement.classList.remove('fade');
+                }, 500); // Match animation duration
+                quoteIndex = (quoteIndex + 1) % quotes.length;
+            }, 500); // Match transition duration
+        }
+        rotateQuote();
+        setInterval(rotateQuote, parseInt(quoteElement.dataset.interval || '2500', 10));
+    }
+
+    // Admin sidebar toggle
+    const toggleBtn = document.getElementById('toggleBtn');
+    const sidebar = document.getElementById('sidebar');
+    const mainContent = document.getElementById('mainContent');
+    if (toggleBtn && sidebar && mainContent) {
+        toggleBtn.addEventListener('click', () => {
+            sidebar.classList.toggle('active');
+            mainContent.classList.toggle('active');
+        });
+    }
+
+    // Close flash messages
+    document.querySelectorAll('.flash-message .close').forEach(closeBtn => {
+        closeBtn.addEventListener('click', () => {
+            closeBtn.parentElement.style.display = 'none';
+        });
+    });
+});
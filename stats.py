@@ -0,0 +1,51 @@
+import logging
+import os
+
+# Seconds between full recounts that correct any drift in the maintained counters
+RECONCILE_INTERVAL = int(os.environ.get('STATS_RECONCILE_INTERVAL', 3600))
+
+# Counter name -> query producing its true value, used by reconcile()
+ENTITY_COUNTS = {
+    'courses': "SELECT COUNT(*) FROM courses",
+    'staff': "SELECT COUNT(*) FROM staff",
+    'students': "SELECT COUNT(*) FROM students",
+    'events': "SELECT COUNT(*) FROM events",
+    'contacts': "SELECT COUNT(*) FROM contacts",
+    'unread_contacts': "SELECT COUNT(*) FROM contacts WHERE is_read = FALSE",
+    'admissions': "SELECT COUNT(*) FROM admissions",
+}
+
+CREATE_TABLE = '''CREATE TABLE IF NOT EXISTS entity_counts
+                  (name VARCHAR(50) PRIMARY KEY,
+                   count INT NOT NULL DEFAULT 0,
+                   reconciled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)'''
+
+
+def adjust(cursor, name, delta):
+    # Call inside the same transaction as the INSERT/DELETE it accounts for
+    if delta:
+        cursor.execute("UPDATE entity_counts SET count = count + %s WHERE name = %s", (delta, name))
+
+
+def reconcile(cursor):
+    # Recount every entity in one statement and overwrite the maintained values
+    selects = " UNION ALL ".join(
+        f"SELECT '{name}', ({query}), NOW()" for name, query in ENTITY_COUNTS.items())
+    cursor.execute(f"""INSERT INTO entity_counts (name, count, reconciled_at) {selects}
+                       ON DUPLICATE KEY UPDATE count = VALUES(count), reconciled_at = VALUES(reconciled_at)""")
+    logging.info("Entity counters reconciled")
+
+
+def read_counts(cursor, conn):
+    # One round-trip; reconciles first when the table is empty or the last recount is stale
+    cursor.execute("""SELECT name, count,
+                             TIMESTAMPDIFF(SECOND, reconciled_at, NOW()) >= %s AS stale
+                      FROM entity_counts""", (RECONCILE_INTERVAL,))
+    rows = cursor.fetchall()
+    names = {row[0] for row in rows}
+    if any(row[2] for row in rows) or not set(ENTITY_COUNTS) <= names:
+        reconcile(cursor)
+        conn.commit()
+        cursor.execute("SELECT name, count, 0 FROM entity_counts")
+        rows = cursor.fetchall()
+    return {row[0]: int(row[1]) for row in rows if row[0] in ENTITY_COUNTS}
@@ -0,0 +1,138 @@
+from werkzeug.utils import secure_filename
+import hashlib
+import logging
+import os
+import shutil
+import uuid
+
+CHUNK_SIZE = 64 * 1024
+
+# One row per stored file. Every database column that holds an upload path owns one
+# reference; the file is deleted when the last reference is released.
+CREATE_TABLE = '''CREATE TABLE IF NOT EXISTS upload_blobs
+                  (path VARCHAR(255) PRIMARY KEY,
+                   sha256 CHAR(64),
+                   size_bytes BIGINT,
+                   refcount INT NOT NULL DEFAULT 0,
+                   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)'''
+
+_config = {'static_root': None, 'staging_dir': None}
+
+
+def init_app(app):
+    _config['static_root'] = app.static_folder
+    _config['staging_dir'] = app.config['UPLOAD_STAGING_FOLDER']
+    os.makedirs(_config['staging_dir'], exist_ok=True)
+
+
+def full_path(path):
+    return os.path.join(_config['static_root'], path)
+
+
+def blob_path(folder, digest, filename):
+    # Same bytes -> same path, so duplicate uploads share one file and can't collide
+    ext = os.path.splitext(secure_filename(filename))[1].lower()
+    return f"Uploads/{folder}/{digest[:2]}/{digest}{ext}"
+
+
+def spool(file):
+    # Streams an upload into the staging area, hashing as it goes; returns (staged path, sha256, size)
+    staged = os.path.join(_config['staging_dir'], f"{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    size = 0
+    with open(staged, 'wb') as out:
+        while True:
+            chunk = file.stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+            out.write(chunk)
+    return staged, digest.hexdigest(), size
+
+
+def acquire(cursor, path, digest=None, size=None):
+    cursor.execute("""INSERT INTO upload_blobs (path, sha256, size_bytes, refcount) VALUES (%s, %s, %s, 1)
+                      ON DUPLICATE KEY UPDATE refcount = refcount + 1""", (path, digest, size))
+
+
+def place(staged, path):
+    # Moves a staged file to its blob path, or drops it if that content is already stored.
+    # Call after acquire(): the reference row lock keeps a concurrent release from
+    # deleting the blob in between.
+    final = full_path(path)
+    if os.path.exists(final):
+        os.remove(staged)
+        logging.debug(f"Reused stored upload {path}")
+        return
+    os.makedirs(os.path.dirname(final), exist_ok=True)
+    shutil.move(staged, final)
+
+
+def save(cursor, file, folder):
+    # Stores a request upload and takes one reference to it; returns the path to keep in the row
+    staged, digest, size = spool(file)
+    try:
+        path = blob_path(folder, digest, file.filename)
+        acquire(cursor, path, digest, size)
+        place(staged, path)
+    except Exception:
+        if os.path.exists(staged):
+            os.remove(staged)
+        raise
+    return path
+
+
+def release(cursor, path):
+    # Drops one reference in the caller's transaction; returns True if that was the last
+    # one. The file is left in place: call remove() once the transaction has committed,
+    # so a rollback never leaves rows pointing at a deleted file.
+    # Paths the store doesn't know about are left alone.
+    if not path:
+        return False
+    cursor.execute("UPDATE upload_blobs SET refcount = refcount - 1 WHERE path = %s AND refcount > 0", (path,))
+    if cursor.rowcount == 0:
+        return False
+    cursor.execute("DELETE FROM upload_blobs WHERE path = %s AND refcount = 0", (path,))
+    return cursor.rowcount > 0
+
+
+def remove(conn, path):
+    # Deletes a file whose last reference was released in a committed transaction, unless
+    # an upload of the same bytes has taken a new one since. The locking read (a gap lock
+    # once the row is gone) holds a concurrent acquire() back until the file is deleted,
+    # so its place() then moves its own copy in. Returns True if the file was deleted.
+    if not path:
+        return False
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT refcount FROM upload_blobs WHERE path = %s FOR UPDATE", (path,))
+        row = cursor.fetchone()
+        removed = False
+        if row and row[0] > 0:
+            logging.info(f"Kept upload {path}: referenced again since its release")
+        elif os.path.exists(full_path(path)):
+            os.remove(full_path(path))
+            removed = True
+            logging.info(f"Removed unreferenced upload {path}")
+        conn.commit()
+        return removed
+    except Exception as e:
+        conn.rollback()
+        logging.error(f"Removing upload {path} failed: {str(e)}")
+        return False
+    finally:
+        cursor.close()
+
+
+def register_existing(cursor, paths):
+    # One reference per occurrence, for rows written before the store existed
+    counts = {}
+    for path in paths:
+        if path:
+            counts[path] = counts.get(path, 0) + 1
+    if counts:
+        cursor.executemany("""INSERT INTO upload_blobs (path, refcount) VALUES (%s, %s)
+                              ON DUPLICATE KEY UPDATE refcount = refcount + VALUES(refcount)""",
+                           list(counts.items()))
+    return len(counts)
@@ -0,0 +1,38 @@
+from datetime import date
+from decimal import Decimal
+import analytics
+
+
+class FakeCursor:
+    # Returns the queued result sets in order, the way mysql-connector does for SUM() rows
+    def __init__(self, *results):
+        self.results = list(results)
+        self.queries = []
+
+    def execute(self, sql, params=()):
+        self.queries.append((sql, params))
+
+    def fetchall(self):
+        return self.results.pop(0)
+
+
+def test_institute_summary_with_decimal_sums():
+    month = analytics.month_start(date.today())
+    cursor = FakeCursor(
+        [(month, Decimal(40), Decimal(30), Decimal(5))],
+        [(month, 'Math', Decimal(4), Decimal(300)), (month, 'English', Decimal(2), Decimal(120))],
+    )
+    summary = analytics.institute_summary(cursor, months=3)
+    assert summary['attendance'][-1] == {'month': month.strftime('%Y-%m'), 'total': 40, 'present': 30,
+                                         'late': 5, 'rate': 75.0}
+    assert summary['progress']['Math'][-1]['average'] == 75.0
+    assert summary['average_marks'] == [None, None, 70.0]
+    assert summary['trend'] == {'attendance_rate': None, 'average_marks': None}
+
+
+def test_student_summary_rates():
+    month = analytics.month_start(date.today())
+    cursor = FakeCursor([(month, 20, 19, 2)], [(month, 'Math', 2, 150)])
+    summary = analytics.student_summary(cursor, 7, months=1)
+    assert summary['attendance'][0]['rate'] == 95.0
+    assert summary['average_marks'] == [75.0]
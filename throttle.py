@@ -0,0 +1,172 @@
+from collections import OrderedDict, deque
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# Optional SQLite file shared by every gunicorn worker on the host; without it each
+# worker counts on its own (an attacker then gets up to workers x the limits)
+STORE_PATH = os.environ.get('THROTTLE_DB')
+# First lockout once a limit is reached, doubled for every further failure, capped
+BASE_DELAY = float(os.environ.get('THROTTLE_BASE_DELAY', 30))
+MAX_DELAY = float(os.environ.get('THROTTLE_MAX_DELAY', 3600))
+MAX_TRACKED = int(os.environ.get('THROTTLE_MAX_TRACKED', 50000))
+
+# Scope -> key kind -> (attempts allowed, sliding window in seconds). 'login' counts
+# failed sign-ins; 'reset' counts every password-reset request.
+LIMITS = {
+    'login': {'ip': (30, 900), 'email': (5, 900)},
+    'reset': {'ip': (10, 3600), 'email': (3, 3600)},
+}
+
+
+class MemoryStore:
+    # Timestamps per key in this process; the least recently used keys are dropped first
+    name = 'memory'
+
+    def __init__(self, max_keys=MAX_TRACKED):
+        self.max_keys = max_keys
+        self._attempts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, key, now):
+        with self._lock:
+            attempts = self._attempts.pop(key, None) or deque()
+            attempts.append(now)
+            self._attempts[key] = attempts
+            while len(self._attempts) > self.max_keys:
+                self._attempts.popitem(last=False)
+
+    def recent(self, key, since):
+        # (attempts at or after since, time of the latest one)
+        with self._lock:
+            attempts = self._attempts.get(key)
+            if not attempts:
+                return 0, None
+            while attempts and attempts[0] < since:
+                attempts.popleft()
+            return len(attempts), (attempts[-1] if attempts else None)
+
+    def clear(self, key):
+        with self._lock:
+            self._attempts.pop(key, None)
+
+
+class SQLiteStore:
+    # Same interface backed by a SQLite file, so every worker sees every attempt
+    name = 'sqlite'
+    PRUNE_EVERY = 500
+
+    def __init__(self, path, max_age):
+        self.path = path
+        self.max_age = max_age
+        self._local = threading.local()
+        self._adds = 0
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS attempts (key TEXT NOT NULL, at REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_attempts_key_at ON attempts (key, at)")
+
+    def _connect(self):
+        # One connection per thread (and per forked worker, since the pid is checked)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def add(self, key, now):
+        conn = self._connect()
+        conn.execute("INSERT INTO attempts (key, at) VALUES (?, ?)", (key, now))
+        self._adds += 1
+        if self._adds % self.PRUNE_EVERY == 0:
+            conn.execute("DELETE FROM attempts WHERE at < ?", (now - self.max_age,))
+
+    def recent(self, key, since):
+        row = self._connect().execute("SELECT COUNT(*), MAX(at) FROM attempts WHERE key = ? AND at >= ?",
+                                      (key, since)).fetchone()
+        return row[0], row[1]
+
+    def clear(self, key):
+        self._connect().execute("DELETE FROM attempts WHERE key = ?", (key,))
+
+
+def _make_store():
+    if STORE_PATH:
+        try:
+            longest = max(window for kinds in LIMITS.values() for _, window in kinds.values())
+            return SQLiteStore(STORE_PATH, longest)
+        except sqlite3.Error as e:
+            logging.error(f"Throttle store {STORE_PATH} unavailable, counting per worker: {str(e)}")
+    return MemoryStore()
+
+
+_store = _make_store()
+_stats = {}  # (scope, kind) -> attempts rejected
+_stats_lock = threading.Lock()
+
+
+def _keys(scope, ip, email):
+    keys = {'ip': f"{scope}:ip:{ip}"}
+    if email:
+        keys['email'] = f"{scope}:email:{email.strip().lower()}"
+    return keys
+
+
+def _delay(count, limit):
+    return min(BASE_DELAY * 2 ** (count - limit), MAX_DELAY)
+
+
+def retry_after(scope, ip, email=None):
+    # Seconds until this ip/email may try again (0: allowed). Call before any DB work;
+    # rejected attempts are not recorded, so waiting out the delay always helps.
+    now = time.time()
+    wait = 0
+    for kind, key in _keys(scope, ip, email).items():
+        limit, window = LIMITS[scope][kind]
+        try:
+            count, last = _store.recent(key, now - window)
+        except Exception as e:
+            logging.error(f"Throttle check for {key} failed: {str(e)}")
+            continue
+        if count >= limit:
+            remaining = last + _delay(count, limit) - now
+            if remaining > wait:
+                wait = remaining
+                blocked_by = kind
+    if wait > 0:
+        with _stats_lock:
+            _stats[(scope, blocked_by)] = _stats.get((scope, blocked_by), 0) + 1
+        logging.warning(f"Throttled {scope} attempt from {ip} ({blocked_by} limit, {int(wait)}s left)")
+    return int(wait + 0.999)
+
+
+def record(scope, ip, email=None):
+    # Counts one failed login (or one reset request) against the ip and the email
+    now = time.time()
+    for key in _keys(scope, ip, email).values():
+        try:
+            _store.add(key, now)
+        except Exception as e:
+            logging.error(f"Throttle record for {key} failed: {str(e)}")
+
+
+def reset(scope, email):
+    # A successful sign-in clears that account's failures (not the address's)
+    try:
+        _store.clear(_keys(scope, None, email)['email'])
+    except Exception as e:
+        logging.error(f"Throttle reset for {scope} {email} failed: {str(e)}")
+
+
+def describe(seconds):
+    if seconds < 90:
+        return f"{seconds} seconds"
+    return f"{(seconds + 59) // 60} minutes"
+
+
+def stats():
+    with _stats_lock:
+        blocked = {f"{scope}_{kind}": count for (scope, kind), count in _stats.items()}
+    return {'backend': _store.name, 'blocked': blocked, 'blocked_total': sum(blocked.values())}
@@ -0,0 +1,157 @@
+from datetime import datetime, timedelta
+from dateutil.relativedelta import relativedelta
+from cache import catalog_cache
+import os
+import threading
+import time
+
+# Entities that can be charted, mapped to their table (each has a created_at column)
+ENTITIES = {
+    'courses': 'courses',
+    'events': 'events',
+    'admissions': 'admissions',
+    'contacts': 'contacts',
+    'students': 'students',
+}
+
+# Unit -> SQL expression giving the first day of the bucket a row falls into
+BUCKET_SQL = {
+    'day': "DATE(created_at)",
+    'week': "DATE(created_at) - INTERVAL WEEKDAY(created_at) DAY",
+    'month': "DATE(DATE_FORMAT(created_at, '%%Y-%%m-01'))",  # % doubled for parameter substitution
+}
+
+LABEL_FORMATS = {
+    'day': '%Y-%m-%d',
+    'week': '%Y-%m-%d',
+    'month': '%b %Y',
+}
+
+# Clock each table's created_at is written in: app.py stamps courses and events with
+# datetime.utcnow(); the other tables take the database's CURRENT_TIMESTAMP, which is
+# in the connection's time zone. Bucket boundaries are computed in the same clock.
+UTC = 'utc'
+DATABASE = 'database'
+ENTITY_CLOCKS = {
+    'courses': UTC,
+    'events': UTC,
+    'admissions': DATABASE,
+    'contacts': DATABASE,
+    'students': DATABASE,
+}
+# Seconds the database's offset from UTC is reused before it is asked again (DST changes)
+CLOCK_CHECK_INTERVAL = 600
+
+MAX_BUCKETS = 366
+# Seconds a closed bucket's count is trusted; catches deletes made by other workers
+# when there is no shared CATALOG_CACHE_DIR to carry the namespace bump
+CLOSED_BUCKET_TTL = float(os.environ.get('TIMESERIES_CACHE_TTL', 300))
+
+# Counts of buckets that have already ended, keyed by (entity, unit, bucket start) and
+# stamped with the entity's catalog_cache version. New rows only ever land in the
+# current bucket, so these only change on delete, which bumps that version.
+_closed_buckets = {}  # key -> (version, stored at, count)
+_lock = threading.Lock()
+_database_offset = {'seconds': None, 'checked_at': 0.0}
+
+
+def bucket_starts(unit, count, now):
+    today = now.date()
+    if unit == 'day':
+        current = today
+        step = timedelta(days=1)
+    elif unit == 'week':
+        current = today - timedelta(days=today.weekday())
+        step = timedelta(weeks=1)
+    elif unit == 'month':
+        current = today.replace(day=1)
+        step = relativedelta(months=1)
+    else:
+        raise ValueError(f"Unsupported unit: {unit}")
+    return [current - step * i for i in range(count - 1, -1, -1)]
+
+
+def next_bucket(unit, start):
+    if unit == 'day':
+        return start + timedelta(days=1)
+    if unit == 'week':
+        return start + timedelta(weeks=1)
+    return start + relativedelta(months=1)
+
+
+def database_offset(cursor):
+    # The database session clock's offset from UTC, as NOW() - UTC_TIMESTAMP()
+    with _lock:
+        seconds, checked_at = _database_offset['seconds'], _database_offset['checked_at']
+    if seconds is None or time.monotonic() - checked_at >= CLOCK_CHECK_INTERVAL:
+        cursor.execute("SELECT TIMESTAMPDIFF(SECOND, UTC_TIMESTAMP(), NOW())")
+        seconds = int(cursor.fetchone()[0])
+        with _lock:
+            _database_offset['seconds'], _database_offset['checked_at'] = seconds, time.monotonic()
+    return timedelta(seconds=seconds)
+
+
+def clock_now(cursor, entity):
+    # The current time in the clock the entity's created_at values were written in
+    if ENTITY_CLOCKS[entity] == UTC:
+        return datetime.utcnow()
+    return datetime.utcnow() + database_offset(cursor)
+
+
+def bucket_query(entity, unit):
+    # Counts per bucket for rows created in [%s, %s)
+    return f"""SELECT {BUCKET_SQL[unit]} AS bucket, COUNT(*)
+               FROM {ENTITIES[entity]}
+               WHERE created_at >= %s AND created_at < %s
+               GROUP BY bucket"""
+
+
+def series(cursor, entity, unit='month', count=6, now=None):
+    # Returns [(label, count), ...] oldest first, running at most one grouped range query
+    if entity not in ENTITIES:
+        raise ValueError(f"Unsupported entity: {entity}")
+    if unit not in BUCKET_SQL:
+        raise ValueError(f"Unsupported unit: {unit}")
+    if count < 1 or count > MAX_BUCKETS:
+        raise ValueError(f"Bucket count must be between 1 and {MAX_BUCKETS}")
+    starts = bucket_starts(unit, count, now or clock_now(cursor, entity))
+    current = starts[-1]
+    version = catalog_cache.version(namespace(entity))
+    fresh_after = time.monotonic() - CLOSED_BUCKET_TTL
+    with _lock:
+        cached = {}
+        for b in starts[:-1]:
+            entry = _closed_buckets.get((entity, unit, b))
+            valid = entry is not None and entry[0] == version and entry[1] >= fresh_after
+            cached[b] = entry[2] if valid else None
+    missing = [b for b in starts[:-1] if cached[b] is None]
+    query_from = missing[0] if missing else current
+    cursor.execute(bucket_query(entity, unit), (query_from, next_bucket(unit, current)))
+    fetched = {}
+    for bucket, n in cursor.fetchall():
+        fetched[datetime.strptime(str(bucket)[:10], '%Y-%m-%d').date()] = int(n)
+    result = []
+    stored_at = time.monotonic()
+    with _lock:
+        for start in starts:
+            if start < query_from:
+                value = cached[start]
+            else:
+                value = fetched.get(start, 0)
+                if start != current:
+                    _closed_buckets[(entity, unit, start)] = (version, stored_at, value)
+            result.append((start.strftime(LABEL_FORMATS[unit]), value))
+    return result
+
+
+def namespace(entity):
+    return f"timeseries-{entity}"
+
+
+def invalidate(entity):
+    # Deleting rows can change buckets that have already closed; the bump reaches
+    # every worker sharing CATALOG_CACHE_DIR, this process also drops its copies now
+    catalog_cache.bump(namespace(entity))
+    with _lock:
+        for key in [k for k in _closed_buckets if k[0] == entity]:
+            del _closed_buckets[key]
@@ -0,0 +1,129 @@
+from db import get_connection
+from cache import catalog_cache
+import json
+import logging
+import os
+import threading
+import time
+import stats
+
+# Seconds between reloads from entity_counts; picks up writes made by other workers
+# when there is no shared CATALOG_CACHE_DIR to signal them
+RESYNC_INTERVAL = float(os.environ.get('UNREAD_RESYNC_INTERVAL', 30))
+# Seconds one event stream stays open; EventSource reconnects on its own, so workers
+# are not held by a tab forever
+STREAM_SECONDS = float(os.environ.get('UNREAD_STREAM_SECONDS', 300))
+# Seconds a long-poll request waits for a change before answering with the same count
+LONG_POLL_SECONDS = float(os.environ.get('UNREAD_LONG_POLL_SECONDS', 25))
+KEEPALIVE_SECONDS = 15
+RETRY_MS = 3000
+# How often waiting streams check the shared version stamp written by other workers
+_TICK = 1.0
+
+NAMESPACE = 'unread_contacts'
+
+# Process-wide state: every open admin tab in this worker reads the same number
+_count = None
+_loaded_at = 0.0
+_seen_version = None
+_changes = threading.Condition()
+_load_lock = threading.Lock()
+
+
+def _load():
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        try:
+            return stats.read_counts(cursor, conn)['unread_contacts']
+        finally:
+            cursor.close()
+    finally:
+        conn.close()
+
+
+def _stale():
+    return (_count is None or time.monotonic() - _loaded_at >= RESYNC_INTERVAL
+            or catalog_cache.version(NAMESPACE) != _seen_version)
+
+
+def _set(count, version=None):
+    global _count, _loaded_at, _seen_version
+    with _changes:
+        changed = count != _count
+        _count = count
+        _loaded_at = time.monotonic()
+        if version is not None:
+            _seen_version = version
+        if changed:
+            _changes.notify_all()
+
+
+def current():
+    # The unread count, reloaded at most once per RESYNC_INTERVAL (or when another
+    # worker signals a change) no matter how many tabs are listening
+    global _loaded_at, _seen_version
+    if _stale() and _load_lock.acquire(blocking=_count is None):
+        try:
+            if _stale():
+                version = catalog_cache.version(NAMESPACE)
+                try:
+                    _set(_load(), version)
+                except Exception as e:
+                    logging.error(f"Unread counter reload failed: {str(e)}")
+                    if _count is None:
+                        raise
+                    # Keep serving the last value until the next resync
+                    _loaded_at, _seen_version = time.monotonic(), version
+        finally:
+            _load_lock.release()
+    return _count
+
+
+def adjust(delta):
+    # Call after the commit that changed the unread rows (stats.adjust has already
+    # updated entity_counts in that transaction)
+    if not delta:
+        return
+    # Other workers reload on their next tick; this one applies the delta directly
+    catalog_cache.bump(NAMESPACE)
+    version = catalog_cache.version(NAMESPACE)
+    with _changes:
+        if _count is not None:
+            _set(max(_count + delta, 0), version)
+
+
+def wait_for_change(known, timeout):
+    # Blocks until the count differs from the caller's known value or timeout passes
+    deadline = time.monotonic() + timeout
+    count = current()
+    while count == known:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        with _changes:
+            if _count == known:
+                _changes.wait(min(_TICK, remaining))
+        count = current()
+    return count
+
+
+def _event(count):
+    return f"event: unread\ndata: {json.dumps({'unread_count': count})}\n\n"
+
+
+def stream():
+    # Server-Sent Events: the current count straight away, then one event per change
+    count = current()
+    yield f"retry: {RETRY_MS}\n" + _event(count)
+    closes_at = time.monotonic() + STREAM_SECONDS
+    while True:
+        remaining = closes_at - time.monotonic()
+        if remaining <= 0:
+            break
+        latest = wait_for_change(count, min(KEEPALIVE_SECONDS, remaining))
+        if latest != count:
+            count = latest
+            yield _event(count)
+        else:
+            yield ": keepalive\n\n"
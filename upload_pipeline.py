@@ -0,0 +1,197 @@
+from concurrent.futures import ThreadPoolExecutor
+from db import get_connection
+import logging
+import os
+import shlex
+import storage
+import subprocess
+import threading
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; without it no thumbnails are made
+    Image = None
+
+UPLOAD_WORKERS = int(os.environ.get('UPLOAD_WORKERS', 2))
+UPLOAD_QUEUE_LIMIT = int(os.environ.get('UPLOAD_QUEUE_LIMIT', 32))  # jobs queued or running per worker process
+# Optional virus scanner, run as "<command> <file>"; a non-zero exit rejects the file
+SCAN_COMMAND = os.environ.get('UPLOAD_SCAN_COMMAND')
+THUMBNAIL_SIZE = (200, 200)
+
+CREATE_TABLE = '''CREATE TABLE IF NOT EXISTS admission_files
+                  (id INT(11) PRIMARY KEY AUTO_INCREMENT,
+                   admission_id INT(11) NOT NULL,
+                   kind VARCHAR(30) NOT NULL,
+                   path VARCHAR(255) NOT NULL,
+                   staged_path VARCHAR(255),
+                   sha256 CHAR(64),
+                   size_bytes BIGINT,
+                   status VARCHAR(20) NOT NULL DEFAULT 'staged',
+                   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                   INDEX idx_admission_files_admission (admission_id))'''
+
+_executor = None
+_executor_pid = None
+_slots = None
+_lock = threading.Lock()
+
+
+def stage_file(file, kind):
+    # Streams an upload into the staging area and returns the record the pipeline
+    # needs; 'path' is the content-addressed path the file will be served from
+    staged, digest, size = storage.spool(file)
+    return {'kind': kind, 'path': storage.blob_path('admissions', digest, file.filename), 'staged': staged,
+            'sha256': digest, 'size': size}
+
+
+def record_staged(cursor, admission_id, staged_files):
+    # Rows for the worker plus one store reference per file, in the admission's transaction
+    cursor.executemany(
+        "INSERT INTO admission_files (admission_id, kind, path, staged_path, sha256, size_bytes) VALUES (%s, %s, %s, %s, %s, %s)",
+        [(admission_id, r['kind'], r['path'], r['staged'], r['sha256'], r['size']) for r in staged_files])
+    for record in staged_files:
+        storage.acquire(cursor, record['path'], record['sha256'], record['size'])
+
+
+def discard_staged(staged_files):
+    for record in staged_files:
+        if os.path.exists(record['staged']):
+            os.remove(record['staged'])
+
+
+def _get_executor():
+    # Threads don't survive fork, so each gunicorn worker builds its own executor
+    global _executor, _executor_pid, _slots
+    pid = os.getpid()
+    if _executor is None or _executor_pid != pid:
+        with _lock:
+            if _executor is None or _executor_pid != pid:
+                _executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix='uploads')
+                _slots = threading.BoundedSemaphore(UPLOAD_QUEUE_LIMIT)
+                _executor_pid = pid
+    return _executor
+
+
+def submit(admission_id):
+    executor = _get_executor()
+    if not _slots.acquire(blocking=False):
+        # Queue is full: process in the request rather than grow the backlog without bound
+        logging.warning(f"Upload queue full, processing admission {admission_id} inline")
+        process_admission(admission_id)
+        return
+    future = executor.submit(process_admission, admission_id)
+    future.add_done_callback(lambda f: _slots.release())
+
+
+def scan_file(path):
+    if not SCAN_COMMAND:
+        return True
+    result = subprocess.run(shlex.split(SCAN_COMMAND) + [path], capture_output=True)
+    if result.returncode != 0:
+        logging.warning(f"Upload scan rejected {path}: {result.stdout.decode(errors='replace').strip()}")
+    return result.returncode == 0
+
+
+def thumbnail_path(path):
+    root, ext = os.path.splitext(path)
+    return f"{root}_thumb{ext}"
+
+
+def make_thumbnail(path):
+    if Image is None or os.path.exists(thumbnail_path(path)):
+        return
+    try:
+        with Image.open(path) as image:
+            image.thumbnail(THUMBNAIL_SIZE)
+            image.save(thumbnail_path(path))
+    except Exception as e:
+        logging.warning(f"Thumbnail failed for {path}: {str(e)}")
+
+
+def remove_thumbnail(path):
+    # For photos whose last store reference was released
+    if path and os.path.exists(storage.full_path(thumbnail_path(path))):
+        os.remove(storage.full_path(thumbnail_path(path)))
+
+
+def drop_rejected(cursor, admission_id, kind, path):
+    # The admission row must stop naming a file whose reference was released, or deleting
+    # the admission would release it a second time (and take another admission's)
+    if kind in ('photo', 'disability_certificate'):
+        cursor.execute(f"UPDATE admissions SET {kind} = NULL WHERE id = %s AND {kind} = %s",
+                       (admission_id, path))
+        return
+    cursor.execute("SELECT documents FROM admissions WHERE id = %s", (admission_id,))
+    row = cursor.fetchone()
+    documents = (row['documents'] or '').split(',') if row else []
+    if path in documents:
+        documents.remove(path)  # one reference per uploaded copy
+        cursor.execute("UPDATE admissions SET documents = %s WHERE id = %s",
+                       (','.join(documents) or None, admission_id))
+
+
+def process_admission(admission_id):
+    # Moves every staged file of one admission into static storage and records the outcome
+    conn = get_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        # Locks the admission so a concurrent delete waits for this commit; one that
+        # committed first has already discarded the staged files
+        cursor.execute("SELECT id FROM admissions WHERE id = %s FOR UPDATE", (admission_id,))
+        if not cursor.fetchall():
+            logging.info(f"Admission {admission_id} was deleted before its uploads were processed")
+            conn.rollback()
+            return
+        cursor.execute("""SELECT id, kind, path, staged_path, sha256, size_bytes FROM admission_files
+                          WHERE admission_id = %s AND status = 'staged'""", (admission_id,))
+        failed = False
+        released = []
+        for record in cursor.fetchall():
+            staged = record['staged_path']
+            try:
+                if not scan_file(staged):
+                    os.remove(staged)
+                    if storage.release(cursor, record['path']):
+                        released.append(record['path'])
+                    drop_rejected(cursor, admission_id, record['kind'], record['path'])
+                    cursor.execute("UPDATE admission_files SET status = 'rejected', staged_path = NULL WHERE id = %s",
+                                   (record['id'],))
+                    failed = True
+                    continue
+                storage.place(staged, record['path'])
+                if record['kind'] == 'photo':
+                    make_thumbnail(storage.full_path(record['path']))
+                cursor.execute("UPDATE admission_files SET status = 'stored', staged_path = NULL WHERE id = %s",
+                               (record['id'],))
+                logging.info(f"Stored {record['kind']} for admission {admission_id}: {record['path']} "
+                             f"({record['size_bytes']} bytes, sha256 {record['sha256']})")
+            except Exception as e:
+                logging.error(f"Processing {staged} for admission {admission_id} failed: {str(e)}")
+                cursor.execute("UPDATE admission_files SET status = 'failed' WHERE id = %s", (record['id'],))
+                failed = True
+        cursor.execute("UPDATE admissions SET upload_status = %s WHERE id = %s",
+                       ('failed' if failed else 'complete', admission_id))
+        conn.commit()
+        for path in released:
+            storage.remove(conn, path)
+    except Exception as e:
+        logging.error(f"Upload pipeline error for admission {admission_id}: {str(e)}")
+        conn.rollback()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def resume_pending():
+    # Requeue admissions whose files were staged but never processed (e.g. worker restart)
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT DISTINCT admission_id FROM admission_files WHERE status = 'staged'")
+        admission_ids = [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+        conn.close()
+    for admission_id in admission_ids:
+        process_admission(admission_id)
+    return admission_ids